@@ -7,7 +7,7 @@ import django_filters
 from django import forms
 from django_filters import FilterSet
 from .models import Asset, AssetAssignment, AssetCategory, AssetRequest
-from base.methods import reload_queryset
+from horilla_widgets.widgets.select_widgets import autocomplete_fields
 
 
 class CustomFilterSet(FilterSet):
@@ -24,7 +24,7 @@ class CustomFilterSet(FilterSet):
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        reload_queryset(self.form.fields)
+        autocomplete_fields(self.form.fields)
         for field_name, field in self.form.fields.items():
             filter_widget = self.filters[field_name]
             widget = filter_widget.field.widget
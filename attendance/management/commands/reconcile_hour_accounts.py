@@ -0,0 +1,52 @@
+"""
+reconcile_hour_accounts.py
+
+Management command to rebuild the monthly hour accounts from the attendances.
+
+The accounts are kept up to date by the attendance save, this command repairs
+them after changes the save does not see, e.g. a leave approved on a day with a
+validated attendance, or attendances written with bulk queries.
+"""
+from datetime import date
+from django.core.management.base import BaseCommand, CommandError
+from attendance.methods.hour_account import attendance_months, reconcile_month
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the monthly hour accounts from the attendances"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--year", type=int, help="Only rebuild the accounts of this year"
+        )
+        parser.add_argument(
+            "--month",
+            type=int,
+            help="Only rebuild the accounts of this month (1-12), needs --year",
+        )
+
+    def handle(self, *args, **options):
+        year, month = options["year"], options["month"]
+        if month is not None:
+            if year is None or not 1 <= month <= 12:
+                raise CommandError("--month needs --year and a month from 1 to 12")
+            months = [date(year, month, 1)]
+        elif year is not None:
+            months = attendance_months(date(year, 1, 1), date(year, 12, 31))
+        else:
+            months = attendance_months()
+
+        total_updated = total_created = 0
+        for first_day in months:
+            updated, created = reconcile_month(first_day.year, first_day.month)
+            total_updated += updated
+            total_created += created
+            self.stdout.write(
+                f"{first_day:%B %Y}: {updated} accounts updated, {created} created"
+            )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{len(months)} months rebuilt, {total_updated} accounts updated, "
+                f"{total_created} created"
+            )
+        )
@@ -0,0 +1,253 @@
+"""
+hour_account.py
+
+This module is used to keep the monthly hour accounts (AttendanceOverTime) of the
+employees in step with their attendances.
+
+Saving or deleting an attendance applies the difference between its old and new
+share of the account with F() updates, instead of summing the whole month again.
+reconcile_month rebuilds the accounts of a month from one aggregate query, used
+by the reconcile_hour_accounts command to repair accounts changed outside of the
+attendance save, e.g. by a leave approved afterwards.
+"""
+from django.db import transaction
+from django.db.models import (
+    Exists,
+    IntegerField,
+    OuterRef,
+    Q,
+    Sum,
+    Value,
+)
+from django.db.models.functions import Cast, Coalesce, Least, StrIndex, Substr
+from base import company_scope
+from attendance.models import (
+    Attendance,
+    AttendanceOverTime,
+    format_time,
+    strtime_seconds,
+)
+from leave.models import LeaveRequest
+
+MONTHS = [
+    "january",
+    "february",
+    "march",
+    "april",
+    "may",
+    "june",
+    "july",
+    "august",
+    "september",
+    "october",
+    "november",
+    "december",
+]
+
+
+def on_approved_leave(employee_id, attendance_date):
+    """
+    Checks the employee has an approved leave on the date
+    """
+    return LeaveRequest.objects.filter(
+        employee_id=employee_id,
+        start_date__lte=attendance_date,
+        end_date__gte=attendance_date,
+        status="approved",
+    ).exists()
+
+
+def account_share(attendance, on_leave=None):
+    """
+    Returns the worked, pending and overtime seconds the attendance adds to the
+    hour account of its month. Only the validated attendances out of an approved
+    leave count for the worked hours, up to their minimum hour.
+    """
+    worked = pending = 0
+    if on_leave is None:
+        on_leave = on_approved_leave(
+            attendance.employee_id_id, attendance.attendance_date
+        )
+    if attendance.attendance_validated and not on_leave:
+        minimum = strtime_seconds(attendance.minimum_hour)
+        worked = min(minimum, attendance.at_work_second or 0)
+        pending = minimum - worked
+    overtime = attendance.approved_overtime_second or 0
+    return worked, pending, overtime
+
+
+def _account_key(attendance):
+    return (
+        attendance.employee_id_id,
+        MONTHS[attendance.attendance_date.month - 1],
+        str(attendance.attendance_date.year),
+    )
+
+
+def _add_to_account(key, worked, pending, overtime):
+    employee_id, month, year = key
+    account, _created = AttendanceOverTime.objects.get_or_create(
+        employee_id_id=employee_id,
+        month=month,
+        year=year,
+    )
+    if not (worked or pending or overtime):
+        return
+    accounts = AttendanceOverTime.objects.filter(pk=account.pk)
+    accounts.update(
+        hour_account_second=Coalesce("hour_account_second", 0) + worked,
+        hour_pending_second=Coalesce("hour_pending_second", 0) + pending,
+        overtime_second=Coalesce("overtime_second", 0) + overtime,
+    )
+    # the update holds the row lock until the end of the transaction, so the
+    # H:M fields are rendered from the seconds no other save has changed since
+    seconds = accounts.values(
+        "hour_account_second", "hour_pending_second", "overtime_second"
+    ).get()
+    accounts.update(
+        worked_hours=format_time(seconds["hour_account_second"]),
+        pending_hours=format_time(seconds["hour_pending_second"]),
+        overtime=format_time(seconds["overtime_second"]),
+    )
+
+
+def update_hour_account(old, new):
+    """
+    Moves the share of an attendance in the hour accounts from its old state to
+    its new state, old is None for a new attendance and new is None for a
+    deleted attendance
+    """
+    shares = {}
+    on_leave = None
+    if old is not None:
+        on_leave = on_approved_leave(old.employee_id_id, old.attendance_date)
+        worked, pending, overtime = account_share(old, on_leave)
+        shares[_account_key(old)] = (-worked, -pending, -overtime)
+    if new is not None:
+        if old is None or (old.employee_id_id, old.attendance_date) != (
+            new.employee_id_id,
+            new.attendance_date,
+        ):
+            on_leave = None
+        worked, pending, overtime = account_share(new, on_leave)
+        old_worked, old_pending, old_overtime = shares.get(
+            _account_key(new), (0, 0, 0)
+        )
+        shares[_account_key(new)] = (
+            old_worked + worked,
+            old_pending + pending,
+            old_overtime + overtime,
+        )
+    # the account of an employee out of the active company is still updated
+    with company_scope.active_company(None), transaction.atomic():
+        for key, (worked, pending, overtime) in shares.items():
+            _add_to_account(key, worked, pending, overtime)
+
+
+def _minimum_seconds():
+    # minimum_hour is stored in H:M format
+    colon = StrIndex("minimum_hour", Value(":"))
+    hours = Cast(Substr("minimum_hour", 1, colon - 1), IntegerField())
+    minutes = Cast(Substr("minimum_hour", colon + 1), IntegerField())
+    return hours * 3600 + minutes * 60
+
+
+def month_totals(year, month, employee_ids=None):
+    """
+    Returns the worked, pending and overtime seconds of every employee with an
+    attendance in the month, computed in one aggregate query
+    """
+    leave = LeaveRequest.objects.filter(
+        employee_id=OuterRef("employee_id"),
+        start_date__lte=OuterRef("attendance_date"),
+        end_date__gte=OuterRef("attendance_date"),
+        status="approved",
+    )
+    counted = Q(attendance_validated=True, on_leave=False)
+    attendances = Attendance.objects.filter(
+        attendance_date__year=year, attendance_date__month=month
+    )
+    if employee_ids is not None:
+        attendances = attendances.filter(employee_id__in=employee_ids)
+    return (
+        attendances.annotate(
+            on_leave=Exists(leave),
+            minimum_second=_minimum_seconds(),
+            worked_second=Least("minimum_second", Coalesce("at_work_second", 0)),
+        )
+        .order_by()
+        .values("employee_id")
+        .annotate(
+            worked=Coalesce(Sum("worked_second", filter=counted), 0),
+            minimum=Coalesce(Sum("minimum_second", filter=counted), 0),
+            overtime=Coalesce(Sum("approved_overtime_second"), 0),
+        )
+    )
+
+
+def reconcile_month(year, month, employee_ids=None):
+    """
+    Rebuilds the hour accounts of the month from the attendances, of every
+    employee or of the given employees. The accounts of employees without an
+    attendance in the month are reset to zero. Returns the number of accounts
+    updated and created.
+    """
+    month_name = MONTHS[month - 1]
+    with company_scope.active_company(None):
+        totals = {
+            row["employee_id"]: row
+            for row in month_totals(year, month, employee_ids)
+        }
+        accounts = AttendanceOverTime.objects.filter(month=month_name, year=str(year))
+        if employee_ids is not None:
+            accounts = accounts.filter(employee_id__in=employee_ids)
+        accounts = list(accounts)
+    existing = {account.employee_id_id for account in accounts}
+    accounts += [
+        AttendanceOverTime(employee_id_id=employee_id, month=month_name, year=str(year))
+        for employee_id in totals
+        if employee_id not in existing
+    ]
+    for account in accounts:
+        row = totals.get(account.employee_id_id)
+        worked = row["worked"] if row else 0
+        pending = row["minimum"] - worked if row else 0
+        overtime = row["overtime"] if row else 0
+        account.month_sequence = month - 1
+        account.hour_account_second = worked
+        account.hour_pending_second = pending
+        account.overtime_second = overtime
+        account.worked_hours = format_time(worked)
+        account.pending_hours = format_time(pending)
+        account.overtime = format_time(overtime)
+    created = [account for account in accounts if account.pk is None]
+    updated = [account for account in accounts if account.pk is not None]
+    with transaction.atomic():
+        AttendanceOverTime.objects.bulk_update(
+            updated,
+            [
+                "month_sequence",
+                "hour_account_second",
+                "hour_pending_second",
+                "overtime_second",
+                "worked_hours",
+                "pending_hours",
+                "overtime",
+            ],
+            batch_size=500,
+        )
+        AttendanceOverTime.objects.bulk_create(created, batch_size=500)
+    return len(updated), len(created)
+
+
+def attendance_months(start=None, end=None):
+    """
+    Returns the first day of every month with an attendance, in the optional
+    date range
+    """
+    attendances = Attendance.objects
+    if start is not None:
+        attendances = attendances.filter(attendance_date__gte=start)
+    if end is not None:
+        attendances = attendances.filter(attendance_date__lte=end)
+    return list(attendances.dates("attendance_date", "month"))
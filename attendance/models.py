@@ -6,10 +6,8 @@ This module is used to register models for recruitment app
 """
 from collections.abc import Iterable
 import json
-import contextlib
 from datetime import datetime, date, timedelta
 from django.db import models
-from django.db.models import Q
 from django.core.exceptions import ValidationError
 from django.utils.translation import gettext_lazy as _
 from base.models import Company, EmployeeShift, EmployeeShiftDay, WorkType
@@ -107,6 +105,7 @@ class AttendanceActivity(models.Model):
         """
 
         ordering = ["-attendance_date", "employee_id__employee_first_name", "clock_in"]
+        indexes = [models.Index(fields=["employee_id", "attendance_date"])]
 
 
 class Attendance(models.Model):
@@ -211,6 +210,11 @@ class Attendance(models.Model):
         """
 
         unique_together = ("employee_id", "attendance_date")
+        # the validated and not validated tabs sorted by date
+        indexes = [
+            models.Index(fields=["attendance_validated", "attendance_date"]),
+            models.Index(fields=["attendance_date"]),
+        ]
         permissions = [
             ("change_validateattendance", "Validate Attendance"),
             ("change_approveovertime", "Change Approve Overtime"),
@@ -250,7 +254,15 @@ class Attendance(models.Model):
             pending_hours = format_time(pending_seconds)
             return pending_hours
 
-    def save(self, *args, **kwargs):
+    def compute_fields(self, attendance_day, condition):
+        """
+        This method is used to set the fields derived from the worked and
+        minimum hours before saving, also used by the bulk import
+
+        Args:
+            attendance_day (obj): EmployeeShiftDay of the attendance date
+            condition (obj): AttendanceValidationCondition instance or None
+        """
         minimum_hour = self.minimum_hour
         self_at_work = self.attendance_worked_hour
         self.attendance_overtime = format_time(
@@ -260,12 +272,8 @@ class Attendance(models.Model):
 
         self.at_work_second = strtime_seconds(self_at_work)
         self.overtime_second = strtime_seconds(self_overtime)
-        self.attendance_day = EmployeeShiftDay.objects.get(
-            day=self.attendance_date.strftime("%A").lower()
-        )
-        prev_attendance_approved = False
+        self.attendance_day = attendance_day
 
-        condition = AttendanceValidationCondition.objects.first()
         if self.is_validate_request:
             self.is_validate_request_approved = False
             self.attendance_validated = False
@@ -278,36 +286,28 @@ class Attendance(models.Model):
                 self.overtime_second = cutoff_seconds
                 self.attendance_overtime = format_time(cutoff_seconds)
 
-        if self.pk is not None:
-            # Get the previous values of the boolean field
-            prev_state = Attendance.objects.get(pk=self.pk)
-            prev_attendance_approved = prev_state.attendance_overtime_approve
-
-        super().save(*args, **kwargs)
-        employee_ot = self.employee_id.employee_overtime.filter(
-            month=self.attendance_date.strftime("%B").lower(),
-            year=self.attendance_date.strftime("%Y"),
-        )
-        if employee_ot.exists():
-            self.update_ot(employee_ot.first())
-        else:
-            self.create_ot()
-            self.update_ot(employee_ot.first())
-        approved = self.attendance_overtime_approve
-        attendance_account = self.employee_id.employee_overtime.filter(
-            month=self.attendance_date.strftime("%B").lower(),
-            year=self.attendance_date.year,
-        ).first()
-        total_ot_seconds = attendance_account.overtime_second
-        if approved and prev_attendance_approved is False:
+        if self.attendance_overtime_approve:
             self.approved_overtime_second = self.overtime_second
-            total_ot_seconds = total_ot_seconds + self.approved_overtime_second
-        elif not approved:
-            total_ot_seconds = total_ot_seconds - self.approved_overtime_second
+        else:
             self.approved_overtime_second = 0
-        attendance_account.overtime = format_time(total_ot_seconds)
-        attendance_account.save()
+
+    def save(self, *args, **kwargs):
+        self.compute_fields(
+            EmployeeShiftDay.objects.get(
+                day=self.attendance_date.strftime("%A").lower()
+            ),
+            AttendanceValidationCondition.objects.first(),
+        )
+
+        # imported here, the hour account module imports the attendance models
+        from attendance.methods.hour_account import update_hour_account
+
+        prev_state = None
+        if self.pk is not None:
+            prev_state = Attendance._base_manager.filter(pk=self.pk).first()
+
         super().save(*args, **kwargs)
+        update_hour_account(prev_state, self)
 
     def serialize(self):
         """
@@ -332,85 +332,15 @@ class Attendance(models.Model):
         return serialized_data
 
     def delete(self, *args, **kwargs):
-        # Custom delete logic
-        # Perform additional operations before deleting the object
-        with contextlib.suppress(Exception):
-            AttendanceActivity.objects.filter(
-                attendance_date=self.attendance_date, employee_id=self.employee_id
-            ).delete()
-            employee_ot = self.employee_id.employee_overtime.filter(
-                month=self.attendance_date.strftime("%B").lower(),
-                year=self.attendance_date.strftime("%Y"),
-            )
-        if employee_ot.exists():
-            self.update_ot(employee_ot.first())
-        # Call the superclass delete() method to delete the object
-        super().delete(*args, **kwargs)
-
-        # Perform additional operations after deleting the object
-
-    def create_ot(self):
-        """
-        this method is used to create new AttendanceOvertime's instance if there
-        is no existing for a specific month and year
-        """
-        employee_ot = AttendanceOverTime()
-        employee_ot.employee_id = self.employee_id
-        employee_ot.month = self.attendance_date.strftime("%B").lower()
-        employee_ot.year = self.attendance_date.year
-        if self.attendance_overtime_approve:
-            employee_ot.overtime = self.attendance_overtime
-        if self.attendance_validated:
-            employee_ot.hour_account = self.attendance_worked_hour
-        employee_ot.save()
-        return self
-
-    def update_ot(self, employee_ot):
-        """
-        This method is used to update the overtime
-
-        Args:
-            employee_ot (obj): AttendanceOverTime instance
-        """
-        approved_leave_requests = self.employee_id.leaverequest_set.filter(
-            start_date__lte=self.attendance_date,
-            end_date__gte=self.attendance_date,
-            status="approved",
-        )
-
-        # Create a Q object to combine multiple conditions for the exclude clause
-        exclude_condition = Q()
-        for leave_request in approved_leave_requests:
-            exclude_condition |= Q(
-                attendance_date__range=(
-                    leave_request.start_date,
-                    leave_request.end_date,
-                )
-            )
-
-        # Filter Attendance objects
-        month_attendances = Attendance.objects.filter(
-            employee_id=self.employee_id,
-            attendance_date__month=self.attendance_date.month,
-            attendance_date__year=self.attendance_date.year,
-            attendance_validated=True,
-        ).exclude(exclude_condition)
-        hour_balance = 0
-        hours_pending = 0
-        minimum_hour_second = 0
-        for attendance in month_attendances:
-            required_work_second = strtime_seconds(attendance.minimum_hour)
-            at_work_second = min(
-                required_work_second,
-                attendance.at_work_second,
-            )
-            hour_balance = hour_balance + at_work_second
-            minimum_hour_second += strtime_seconds(attendance.minimum_hour)
-            hours_pending = minimum_hour_second - hour_balance
-        employee_ot.worked_hours = format_time(hour_balance)
-        employee_ot.pending_hours = format_time(hours_pending)
-        employee_ot.save()
-        return employee_ot
+        from attendance.methods.hour_account import update_hour_account
+
+        AttendanceActivity.objects.filter(
+            attendance_date=self.attendance_date, employee_id=self.employee_id
+        ).delete()
+        result = super().delete(*args, **kwargs)
+        # the share of the attendance is taken out of its month's hour account
+        update_hour_account(self, None)
+        return result
 
     def clean(self, *args, **kwargs):
         super().clean(*args, **kwargs)
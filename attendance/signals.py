@@ -0,0 +1,10 @@
+"""
+signals.py
+
+This module is used to define the signals of the attendance app
+"""
+from django.dispatch import Signal
+
+# sent after attendances are created with bulk_create, which sends no pre_save
+# or post_save signal, with the created attendances as the attendances argument
+attendances_created = Signal()
@@ -1,175 +1,234 @@
 """
 process_attendance_data.py
 
-This module contains a function for processing attendance data 
+This module contains a function for processing attendance data
 from Excel files and saving it to a database.
+
+The rows are validated column by column: the dates and times are parsed for the
+whole DataFrame at once, the badges, shifts and work types are resolved from
+dictionaries built with one query each, and the existing attendances are found
+with one query. The valid rows are created with bulk_create and the hour
+accounts are rebuilt once per month at the end.
 """
 from datetime import datetime
 import pandas as pd
+from django.db import transaction
 from employee.models import Employee
-from attendance.models import Attendance
-from base.models import EmployeeShift, WorkType
+from attendance.methods.hour_account import reconcile_month
+from attendance.models import (
+    Attendance,
+    AttendanceValidationCondition,
+)
+from attendance.signals import attendances_created
+from base.models import EmployeeShift, EmployeeShiftDay, WorkType
+
+COLUMNS = [
+    "Badge ID",
+    "Shift",
+    "Work type",
+    "Attendance date",
+    "Check-in date",
+    "Check-in",
+    "Check-out date",
+    "Check-out",
+    "Worked hour",
+    "Minimum hour",
+]
+DATE_ERRORS = {
+    "Attendance date": ("Error14", "The date format for attendance date is not valid"),
+    "Check-in date": ("Error15", "The date format for Check-in date is not valid"),
+    "Check-out date": ("Error16", "The date format for Check-out date is not valid"),
+}
+TIME_ERRORS = {
+    "Check-in": ("Error10", "check-in time"),
+    "Check-out": ("Error11", "check-out time"),
+    "Worked hour": ("Error12", "worked hours"),
+    "Minimum hour": ("Error13", "minimum hours"),
+}
+BATCH_SIZE = 500
 
 
 def format_time(time_obj):
     return time_obj.strftime("%H:%M") if time_obj else None
 
 
-def process_attendance_data(attendance_dicts):
+def parse_dates(column):
+    """
+    Parses a column of dates, the cells which are not a date are NaT
+    """
+    return pd.to_datetime(column, errors="coerce", format="mixed").dt.date
+
+
+def parse_times(column):
+    """
+    Parses a column of HH:MM:SS times, the cells which are not a time are NaT
+    """
+    return pd.to_datetime(
+        column.astype(str), errors="coerce", format="%H:%M:%S"
+    ).dt.time
+
+
+def lookup(queryset, field, values):
+    """
+    Returns the objects of the queryset whose field is one of the values, by
+    value, keeping the first object of a value like first() would
+    """
+    objects = {}
+    for obj in queryset.filter(**{f"{field}__in": values}).order_by("-pk"):
+        objects[getattr(obj, field)] = obj
+    return objects
+
+
+def process_attendance_data(data_frame):
     """
-    Process a list of attendance data dictionaries and save valid records to the database,
-    while collecting error details for invalid records.
+    Process the attendance rows of a DataFrame and save valid records to the
+    database, while collecting error details for invalid records.
 
     Parameters:
-        attendance_dicts (list of dict): A list of dictionaries containing attendance data.
+        data_frame (DataFrame): The attendance data, with a column per import field.
 
     Returns:
         list: A list of dictionaries representing errors encountered during processing.
     """
-    error_list = []
-    for attendance_data in attendance_dicts:
-        save = True
-        try:
-            today = datetime.today().date()
-            badge_id = attendance_data["Badge ID"]
-            shift_id = attendance_data["Shift"]
-            work_type_id = attendance_data["Work type"]
-            employee = Employee.objects.filter(badge_id=badge_id).first()
-            shift = EmployeeShift.objects.filter(employee_shift=shift_id).first()
-            work_type = WorkType.objects.filter(work_type=work_type_id).first()
-            attendance_date = None
-            check_in_date = None
-            check_out_date = None
-
-            try:
-                attendance_date = pd.to_datetime(
-                    attendance_data["Attendance date"]
-                ).date()
-                existing_attendance = Attendance.objects.filter(
-                    employee_id__badge_id=badge_id,
-                    attendance_date=attendance_data["Attendance date"],
-                ).first()
-                if existing_attendance:
-                    attendance_data[
-                        "Error6"
-                    ] = "Attendance for this date already exists"
-                    save = False
-            except Exception as exception:
-                attendance_data[
-                    "Error14"
-                ] = "The date format for attendance date is not valid"
-                save = False
-
-            try:
-                check_in_date = pd.to_datetime(attendance_data["Check-in date"]).date()
-            except Exception as exception:
-                attendance_data[
-                    "Error15"
-                ] = "The date format for Check-in date is not valid"
-                save = False
-
-            try:
-                check_out_date = pd.to_datetime(
-                    attendance_data["Check-out date"]
-                ).date()
-            except Exception as exception:
-                attendance_data[
-                    "Error16"
-                ] = "The date format for Check-out date is not valid"
-                save = False
-
-            try:
-                check_in = pd.to_datetime(
-                    attendance_data["Check-in"], format="%H:%M:%S"
-                ).time()
-            except Exception as exception:
-                attendance_data["Error10"] = f"{exception} of check-in time"
-                save = False
-
-            try:
-                check_out = pd.to_datetime(
-                    attendance_data["Check-out"], format="%H:%M:%S"
-                ).time()
-            except Exception as exception:
-                attendance_data["Error11"] = f"{exception} of check-out time"
-                save = False
-
-            try:
-                worked_hour = pd.to_datetime(
-                    attendance_data["Worked hour"], format="%H:%M:%S"
-                ).time()
-            except Exception as exception:
-                attendance_data["Error12"] = f"{exception} of worked hours"
-                save = False
-
-            try:
-                minimum_hour = pd.to_datetime(
-                    attendance_data["Minimum hour"], format="%H:%M:%S"
-                ).time()
-            except Exception as exception:
-                attendance_data["Error13"] = f"{exception} of minimum hours"
-                save = False
-
-            if employee is None:
-                attendance_data["Error1"] = f"Invalid Badge ID given {badge_id}"
-                save = False
-
-            if shift is None:
-                attendance_data["Error2"] = f"Invalid shift '{shift_id}'"
-                save = False
-
-            if work_type is None:
-                attendance_data["Error3"] = f"Invalid work type '{work_type_id}'"
-                save = False
-
-            if check_in_date is not None and attendance_date is not None:
-                if check_in_date < attendance_date:
-                    attendance_data[
-                        "Error4"
-                    ] = "Attendance check-in date cannot be smaller than attendance date"
-                    save = False
-
-            if check_in_date is not None and check_out_date is not None:
-                if check_out_date < check_in_date:
-                    attendance_data[
-                        "Error5"
-                    ] = "Attendance check-out date never smaller than attendance check-in date"
-                    save = False
-
-            if attendance_date is not None:
-                if attendance_date >= today:
-                    attendance_data["Error7"] = "Attendance date in future"
-                    save = False
-
-            if check_in_date is not None:
-                if check_in_date >= today:
-                    attendance_data["Error8"] = "Attendance check in date in future"
-                    save = False
-
-            if check_out_date is not None:
-                if check_out_date >= today:
-                    attendance_data["Error9"] = "Attendance check out date in future"
-                    save = False
-
-            if save:
-                attendance = Attendance(
-                    employee_id=employee,
-                    shift_id=shift,
-                    work_type_id=work_type,
-                    attendance_date=attendance_date,
-                    attendance_clock_in_date=check_in_date,
-                    attendance_clock_in=format_time(check_in),
-                    attendance_clock_out_date=check_out_date,
-                    attendance_clock_out=format_time(check_out),
-                    attendance_worked_hour=format_time(worked_hour),
-                    minimum_hour=format_time(minimum_hour),
-                )
-                attendance.save()
-            else:
-                error_list.append(attendance_data)
-
-        except Exception as exception:
-            attendance_data["Error17"] = f"{str(exception)}"
-            error_list.append(attendance_data)
-
-    return error_list
+    data_frame = data_frame.reindex(columns=COLUMNS).reset_index(drop=True)
+    rows = data_frame.to_dict("records")
+    errors = [{} for _row in rows]
+    today = datetime.today().date()
+
+    def add_error(mask, key, message):
+        mask = mask.fillna(False).astype(bool)
+        for index in mask[mask].index:
+            errors[index][key] = message(index) if callable(message) else message
+
+    dates = {}
+    for column, (key, message) in DATE_ERRORS.items():
+        dates[column] = parse_dates(data_frame[column])
+        add_error(dates[column].isna(), key, message)
+    times = {}
+    for column, (key, name) in TIME_ERRORS.items():
+        times[column] = parse_times(data_frame[column])
+        add_error(
+            times[column].isna(),
+            key,
+            lambda index, column=column, name=name: (
+                f"time data '{rows[index][column]}' does not match format "
+                f"'%H:%M:%S' of {name}"
+            ),
+        )
+
+    badges = data_frame["Badge ID"].astype(str)
+    shift_names = data_frame["Shift"].astype(str)
+    work_type_names = data_frame["Work type"].astype(str)
+    employees = lookup(Employee.objects, "badge_id", set(badges))
+    shifts = lookup(EmployeeShift.objects, "employee_shift", set(shift_names))
+    work_types = lookup(WorkType.objects, "work_type", set(work_type_names))
+    add_error(
+        ~badges.isin(employees),
+        "Error1",
+        lambda index: f"Invalid Badge ID given {rows[index]['Badge ID']}",
+    )
+    add_error(
+        ~shift_names.isin(shifts),
+        "Error2",
+        lambda index: f"Invalid shift '{rows[index]['Shift']}'",
+    )
+    add_error(
+        ~work_type_names.isin(work_types),
+        "Error3",
+        lambda index: f"Invalid work type '{rows[index]['Work type']}'",
+    )
+
+    attendance_date = dates["Attendance date"]
+    check_in_date = dates["Check-in date"]
+    check_out_date = dates["Check-out date"]
+    add_error(
+        attendance_date.notna()
+        & check_in_date.notna()
+        & (check_in_date < attendance_date),
+        "Error4",
+        "Attendance check-in date cannot be smaller than attendance date",
+    )
+    add_error(
+        check_in_date.notna()
+        & check_out_date.notna()
+        & (check_out_date < check_in_date),
+        "Error5",
+        "Attendance check-out date never smaller than attendance check-in date",
+    )
+    add_error(
+        attendance_date.notna() & (attendance_date >= today),
+        "Error7",
+        "Attendance date in future",
+    )
+    add_error(
+        check_in_date.notna() & (check_in_date >= today),
+        "Error8",
+        "Attendance check in date in future",
+    )
+    add_error(
+        check_out_date.notna() & (check_out_date >= today),
+        "Error9",
+        "Attendance check out date in future",
+    )
+
+    # the attendances of an employee are unique by date across the companies
+    employee_ids = {employee.pk for employee in employees.values()}
+    valid_dates = attendance_date.dropna()
+    existing = set()
+    if employee_ids and not valid_dates.empty:
+        existing = set(
+            Attendance._base_manager.filter(
+                employee_id__in=employee_ids,
+                attendance_date__range=(valid_dates.min(), valid_dates.max()),
+            ).values_list("employee_id", "attendance_date")
+        )
+
+    shift_days = {day.day: day for day in EmployeeShiftDay.objects.all()}
+    condition = AttendanceValidationCondition.objects.first()
+    attendances = []
+    for index in range(len(rows)):
+        employee = employees.get(badges[index])
+        if employee is not None and not pd.isna(attendance_date[index]):
+            key = (employee.pk, attendance_date[index])
+            if key in existing:
+                errors[index]["Error6"] = "Attendance for this date already exists"
+        if errors[index]:
+            continue
+        day_name = attendance_date[index].strftime("%A").lower()
+        if day_name not in shift_days:
+            errors[index]["Error17"] = f"Shift day '{day_name}' does not exist"
+            continue
+        attendance = Attendance(
+            employee_id=employee,
+            shift_id=shifts[shift_names[index]],
+            work_type_id=work_types[work_type_names[index]],
+            attendance_date=attendance_date[index],
+            attendance_clock_in_date=check_in_date[index],
+            attendance_clock_in=format_time(times["Check-in"][index]),
+            attendance_clock_out_date=check_out_date[index],
+            attendance_clock_out=format_time(times["Check-out"][index]),
+            attendance_worked_hour=format_time(times["Worked hour"][index]),
+            minimum_hour=format_time(times["Minimum hour"][index]),
+        )
+        attendance.compute_fields(shift_days[day_name], condition)
+        attendances.append(attendance)
+        existing.add((employee.pk, attendance.attendance_date))
+
+    months = {}
+    with transaction.atomic():
+        for start in range(0, len(attendances), BATCH_SIZE):
+            batch = Attendance.objects.bulk_create(
+                attendances[start : start + BATCH_SIZE]
+            )
+            attendances_created.send(sender=Attendance, attendances=batch)
+        for attendance in attendances:
+            date = attendance.attendance_date
+            months.setdefault((date.year, date.month), set()).add(
+                attendance.employee_id_id
+            )
+        for (year, month), month_employee_ids in months.items():
+            reconcile_month(year, month, month_employee_ids)
+
+    return [
+        {**row, **row_errors} for row, row_errors in zip(rows, errors) if row_errors
+    ]
@@ -24,6 +24,7 @@ from attendance.methods.differentiate import get_diff_dict
 from attendance.views.views import paginator_qry
 from attendance.filters import AttendanceFilters, AttendanceRequestReGroup
 from base.methods import closest_numbers
+from base.pagination import page_ids
 
 
 def get_employee_last_name(attendance):
@@ -88,18 +89,16 @@ def request_attendance_view(request):
         template = "requests/attendance/view-requests.html"
     else:
         template = "requests/attendance/requests_empty.html"
-    requests_ids = json.dumps(
-        [instance.id for instance in paginator_qry(requests, None).object_list]
-    )
-    attendances_ids = json.dumps(
-        [instance.id for instance in paginator_qry(attendances, None).object_list]
-    )
+    requests_page = paginator_qry(requests, None)
+    requests_ids = page_ids(requests_page)
+    attendances_page = paginator_qry(attendances, None)
+    attendances_ids = page_ids(attendances_page)
     return render(
         request,
         template,
         {
-            "requests": paginator_qry(requests, None),
-            "attendances": paginator_qry(attendances, None),
+            "requests": requests_page,
+            "attendances": attendances_page,
             "requests_ids": requests_ids,
             "attendances_ids": attendances_ids,
             "f": filter_obj,
@@ -3,11 +3,11 @@ search.py
 
 This is moduel is used to register end point related to the search filter functionalities
 """
-import json
 from datetime import datetime
 from urllib.parse import parse_qs
 from django.shortcuts import render
 from base.methods import filtersubordinates, sortby, get_key_instances
+from base.pagination import page_ids, paginate
 from horilla.decorators import (
     hx_request_required,
     login_required,
@@ -28,7 +28,12 @@ from attendance.models import (
     AttendanceActivity,
     AttendanceLateComeEarlyOut,
 )
-from attendance.views.views import paginator_qry, strtime_seconds
+from attendance.views.views import (
+    ATTENDANCE_ORDER,
+    ATTENDANCE_RELATED,
+    paginator_qry,
+    strtime_seconds,
+)
 from django.utils.translation import gettext_lazy as _
 
 
@@ -55,16 +60,19 @@ def attendance_search(request):
     if condition is not None and condition.minimum_overtime_to_approve is not None:
         minot = strtime_seconds(condition.minimum_overtime_to_approve)
 
-    validate_attendances = Attendance.objects.filter(attendance_validated=False)
-    attendances = Attendance.objects.filter(attendance_validated=True)
-    ot_attendances = Attendance.objects.filter(
+    attendance_list = Attendance.objects.select_related(*ATTENDANCE_RELATED)
+    validate_attendances = attendance_list.filter(attendance_validated=False)
+    attendances = attendance_list.filter(attendance_validated=True)
+    ot_attendances = attendance_list.filter(
         attendance_overtime_approve=False,
         overtime_second__gte=minot,
         attendance_validated=True,
     )
 
     validate_attendances = AttendanceFilters(request.GET, validate_attendances).qs
-    attendances = AttendanceFilters(request.GET, attendances).qs
+    attendances = AttendanceFilters(request.GET, attendances).qs.order_by(
+        *ATTENDANCE_ORDER
+    )
     ot_attendances = AttendanceFilters(request.GET, ot_attendances).qs
 
     template = "attendance/attendance/tab_content.html"
@@ -104,20 +112,26 @@ def attendance_search(request):
             )
             month_name = _(date_object.strftime("%B"))
             template = "attendance/attendance/validate_attendance_empty.html"
-    validate_attendances_ids = json.dumps([instance.id for instance in paginator_qry(validate_attendances, request.GET.get("vpage")).object_list])
-    ot_attendances_ids = json.dumps([instance.id for instance in paginator_qry(ot_attendances, request.GET.get("opage")).object_list])
-    attendances_ids = json.dumps([instance.id for instance in paginator_qry(attendances, request.GET.get("page")).object_list])   
+    validate_attendances_page = paginator_qry(
+        validate_attendances, request.GET.get("vpage")
+    )
+    validate_attendances_ids = page_ids(validate_attendances_page)
+    ot_attendances_page = paginator_qry(ot_attendances, request.GET.get("opage"))
+    ot_attendances_ids = page_ids(ot_attendances_page)
+    attendances_page = paginate(
+        attendances,
+        request.GET.get("page"),
+        seek=ATTENDANCE_ORDER,
+        cursor=request.GET.get("cursor"),
+    )
+    attendances_ids = page_ids(attendances_page)
     return render(
         request,
         template,
         {
-            "validate_attendances": paginator_qry(
-                validate_attendances, request.GET.get("vpage")
-            ),
-            "attendances": paginator_qry(attendances, request.GET.get("page")),
-            "overtime_attendances": paginator_qry(
-                ot_attendances, request.GET.get("opage")
-            ),
+            "validate_attendances": validate_attendances_page,
+            "attendances": attendances_page,
+            "overtime_attendances": ot_attendances_page,
             "validate_attendances_ids": validate_attendances_ids,
             "ot_attendances_ids": ot_attendances_ids,
             "attendances_ids": attendances_ids,
@@ -271,12 +285,13 @@ def filter_own_attendance(request):
     keys_to_remove = [key for key, value in data_dict.items() if value == ["unknown"]]
     for key in keys_to_remove:
         data_dict.pop(key)
-    attendances_ids = json.dumps([instance.id for instance in paginator_qry(attendances, request.GET.get("page")).object_list])
+    attendances_page = paginator_qry(attendances, request.GET.get("page"))
+    attendances_ids = page_ids(attendances_page)
     return render(
         request,
         "attendance/own_attendance/attendances.html",
         {
-            "attendances": paginator_qry(attendances, request.GET.get("page")),
+            "attendances": attendances_page,
             "filter_dict": data_dict,
             "attendances_ids": attendances_ids,
         },
@@ -341,14 +356,16 @@ def search_attendance_requests(request):
         attendances = attendances.order_by(field_copy)
         template = "requests/attendance/group_by.html"
 
-    requests_ids = json.dumps([instance.id for instance in paginator_qry(requests, request.GET.get("rpage")).object_list])
-    attendances_ids = json.dumps([instance.id for instance in paginator_qry(attendances, request.GET.get("page")).object_list])
+    requests_page = paginator_qry(requests, request.GET.get("rpage"))
+    requests_ids = page_ids(requests_page)
+    attendances_page = paginator_qry(attendances, request.GET.get("page"))
+    attendances_ids = page_ids(attendances_page)
     return render(
         request,
         template,
         {
-            "requests": paginator_qry(requests, request.GET.get("rpage")),
-            "attendances": paginator_qry(attendances, request.GET.get("page")),
+            "requests": requests_page,
+            "attendances": attendances_page,
             "requests_ids": requests_ids,
             "attendances_ids": attendances_ids,
             "pd": previous_data,
@@ -22,7 +22,7 @@ from django.shortcuts import render, redirect
 from django.utils.translation import gettext_lazy as _
 from django.utils.translation import gettext as __
 from django.contrib import messages
-from django.core.paginator import Paginator
+from base.pagination import page_ids, paginate
 from django.db.models import ProtectedError
 from django.http import HttpResponseRedirect, HttpResponse, JsonResponse
 from django.views.decorators.http import require_http_methods
@@ -164,13 +164,17 @@ def attendance_create(request):
     return render(request, "attendance/attendance/form.html", {"form": form})
 
 
+# the unique order of the attendance lists, read with seek pagination
+ATTENDANCE_ORDER = ("-attendance_date", "-id")
+# the relations rendered on every row of the attendance lists
+ATTENDANCE_RELATED = ("employee_id", "shift_id", "work_type_id", "attendance_day")
+
+
 def paginator_qry(qryset, page_number):
     """
     This method is used to paginate queryset
     """
-    paginator = Paginator(qryset, 50)
-    qryset = paginator.get_page(page_number)
-    return qryset
+    return paginate(qryset, page_number)
 
 
 def attendance_excel(_request):
@@ -218,8 +222,7 @@ def attendance_import(request):
     if request.method == "POST":
         file = request.FILES["attendance_import"]
         data_frame = pd.read_excel(file)
-        attendance_dicts = data_frame.to_dict("records")
-        attendance_import = process_attendance_data(attendance_dicts)
+        attendance_import = process_attendance_data(data_frame)
 
         if attendance_import:
             error_data = handle_attendance_errors(attendance_import)
@@ -257,9 +260,12 @@ def attendance_view(request):
     minot = strtime_seconds("00:00")
     if condition is not None and condition.minimum_overtime_to_approve is not None:
         minot = strtime_seconds(condition.minimum_overtime_to_approve)
-    validate_attendances = Attendance.objects.filter(attendance_validated=False)
-    attendances = Attendance.objects.filter(attendance_validated=True)
-    ot_attendances = Attendance.objects.filter(
+    attendance_list = Attendance.objects.select_related(*ATTENDANCE_RELATED)
+    validate_attendances = attendance_list.filter(attendance_validated=False)
+    attendances = attendance_list.filter(attendance_validated=True).order_by(
+        *ATTENDANCE_ORDER
+    )
+    ot_attendances = attendance_list.filter(
         overtime_second__gte=minot,
         attendance_validated=True,
     )
@@ -276,43 +282,28 @@ def attendance_view(request):
         template = "attendance/attendance/attendance_view.html"
     else:
         template = "attendance/attendance/attendance_empty.html"
-    validate_attendances_ids = json.dumps(
-        [
-            instance.id
-            for instance in paginator_qry(
-                validate_attendances, request.GET.get("vpage")
-            ).object_list
-        ]
-    )
-    ot_attendances_ids = json.dumps(
-        [
-            instance.id
-            for instance in paginator_qry(
-                ot_attendances, request.GET.get("opage")
-            ).object_list
-        ]
+    validate_attendances_page = paginator_qry(
+        validate_attendances, request.GET.get("vpage")
     )
-    attendances_ids = json.dumps(
-        [
-            instance.id
-            for instance in paginator_qry(
-                attendances, request.GET.get("page")
-            ).object_list
-        ]
+    validate_attendances_ids = page_ids(validate_attendances_page)
+    ot_attendances_page = paginator_qry(ot_attendances, request.GET.get("opage"))
+    ot_attendances_ids = page_ids(ot_attendances_page)
+    attendances_page = paginate(
+        attendances,
+        request.GET.get("page"),
+        seek=ATTENDANCE_ORDER,
+        cursor=request.GET.get("cursor"),
     )
+    attendances_ids = page_ids(attendances_page)
     return render(
         request,
         template,
         {
             "form": form,
             "export_form": export_form,
-            "validate_attendances": paginator_qry(
-                validate_attendances, request.GET.get("vpage")
-            ),
-            "attendances": paginator_qry(attendances, request.GET.get("page")),
-            "overtime_attendances": paginator_qry(
-                ot_attendances, request.GET.get("opage")
-            ),
+            "validate_attendances": validate_attendances_page,
+            "attendances": attendances_page,
+            "overtime_attendances": ot_attendances_page,
             "validate_attendances_ids": validate_attendances_ids,
             "ot_attendances_ids": ot_attendances_ids,
             "attendances_ids": attendances_ids,
@@ -369,38 +360,23 @@ def attendance_delete(request, obj_id):
     """
     try:
         attendance = Attendance.objects.get(id=obj_id)
-        month = attendance.attendance_date
-        month = month.strftime("%B").lower()
-        overtime = attendance.employee_id.employee_overtime.filter(month=month).last()
-        if overtime is not None:
-            if attendance.attendance_overtime_approve:
-                # Subtract overtime of this attendance
-                total_overtime = strtime_seconds(overtime.overtime)
-                attendance_overtime_seconds = strtime_seconds(
-                    attendance.attendance_overtime
-                )
-                if total_overtime > attendance_overtime_seconds:
-                    total_overtime = total_overtime - attendance_overtime_seconds
-                else:
-                    total_overtime = attendance_overtime_seconds - total_overtime
-                overtime.overtime = format_time(total_overtime)
-                overtime.save()
-            try:
-                attendance.delete()
-                messages.success(request, _("Attendance deleted."))
-            except ProtectedError as e:
-                model_verbose_names_set = set()
-                for obj in e.protected_objects:
-                    model_verbose_names_set.add(__(obj._meta.verbose_name.capitalize()))
-                model_names_str = ", ".join(model_verbose_names_set)
-                messages.error(
-                    request,
-                    _(
-                        ("An attendance entry for {} already exists.").format(
-                            model_names_str
-                        )
-                    ),
-                )
+        # the approved overtime is taken out of the hour account on delete
+        try:
+            attendance.delete()
+            messages.success(request, _("Attendance deleted."))
+        except ProtectedError as e:
+            model_verbose_names_set = set()
+            for obj in e.protected_objects:
+                model_verbose_names_set.add(__(obj._meta.verbose_name.capitalize()))
+            model_names_str = ", ".join(model_verbose_names_set)
+            messages.error(
+                request,
+                _(
+                    ("An attendance entry for {} already exists.").format(
+                        model_names_str
+                    )
+                ),
+            )
     except Attendance.DoesNotExist:
         messages.error(request, _("Attendance Does not exists.."))
     return HttpResponseRedirect(request.META.get("HTTP_REFERER", "/"))
@@ -416,43 +392,25 @@ def attendance_bulk_delete(request):
     for attendance_id in ids:
         try:
             attendance = Attendance.objects.get(id=attendance_id)
-            month = attendance.attendance_date
-            month = month.strftime("%B").lower()
-            overtime = attendance.employee_id.employee_overtime.filter(
-                month=month
-            ).last()
-            if overtime is not None:
-                if attendance.attendance_overtime_approve:
-                    # Subtract overtime of this attendance
-                    total_overtime = strtime_seconds(overtime.overtime)
-                    attendance_overtime_seconds = strtime_seconds(
-                        attendance.attendance_overtime
+            try:
+                attendance.delete()
+                messages.success(request, _("Attendance Deleted"))
+
+            except ProtectedError as e:
+                model_verbose_names_set = set()
+                for obj in e.protected_objects:
+                    model_verbose_names_set.add(
+                        __(obj._meta.verbose_name.capitalize())
                     )
-                    if total_overtime > attendance_overtime_seconds:
-                        total_overtime = total_overtime - attendance_overtime_seconds
-                    else:
-                        total_overtime = attendance_overtime_seconds - total_overtime
-                    overtime.overtime = format_time(total_overtime)
-                    overtime.save()
-                try:
-                    attendance.delete()
-                    messages.success(request, _("Attendance Deleted"))
-
-                except ProtectedError as e:
-                    model_verbose_names_set = set()
-                    for obj in e.protected_objects:
-                        model_verbose_names_set.add(
-                            __(obj._meta.verbose_name.capitalize())
+                model_names_str = ", ".join(model_verbose_names_set)
+                messages.error(
+                    request,
+                    _(
+                        ("An attendance entry for {} already exists.").format(
+                            model_names_str
                         )
-                    model_names_str = ", ".join(model_verbose_names_set)
-                    messages.error(
-                        request,
-                        _(
-                            ("An attendance entry for {} already exists.").format(
-                                model_names_str
-                            )
-                        ),
-                    )
+                    ),
+                )
         except Attendance.DoesNotExist:
             messages.error(request, _("Attendance not found."))
 
@@ -476,19 +434,15 @@ def view_my_attendance(request):
         template = "attendance/own_attendance/view_own_attendances.html"
     else:
         template = "attendance/own_attendance/own_empty.html"
-    attendances_ids = json.dumps(
-        [
-            instance.id
-            for instance in paginator_qry(
-                employee_attendances, request.GET.get("page")
-            ).object_list
-        ]
+    attendances_page = paginator_qry(
+        employee_attendances, request.GET.get("page")
     )
+    attendances_ids = page_ids(attendances_page)
     return render(
         request,
         template,
         {
-            "attendances": paginator_qry(employee_attendances, request.GET.get("page")),
+            "attendances": attendances_page,
             "attendances_ids": attendances_ids,
             "f": filter,
         },
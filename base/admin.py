@@ -22,6 +22,7 @@ from base.models import (
     RotatingShiftAssign,
     ShiftRequest,
     WorkTypeRequest,
+    SchedulerLock,
 )
 
 # Register your models here.
@@ -41,3 +42,4 @@ admin.site.register(RotatingShift)
 admin.site.register(RotatingShiftAssign)
 admin.site.register(ShiftRequest)
 admin.site.register(WorkTypeRequest)
+admin.site.register(SchedulerLock)
@@ -11,3 +11,9 @@ class BaseConfig(AppConfig):
 
     default_auto_field = "django.db.models.BigAutoField"
     name = "base"
+
+    def ready(self):
+        from base import company_scope
+        from base import rotation  # noqa: F401, connects the rotation signals
+
+        company_scope.load_lookups()
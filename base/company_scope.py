@@ -0,0 +1,152 @@
+"""
+company_scope.py
+
+This module is used to scope the HorillaCompanyManager querysets to the active company.
+
+The company lookup path of each model, and whether its join can duplicate rows,
+are resolved once. The active company is held in a context variable set by
+CompanyMiddleware for the duration of a request, so the models are never patched
+per request and concurrent requests do not share their company.
+"""
+import contextlib
+import contextvars
+from django.apps import apps
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Q
+
+_active_company = contextvars.ContextVar("active_company", default=None)
+_lookups = {}
+
+
+def get_active_company():
+    """
+    Returns the id of the active company, None when every company is selected
+    """
+    return _active_company.get()
+
+
+def set_active_company(company_id):
+    """
+    Sets the active company, returns the token to reset it
+    """
+    if company_id == "all":
+        company_id = None
+    return _active_company.set(company_id)
+
+
+def reset_active_company(token):
+    """
+    Restores the active company that was set before the token
+    """
+    _active_company.reset(token)
+
+
+@contextlib.contextmanager
+def active_company(company_id):
+    """
+    Context manager to run a block of code scoped to the company, e.g. in a
+    background thread which has no request
+    """
+    token = set_active_company(company_id)
+    try:
+        yield
+    finally:
+        reset_active_company(token)
+
+
+def _resolve_lookup(model):
+    try:
+        model._meta.get_field("company_id")
+        return "company_id"
+    except FieldDoesNotExist:
+        pass
+    manager = getattr(model, "objects", None)
+    return getattr(manager, "related_company_field", None)
+
+
+def _lookup_fields(model, lookup):
+    """
+    Returns the fields along the lookup path, None when the path is not valid
+    """
+    opts = model._meta
+    fields = []
+    try:
+        for name in lookup.split("__"):
+            field = opts.get_field(name)
+            fields.append(field)
+            if not field.is_relation:
+                break
+            opts = field.related_model._meta
+    except FieldDoesNotExist:
+        return None
+    return fields
+
+
+def _fans_out(fields):
+    """
+    Checks the join along the fields can return a row more than once for an
+    object. Every relation before the last one has to be single valued, and the
+    last one may be a many to many relation through an auto created table, as its
+    (object, company) rows are unique.
+    """
+    for field in fields[:-1]:
+        if field.many_to_many or field.one_to_many:
+            return True
+    last = fields[-1]
+    if last.one_to_many:
+        return True
+    if last.many_to_many:
+        through = last.remote_field.through if last.concrete else last.through
+        return not through._meta.auto_created
+    return False
+
+
+def _resolve(model):
+    try:
+        return _lookups[model]
+    except KeyError:
+        pass
+    lookup = _resolve_lookup(model)
+    fields = _lookup_fields(model, lookup) if lookup else None
+    if fields is None:
+        # not related to a company, or the path is not a valid lookup
+        resolved = (None, False)
+    else:
+        resolved = (lookup, _fans_out(fields))
+    _lookups[model] = resolved
+    return resolved
+
+
+def company_lookup(model):
+    """
+    Returns the lookup path from the model to its company, None when the model
+    is not related to a company
+    """
+    return _resolve(model)[0]
+
+
+def company_lookup_fans_out(model):
+    """
+    Checks the company scoped queryset of the model needs distinct()
+    """
+    return _resolve(model)[1]
+
+
+def load_lookups():
+    """
+    Resolves the company lookup path of every installed model, called once when
+    the apps are ready
+    """
+    for model in apps.get_models():
+        _resolve(model)
+
+
+def company_filter(model, company_id):
+    """
+    Returns the Q object scoping the model to the company, None when the model
+    is not related to a company
+    """
+    lookup = company_lookup(model)
+    if lookup is None:
+        return None
+    return Q(**{lookup: company_id}) | Q(**{f"{lookup}__isnull": True})
@@ -0,0 +1,175 @@
+"""
+export.py
+
+This module is used to export querysets to Excel or CSV files in constant memory.
+
+The related objects of the exported columns are loaded with select_related paths
+derived from the column names, the rows are read in chunks with iterator() and
+written one by one, to an xlsxwriter workbook in constant memory mode backed by
+a temporary file, or to a CSV StreamingHttpResponse when the request asks for
+`export_format=csv`.
+"""
+import csv
+import datetime
+import tempfile
+from decimal import Decimal
+from django.core.exceptions import FieldDoesNotExist
+from django.db import models
+from django.http import FileResponse, StreamingHttpResponse
+from django.utils import timezone
+import xlsxwriter
+
+CHUNK_SIZE = 2000
+
+
+def select_related_paths(model, field_names):
+    """
+    Returns the select_related paths loading the related objects of the
+    columns, e.g. employee_id__employee_work_info for
+    employee_id__employee_work_info__department_id__department
+    """
+    paths = set()
+    for field_name in field_names:
+        current_model = model
+        related = []
+        for attr in field_name.split("__"):
+            try:
+                field = current_model._meta.get_field(attr)
+            except FieldDoesNotExist:
+                break
+            # only the single valued relations can be joined
+            if not field.is_relation or field.many_to_many or field.one_to_many:
+                break
+            related.append(attr)
+            current_model = field.related_model
+        if related:
+            paths.add("__".join(related))
+    return sorted(paths)
+
+
+def resolve(obj, field_name):
+    """
+    Returns the value of a `__` separated attribute path of the object, None
+    when an attribute of the path is missing
+    """
+    value = obj
+    for attr in field_name.split("__"):
+        value = getattr(value, attr, None)
+        if value is None:
+            break
+    return value
+
+
+def export_rows(queryset, field_names, convert=None, chunk_size=CHUNK_SIZE):
+    """
+    Yields the values of the columns for every object of the queryset, read in
+    chunks. convert(field_name, value) is applied on every value when given.
+    """
+    paths = select_related_paths(queryset.model, field_names)
+    if paths:
+        queryset = queryset.select_related(*paths)
+    # the label of a related object may load its own relations, it is
+    # computed once per object
+    labels = {}
+    for obj in queryset.iterator(chunk_size=chunk_size):
+        row = []
+        for field_name in field_names:
+            value = resolve(obj, field_name)
+            if isinstance(value, models.Model):
+                key = (type(value), value.pk)
+                if key not in labels:
+                    labels[key] = str(value)
+                value = labels[key]
+            if convert is not None:
+                value = convert(field_name, value)
+            row.append(value)
+        yield row
+
+
+def _cell(value):
+    if value is None or isinstance(value, (str, int, float, Decimal)):
+        return value
+    if isinstance(value, datetime.datetime):
+        if timezone.is_aware(value):
+            value = timezone.make_naive(value)
+        return value
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value
+    return str(value)
+
+
+def xlsx_response(file_name, headers, rows, column_width=18):
+    """
+    Returns the rows as an xlsx file response, the workbook is written in
+    constant memory mode to a temporary file which is streamed to the client
+    """
+    output = tempfile.TemporaryFile()
+    workbook = xlsxwriter.Workbook(output, {"constant_memory": True})
+    worksheet = workbook.add_worksheet("Sheet1")
+    header_format = workbook.add_format(
+        {"bold": True, "border": 1, "align": "center", "valign": "top"}
+    )
+    cell_format = workbook.add_format({"align": "center"})
+    date_format = workbook.add_format({"align": "center", "num_format": "yyyy-mm-dd"})
+    datetime_format = workbook.add_format(
+        {"align": "center", "num_format": "yyyy-mm-dd hh:mm:ss"}
+    )
+    time_format = workbook.add_format({"align": "center", "num_format": "hh:mm:ss"})
+    worksheet.set_column(0, max(len(headers) - 1, 25), column_width)
+    for col, header in enumerate(headers):
+        worksheet.write_string(0, col, str(header), header_format)
+    for row_number, row in enumerate(rows, start=1):
+        for col, value in enumerate(row):
+            value = _cell(value)
+            if value is None:
+                continue
+            if isinstance(value, datetime.datetime):
+                worksheet.write_datetime(row_number, col, value, datetime_format)
+            elif isinstance(value, datetime.date):
+                worksheet.write_datetime(row_number, col, value, date_format)
+            elif isinstance(value, datetime.time):
+                worksheet.write_datetime(row_number, col, value, time_format)
+            elif isinstance(value, str):
+                # written as text, a value starting with "=" is not a formula
+                worksheet.write_string(row_number, col, value, cell_format)
+            else:
+                worksheet.write(row_number, col, value, cell_format)
+    workbook.close()
+    output.seek(0)
+    return FileResponse(
+        output,
+        as_attachment=True,
+        filename=file_name,
+        content_type="application/ms-excel",
+    )
+
+
+class _Echo:
+    def write(self, value):
+        return value
+
+
+def csv_response(file_name, headers, rows):
+    """
+    Returns the rows as a CSV streaming response
+    """
+    writer = csv.writer(_Echo())
+
+    def lines():
+        yield writer.writerow([str(header) for header in headers])
+        for row in rows:
+            yield writer.writerow(["" if value is None else value for value in row])
+
+    response = StreamingHttpResponse(lines(), content_type="text/csv")
+    response["Content-Disposition"] = f'attachment; filename="{file_name}.csv"'
+    return response
+
+
+def export_response(request, file_name, headers, rows, column_width=18):
+    """
+    Returns the rows as an xlsx file, or a CSV file when the request asks for
+    export_format=csv. file_name is given without extension.
+    """
+    if request.GET.get("export_format") == "csv":
+        return csv_response(file_name, headers, rows)
+    return xlsx_response(f"{file_name}.xlsx", headers, rows, column_width)
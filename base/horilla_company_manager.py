@@ -1,9 +1,8 @@
 """
 horilla_company_manager.py
 """
-import threading
 from django.db import models
-from base.thread_local_middleware import _thread_locals
+from base import company_scope
 
 
 class HorillaCompanyManager(models.Manager):
@@ -17,25 +16,14 @@ class HorillaCompanyManager(models.Manager):
 
     def get_queryset(self):
         """
-        get_queryset method
+        get_queryset method, scopes the queryset to the active company
         """
         queryset = super().get_queryset()
-        request = getattr(_thread_locals, "request", None)
-        selected_company = None
-        if request is not None:
-            selected_company = request.session.get("selected_company")
-        try:
-            queryset = (
-                queryset.filter(self.model.company_filter)
-                if selected_company != "all" and selected_company
-                else queryset
-            )
-        except Exception as e:
-            print(e)
-        try:
-            has_duplicates = queryset.count() != queryset.distinct().count()
-            if has_duplicates:
-                queryset = queryset.distinct()
-        except:
-            pass
+        company_id = company_scope.get_active_company()
+        if company_id is not None:
+            company_filter = company_scope.company_filter(self.model, company_id)
+            if company_filter is not None:
+                queryset = queryset.filter(company_filter)
+                if company_scope.company_lookup_fans_out(self.model):
+                    queryset = queryset.distinct()
         return queryset
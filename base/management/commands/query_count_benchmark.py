@@ -0,0 +1,89 @@
+"""
+query_count_benchmark.py
+
+Management command to count the database queries of the main list views, used to
+catch query count regressions
+"""
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+
+LIST_VIEWS = [
+    "employee-view",
+    "attendance-view",
+    "attendance-search",
+    "request-attendance-view",
+    "request-view",
+    "request-filter",
+    "rotating-work-type-assign",
+    "rotating-shift-assign",
+    "type-view",
+    "shift-request-view",
+    "work-type-request-view",
+    "recruitment-view",
+    "candidate-view",
+    "pipeline",
+    "onboarding-view",
+    "view-contract",
+    "view-payslip",
+    "objective-list-view",
+    "asset-category-view",
+]
+
+
+class Command(BaseCommand):
+    help = "Counts the queries of the main list views"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--username", help="User to render the views as, a superuser by default"
+        )
+        parser.add_argument(
+            "--company",
+            default="all",
+            help="Company id to select in the session, all by default",
+        )
+        parser.add_argument(
+            "--max-queries",
+            type=int,
+            help="Exit with an error when a view runs more queries than this",
+        )
+        parser.add_argument(
+            "views", nargs="*", help="URL names of the views, the main list views by default"
+        )
+
+    def handle(self, *args, **options):
+        if options["username"]:
+            user = User.objects.filter(username=options["username"]).first()
+        else:
+            user = User.objects.filter(is_superuser=True).first()
+        if user is None:
+            raise CommandError("No user to render the views")
+
+        client = Client()
+        client.force_login(user)
+        session = client.session
+        session["selected_company"] = options["company"]
+        session.save()
+
+        max_queries = options["max_queries"]
+        failed = []
+        with override_settings(ALLOWED_HOSTS=["testserver"]):
+            for name in options["views"] or LIST_VIEWS:
+                url = reverse(name)
+                connection.queries_log.clear()
+                with CaptureQueriesContext(connection) as context:
+                    response = client.get(url)
+                count = len(context.captured_queries)
+                self.stdout.write(f"{count:6d}  {response.status_code}  {url}")
+                if max_queries is not None and count > max_queries:
+                    failed.append(url)
+
+        if failed:
+            raise CommandError(
+                f"{len(failed)} views run more than {max_queries} queries: "
+                + ", ".join(failed)
+            )
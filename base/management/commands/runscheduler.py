@@ -0,0 +1,154 @@
+"""
+runscheduler.py
+
+Management command to run the scheduled jobs registered by the horilla apps.
+
+Several runners can be started, e.g. one per server. They elect a leader with a
+lease on the SchedulerLock table and only the leader runs the jobs, the others
+take over when the lease of the leader expires.
+"""
+import os
+import signal
+import socket
+import sys
+import time
+from datetime import timedelta
+from apscheduler.schedulers.background import BackgroundScheduler
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import IntegrityError
+from django.db.models import Avg, Count, Max, Q
+from django.utils import timezone
+from django_apscheduler.jobstores import DjangoJobStore
+from django_apscheduler.models import DjangoJobExecution
+from base.models import SchedulerLock
+from horilla.scheduler import discover_jobs
+
+LOCK_NAME = "scheduler"
+
+
+def acquire_lease(owner, lease):
+    """
+    Takes or renews the scheduler lease, returns True when the owner is the leader
+    """
+    now = timezone.now()
+    renewed = (
+        SchedulerLock.objects.filter(name=LOCK_NAME)
+        .filter(Q(owner=owner) | Q(expires_at__lt=now))
+        .update(owner=owner, expires_at=now + lease)
+    )
+    if renewed:
+        return True
+    try:
+        _lock, created = SchedulerLock.objects.get_or_create(
+            name=LOCK_NAME, defaults={"owner": owner, "expires_at": now + lease}
+        )
+    except IntegrityError:
+        return False
+    return created
+
+
+def release_lease(owner):
+    """
+    Gives up the lease, so another runner takes over without waiting for it to expire
+    """
+    SchedulerLock.objects.filter(name=LOCK_NAME, owner=owner).update(
+        expires_at=timezone.now()
+    )
+
+
+def start_scheduler(jobs):
+    """
+    Starts a scheduler running the registered jobs, with their runs recorded by
+    the django_apscheduler job store
+    """
+    scheduler = BackgroundScheduler(timezone=settings.TIME_ZONE)
+    scheduler.add_jobstore(DjangoJobStore(), "default")
+    for job_id, job in jobs.items():
+        scheduler.add_job(
+            job["func"],
+            job["trigger"],
+            id=job_id,
+            replace_existing=True,
+            max_instances=1,
+            coalesce=True,
+            **job["trigger_args"],
+        )
+    scheduler.start()
+    # jobs stored by a previous version of the code
+    for job in scheduler.get_jobs():
+        if job.id not in jobs:
+            job.remove()
+    return scheduler
+
+
+class Command(BaseCommand):
+    help = "Runs the scheduled jobs of the horilla apps in the leader process"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--lease",
+            type=int,
+            default=60,
+            help="Seconds the leader holds the lease without renewing it",
+        )
+        parser.add_argument(
+            "--status",
+            action="store_true",
+            help="Print the run history of the jobs and exit",
+        )
+
+    def handle(self, *args, **options):
+        jobs = discover_jobs()
+        if options["status"]:
+            self.print_status(jobs)
+            return
+
+        lease = timedelta(seconds=options["lease"])
+        owner = f"{socket.gethostname()}:{os.getpid()}"
+        scheduler = None
+        # stop through the finally clause below, which gives up the lease
+        signal.signal(signal.SIGTERM, lambda *args: sys.exit(0))
+        try:
+            while True:
+                leader = acquire_lease(owner, lease)
+                if leader and scheduler is None:
+                    scheduler = start_scheduler(jobs)
+                    self.stdout.write(f"{owner} is the leader, running {len(jobs)} jobs")
+                elif not leader and scheduler is not None:
+                    scheduler.shutdown()
+                    scheduler = None
+                    self.stdout.write(f"{owner} lost the lease, waiting")
+                time.sleep(lease.total_seconds() / 3)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if scheduler is not None:
+                scheduler.shutdown()
+            release_lease(owner)
+
+    def print_status(self, jobs):
+        """
+        Prints the runs, errors, average duration and last run of each job
+        """
+        executions = {
+            row["job_id"]: row
+            for row in DjangoJobExecution.objects.values("job_id").annotate(
+                runs=Count("id"),
+                errors=Count("id", filter=Q(status=DjangoJobExecution.ERROR)),
+                average=Avg("duration"),
+                last_run=Max("run_time"),
+            )
+        }
+        lock = SchedulerLock.objects.filter(name=LOCK_NAME).first()
+        if lock is not None:
+            self.stdout.write(f"Leader: {lock.owner}, lease until {lock.expires_at}")
+        for job_id in sorted(jobs):
+            row = executions.get(job_id)
+            if row is None:
+                self.stdout.write(f"{job_id}: never run")
+                continue
+            self.stdout.write(
+                f"{job_id}: {row['runs']} runs, {row['errors']} errors, "
+                f"{row['average'] or 0:.3f}s average, last run {row['last_run']}"
+            )
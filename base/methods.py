@@ -3,11 +3,13 @@ import json
 import random
 from django.apps import apps
 from django.core.exceptions import ObjectDoesNotExist
+from django.db import transaction
 from django.db.models import ForeignKey, ManyToManyField, OneToOneField
 from django.forms.models import ModelMultipleChoiceField, ModelChoiceField
-from django.http import HttpResponse
 from django.utils.translation import gettext as _
-import pandas as pd
+from base.export import export_response, export_rows
+from base.sorting import sort_queryset
+from employee.hierarchy import is_reporting_manager, subordinates_of
 from employee.models import Employee
 from horilla.decorators import login_required
 
@@ -19,10 +21,8 @@ def filtersubordinates(request, queryset, perm=None):
     user = request.user
     if user.has_perm(perm):
         return queryset
-    manager = Employee.objects.filter(employee_user_id=user).first()
-    queryset = queryset.filter(
-        employee_id__employee_work_info__reporting_manager_id=manager
-    )
+    manager = getattr(user, "employee_get", None)
+    queryset = queryset.filter(**subordinates_of(manager))
     return queryset
 
 
@@ -33,8 +33,8 @@ def filtersubordinatesemployeemodel(request, queryset, perm=None):
     user = request.user
     if user.has_perm(perm):
         return queryset
-    manager = Employee.objects.filter(employee_user_id=user).first()
-    queryset = queryset.filter(employee_work_info__reporting_manager_id=manager)
+    manager = getattr(user, "employee_get", None)
+    queryset = queryset.filter(**subordinates_of(manager, lookup=None))
     return queryset
 
 
@@ -42,11 +42,7 @@ def is_reportingmanager(request):
     """
     This method is used to check weather the employee is reporting manager or not.
     """
-    try:
-        user = request.user
-        return user.employee_get.reporting_manager.all().exists()
-    except:
-        return False
+    return is_reporting_manager(getattr(request.user, "employee_get", None))
 
 
 def choosesubordinates(
@@ -57,8 +53,8 @@ def choosesubordinates(
     user = request.user
     if user.has_perm(perm):
         return form
-    manager = Employee.objects.filter(employee_user_id=user).first()
-    queryset = Employee.objects.filter(employee_work_info__reporting_manager_id=manager)
+    manager = getattr(user, "employee_get", None)
+    queryset = Employee.objects.filter(**subordinates_of(manager, lookup=None))
     form.fields["employee_id"].queryset = queryset
     return form
 
@@ -67,53 +63,18 @@ def choosesubordinatesemployeemodel(request, form, perm):
     user = request.user
     if user.has_perm(perm):
         return form
-    manager = Employee.objects.filter(employee_user_id=user).first()
-    queryset = Employee.objects.filter(employee_work_info__reporting_manager_id=manager)
+    manager = getattr(user, "employee_get", None)
+    queryset = Employee.objects.filter(**subordinates_of(manager, lookup=None))
 
     form.fields["employee_id"].queryset = queryset
     return form
 
 
-orderingList = [
-    {
-        "id": "",
-        "field": "",
-        "ordering": "",
-    }
-]
-
-
 def sortby(request, queryset, key):
     """
     This method is used to sort query set by asc or desc
     """
-    global orderingList
-    id = request.user.id
-    # here will create dictionary object to the global orderingList if not exists,
-    # if exists then method will switch corresponding object ordering.
-    filtered_list = [x for x in orderingList if x["id"] == id]
-    ordering = filtered_list[0] if filtered_list else None
-    if ordering is None:
-        ordering = {
-            "id": id,
-            "field": None,
-            "ordering": "-",
-        }
-        orderingList.append(ordering)
-    sortby = request.GET.get(key)
-    if sortby is not None and sortby != "":
-        # here will update the orderingList
-        ordering["field"] = sortby
-        if queryset.query.order_by == queryset.query.order_by:
-            queryset = queryset.order_by(f'{ordering["ordering"]}{sortby}')
-        if ordering["ordering"] == "-":
-            ordering["ordering"] = ""
-        else:
-            ordering["ordering"] = "-"
-        orderingList = [item for item in orderingList if item["id"] != id]
-        orderingList.append(ordering)
-
-    return queryset
+    return sort_queryset(request, queryset, key)
 
 
 def random_color_generator():
@@ -360,11 +321,9 @@ def export_data(request, model, form_class, filter_class, file_name):
 
     selected_columns = []
     today_date = date.today().strftime("%Y-%m-%d")
-    file_name = f"{file_name}_{today_date}.xlsx"
-    data_export = {}
+    file_name = f"{file_name}_{today_date}"
 
     form = form_class()
-    model_fields = model._meta.get_fields()
     export_objects = filter_class(request.GET).qs
     selected_fields = request.GET.getlist("selected_fields")
 
@@ -380,43 +339,30 @@ def export_data(request, model, form_class, filter_class, file_name):
         if value in selected_fields:
             selected_columns.append((value, key))
 
-    for field_name, verbose_name in selected_columns:
-        if field_name in selected_fields:
-            data_export[verbose_name] = []
-            for obj in export_objects:
-                value = obj
-                nested_attributes = field_name.split("__")
-                for attr in nested_attributes:
-                    value = getattr(value, attr, None)
-                    if value is None:
-                        break
-                if value is True:
-                    value = _("Yes")
-                elif value is False:
-                    value = _("No")
-                if value in fields_mapping:
-                    value = fields_mapping[value]
-                if value == "None":
-                    value = " "
-                if field_name == "month":
-                    value = _(value.title())
-                data_export[verbose_name].append(value)
-
-    data_frame = pd.DataFrame(data=data_export)
-    styled_data_frame = data_frame.style.applymap(
-        lambda x: "text-align: center", subset=pd.IndexSlice[:, :]
+    def convert(field_name, value):
+        if value is True:
+            value = _("Yes")
+        elif value is False:
+            value = _("No")
+        if isinstance(value, str) and value in fields_mapping:
+            value = fields_mapping[value]
+        if value == "None":
+            value = " "
+        if field_name == "month" and value is not None:
+            value = _(value.title())
+        return value
+
+    rows = export_rows(
+        export_objects,
+        [field_name for field_name, _verbose_name in selected_columns],
+        convert,
+    )
+    return export_response(
+        request,
+        file_name,
+        [verbose_name for _field_name, verbose_name in selected_columns],
+        rows,
     )
-
-    response = HttpResponse(content_type="application/ms-excel")
-    response["Content-Disposition"] = f'attachment; filename="{file_name}"'
-
-    writer = pd.ExcelWriter(response, engine="xlsxwriter")
-    styled_data_frame.to_excel(writer, index=False, sheet_name="Sheet1")
-    worksheet = writer.sheets["Sheet1"]
-    worksheet.set_column("A:Z", 18)
-    writer.close()
-
-    return response
 
 
 def reload_queryset(fields):
@@ -427,3 +373,22 @@ def reload_queryset(fields):
         if isinstance(v, ModelChoiceField):
             v.queryset = v.queryset.model.objects.all()
     return
+
+
+def update_sequences(queryset, sequence_data, field="sequence"):
+    """
+    This method is used to apply a posted {id: sequence} mapping to the
+    objects of the queryset with one bulk UPDATE, the ids outside of the
+    queryset are ignored.
+
+    Returns the count of the objects whose sequence changed
+    """
+    sequences = {int(pk): int(sequence) for pk, sequence in sequence_data.items()}
+    with transaction.atomic():
+        changed = []
+        for instance in queryset.filter(pk__in=sequences).only("pk", field):
+            if getattr(instance, field) != sequences[instance.pk]:
+                setattr(instance, field, sequences[instance.pk])
+                changed.append(instance)
+        queryset.bulk_update(changed, [field], batch_size=500)
+    return len(changed)
@@ -267,7 +267,9 @@ class RotatingWorkTypeAssign(models.Model):
     start_date = models.DateField(
         default=django.utils.timezone.now, verbose_name=_("Start Date")
     )
-    next_change_date = models.DateField(null=True, verbose_name=_("Next Switch"))
+    next_change_date = models.DateField(
+        null=True, db_index=True, verbose_name=_("Next Switch")
+    )
     current_work_type = models.ForeignKey(
         WorkType,
         null=True,
@@ -318,6 +320,7 @@ class RotatingWorkTypeAssign(models.Model):
         verbose_name = _("Rotating Work Type Assign")
         verbose_name_plural = _("Rotating Work Type Assigns")
         ordering = ["-next_change_date", "-employee_id__employee_first_name"]
+        indexes = [models.Index(fields=["is_active", "next_change_date"])]
 
     def clean(self):
         if self.is_active and self.employee_id is not None:
@@ -538,7 +541,9 @@ class RotatingShiftAssign(models.Model):
     start_date = models.DateField(
         default=django.utils.timezone.now, verbose_name=_("Start Date")
     )
-    next_change_date = models.DateField(null=True, verbose_name=_("Next Switch"))
+    next_change_date = models.DateField(
+        null=True, db_index=True, verbose_name=_("Next Switch")
+    )
     current_shift = models.ForeignKey(
         EmployeeShift,
         on_delete=models.PROTECT,
@@ -590,6 +595,7 @@ class RotatingShiftAssign(models.Model):
         verbose_name = _("Rotating Shift Assign")
         verbose_name_plural = _("Rotating Shift Assigns")
         ordering = ["-next_change_date", "-employee_id__employee_first_name"]
+        indexes = [models.Index(fields=["is_active", "next_change_date"])]
 
     def clean(self):
         if self.is_active and self.employee_id is not None:
@@ -630,10 +636,13 @@ class WorkTypeRequest(models.Model):
         verbose_name=_("Previous Work Type"),
     )
     requested_date = models.DateField(
-        null=True, default=django.utils.timezone.now, verbose_name=_("Requested Date")
+        null=True,
+        default=django.utils.timezone.now,
+        db_index=True,
+        verbose_name=_("Requested Date"),
     )
     requested_till = models.DateField(
-        null=True, blank=True, verbose_name=_("Requested Till")
+        null=True, blank=True, db_index=True, verbose_name=_("Requested Till")
     )
     is_permanent_work_type = models.BooleanField(
         default=True, verbose_name=_("Permanent Request")
@@ -652,6 +661,10 @@ class WorkTypeRequest(models.Model):
 
         verbose_name = _("Work Type Request")
         verbose_name_plural = _("Work Type Requests")
+        indexes = [
+            models.Index(fields=["requested_date"]),
+            models.Index(fields=["employee_id", "requested_date"]),
+        ]
         permissions = (
             ("approve_worktyperequest", "Approve Work Type Request"),
             ("cancel_worktyperequest", "Cancel Work Type Request"),
@@ -739,10 +752,13 @@ class ShiftRequest(models.Model):
         verbose_name=_("Previous Shift"),
     )
     requested_date = models.DateField(
-        null=True, default=django.utils.timezone.now, verbose_name=_("Requested Date")
+        null=True,
+        default=django.utils.timezone.now,
+        db_index=True,
+        verbose_name=_("Requested Date"),
     )
     requested_till = models.DateField(
-        null=True, blank=True, verbose_name=_("Requested Till")
+        null=True, blank=True, db_index=True, verbose_name=_("Requested Till")
     )
     description = models.TextField(null=True, verbose_name=_("Description"))
     is_permanent_shift = models.BooleanField(
@@ -761,6 +777,10 @@ class ShiftRequest(models.Model):
 
         verbose_name = _("Shift Request")
         verbose_name_plural = _("Shift Requests")
+        indexes = [
+            models.Index(fields=["requested_date"]),
+            models.Index(fields=["employee_id", "requested_date"]),
+        ]
         permissions = (
             ("approve_shiftrequest", "Approve Shift Request"),
             ("cancel_shiftrequest", "Cancel Shift Request"),
@@ -825,3 +845,16 @@ class ShiftRequest(models.Model):
 
     def __str__(self):
         return f"{self.employee_id}"
+
+
+class SchedulerLock(models.Model):
+    """
+    SchedulerLock model, the lease held by the leader scheduler process
+    """
+
+    name = models.CharField(max_length=50, unique=True)
+    owner = models.CharField(max_length=255)
+    expires_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.name} - {self.owner}"
@@ -0,0 +1,184 @@
+"""
+pagination.py
+
+This module is used to paginate the querysets of the list views.
+
+The rows of a page are read once and kept on the page, so the ids of the page
+and the template share one query. The count of a queryset is cached for a few
+seconds under a key made from its SQL without ordering, the pages of one list
+and its repeated renderings reuse it.
+
+A list ordered on unique keys, e.g. ("-attendance_date", "-id"), can be read
+from the keys of the last row of the previous page (seek pagination) instead of
+an OFFSET scanning all the previous rows: page.next_cursor is the signed cursor
+of the next page, given back as the cursor of paginate. seek_rows reads the rows
+after a cursor without page numbers, for the lists loaded as they are scrolled
+whose rows move meanwhile, e.g. the cards dragged out of a kanban column.
+"""
+import hashlib
+import json
+from django.core import signing
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet
+from django.core.paginator import Paginator
+from django.db.models import Q
+
+PER_PAGE = 50
+COUNT_TTL = 30
+CURSOR_SALT = "base.pagination.cursor"
+
+
+def signature(queryset):
+    """
+    Returns the key of the rows of the queryset, whatever their order, None
+    when the queryset matches nothing without querying
+    """
+    try:
+        sql, params = queryset.order_by().query.sql_with_params()
+    except EmptyResultSet:
+        return None
+    return hashlib.sha1(
+        f"{queryset.db}:{sql}:{params!r}".encode(), usedforsecurity=False
+    ).hexdigest()
+
+
+class CachedCountPaginator(Paginator):
+    """
+    Paginator with the count of the queryset cached for COUNT_TTL seconds
+    """
+
+    def __init__(self, object_list, per_page, count_ttl=COUNT_TTL, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.count_ttl = count_ttl
+        self._count = None
+
+    @property
+    def count(self):
+        if self._count is None:
+            key = None
+            if hasattr(self.object_list, "query"):
+                key = signature(self.object_list)
+            if key is None:
+                self._count = super().count
+            else:
+                key = f"paginator_count:{key}"
+                self._count = cache.get(key)
+                if self._count is None:
+                    self._count = self.object_list.count()
+                    cache.set(key, self._count, self.count_ttl)
+        return self._count
+
+
+def _seek_filter(seek, values):
+    # rows after the last row: (a, b) > (x, y) as a > x or a = x and b > y
+    condition = Q()
+    equal = {}
+    for field, value in zip(seek, values):
+        name = field.lstrip("-")
+        lookup = "lt" if field.startswith("-") else "gt"
+        condition |= Q(**equal, **{f"{name}__{lookup}": value})
+        equal[name] = value
+    return condition
+
+
+def _key(value):
+    return value.isoformat() if hasattr(value, "isoformat") else value
+
+
+def paginate(queryset, page_number, per_page=PER_PAGE, seek=None, cursor=None):
+    """
+    Returns the page of the queryset with its rows read.
+
+    Parameters:
+        queryset: The queryset to paginate.
+        page_number: The page number, the first page when invalid.
+        seek (tuple): The unique order of the queryset, e.g. ("-attendance_date",
+            "-id"), enabling seek pagination when the queryset is ordered so.
+        cursor (str): The next_cursor of the previous page.
+
+    Returns:
+        Page: The page, with next_cursor when seek pagination is enabled.
+    """
+    paginator = CachedCountPaginator(queryset, per_page)
+    page = paginator.get_page(page_number)
+    page.next_cursor = ""
+    key = None
+    if seek is not None and hasattr(queryset, "query"):
+        if tuple(queryset.query.order_by) == tuple(seek):
+            key = signature(queryset)
+    if key is None:
+        page.object_list = list(page.object_list)
+        return page
+    after = None
+    if cursor:
+        try:
+            data = signing.loads(cursor, salt=CURSOR_SALT)
+        except signing.BadSignature:
+            data = {}
+        # a cursor of another page or another filter is ignored
+        if data.get("page") == page.number and data.get("key") == key:
+            after = data.get("after")
+    if after is None:
+        page.object_list = list(page.object_list)
+    else:
+        page.object_list = list(queryset.filter(_seek_filter(seek, after))[:per_page])
+    if page.has_next() and page.object_list:
+        last = page.object_list[-1]
+        page.next_cursor = signing.dumps(
+            {
+                "page": page.number + 1,
+                "key": key,
+                "after": [
+                    _key(getattr(last, field.lstrip("-"))) for field in seek
+                ],
+            },
+            salt=CURSOR_SALT,
+        )
+    return page
+
+
+def seek_rows(queryset, seek, cursor=None, per_page=PER_PAGE):
+    """
+    Returns the rows of the queryset after the cursor and the cursor of the
+    rows following them, "" after the last rows.
+
+    Parameters:
+        queryset: The queryset, ordered by seek.
+        seek (tuple): The unique order of the queryset, e.g. ("sequence", "id"),
+            its values must not be null.
+        cursor (str): The cursor returned with the previous rows.
+    """
+    key = signature(queryset)
+    if key is None:
+        return [], ""
+    after = None
+    if cursor:
+        try:
+            data = signing.loads(cursor, salt=CURSOR_SALT)
+        except signing.BadSignature:
+            data = {}
+        # a cursor of another filter is ignored
+        if data.get("key") == key:
+            after = data.get("after")
+    if after is not None:
+        queryset = queryset.filter(_seek_filter(seek, after))
+    rows = list(queryset.order_by(*seek)[: per_page + 1])
+    if len(rows) <= per_page:
+        return rows, ""
+    rows = rows[:per_page]
+    last = rows[-1]
+    next_cursor = signing.dumps(
+        {
+            "key": key,
+            "after": [_key(getattr(last, field.lstrip("-"))) for field in seek],
+        },
+        salt=CURSOR_SALT,
+    )
+    return rows, next_cursor
+
+
+def page_ids(page):
+    """
+    Returns the ids of the rows of the page as JSON
+    """
+    return json.dumps([instance.id for instance in page.object_list])
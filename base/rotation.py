@@ -0,0 +1,425 @@
+"""
+rotation.py
+
+This module is used to apply the shift and work type rotations and the approved
+shift and work type requests that are due on a day.
+
+The transitions are read through date indexed fields, the next_change_date of the
+rotating assigns and the requested_date / requested_till of the requests, so a run
+only loads the rows due and saves them in one transaction per kind. The rows due
+on a past day are caught up, a rotating assign is switched once for every switch
+date missed. The scheduler runs process_due every hour, and the signals below
+apply the rows saved as due right away.
+"""
+import calendar
+from datetime import date, timedelta
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from simple_history.utils import bulk_update_with_history
+from notifications.signals import notify
+from base.models import (
+    RotatingShiftAssign,
+    RotatingWorkTypeAssign,
+    ShiftRequest,
+    WorkTypeRequest,
+)
+from employee.models import EmployeeWorkInformation
+
+WEEK_DAYS = [
+    "monday",
+    "tuesday",
+    "wednesday",
+    "thursday",
+    "friday",
+    "saturday",
+    "sunday",
+]
+
+SHIFT_CHANGED = {
+    "verb": "Your shift has been changed.",
+    "verb_ar": "تم تغيير التحول الخاص بك.",
+    "verb_de": "Ihre Schicht wurde geändert.",
+    "verb_es": "Tu turno ha sido cambiado.",
+    "verb_fr": "Votre quart de travail a été modifié.",
+    "icon": "infinite",
+}
+WORK_TYPE_CHANGED = {
+    "verb": "Your Work Type has been changed.",
+    "verb_ar": "لقد تغير نوع عملك.",
+    "verb_de": "Ihre Art der Arbeit hat sich geändert.",
+    "verb_es": "Su tipo de trabajo ha sido cambiado.",
+    "verb_fr": "Votre type de travail a été modifié.",
+    "icon": "infinite",
+}
+SHIFT_SWITCHED = {
+    "verb": "Shift Changes notification",
+    "verb_ar": "التحول تغيير الإخطار",
+    "verb_de": "Benachrichtigung über Schichtänderungen",
+    "verb_es": "Notificación de cambios de turno",
+    "verb_fr": "Notification des changements de quart de travail",
+    "icon": "refresh",
+}
+SHIFT_UNDONE = {
+    "verb": "Shift changes notification, Requested date expired.",
+    "verb_ar": "التحول يغير الإخطار ، التاريخ المطلوب انتهت صلاحيته.",
+    "verb_de": "Benachrichtigung über Schichtänderungen, gewünschtes Datum abgelaufen.",
+    "verb_es": "Notificación de cambios de turno, Fecha solicitada vencida.",
+    "verb_fr": "Notification de changement d'équipe, la date demandée a expiré.",
+    "icon": "refresh",
+}
+WORK_TYPE_SWITCHED = {
+    "verb": "Work Type Changes notification",
+    "verb_ar": "إخطار تغييرات نوع العمل",
+    "verb_de": "Benachrichtigung über Änderungen des Arbeitstyps",
+    "verb_es": "Notificación de cambios de tipo de trabajo",
+    "verb_fr": "Notification de changement de type de travail",
+    "icon": "swap-horizontal",
+}
+WORK_TYPE_UNDONE = {
+    "verb": "Work type changes notification, Requested date expired.",
+    "verb_ar": "إعلام بتغيير نوع العمل ، انتهاء صلاحية التاريخ المطلوب.",
+    "verb_de": "Benachrichtigung über Änderungen des Arbeitstyps, angefordertes Datum abgelaufen.",
+    "verb_es": "Notificación de cambios de tipo de trabajo, fecha solicitada vencida.",
+    "verb_fr": "Notification de changement de type de travail, la date demandée a expiré.",
+    "icon": "swap-horizontal",
+}
+
+
+def next_rotation_date(assign, today):
+    """
+    Returns the next switch date of a rotating assign switched on the day
+    """
+    if assign.based_on == "after":
+        return today + timedelta(days=assign.rotate_after_day or 7)
+    if assign.based_on == "weekly":
+        target_day = WEEK_DAYS.index(assign.rotate_every_weekend or "monday")
+        return today + timedelta(days=(target_day - today.weekday() - 1) % 7 + 1)
+    # monthly, on the rotate_every day of the next month or its last day
+    year = today.year + today.month // 12
+    month = today.month % 12 + 1
+    last_day = calendar.monthrange(year, month)[1]
+    if assign.rotate_every in (None, "last"):
+        return date(year, month, last_day)
+    return date(year, month, min(int(assign.rotate_every), last_day))
+
+
+def _notify(employees, message):
+    """
+    Sends the message to the users of the employees with one signal call
+    """
+    bot = User.objects.filter(username="Horilla Bot").first()
+    recipients = [
+        employee.employee_user_id
+        for employee in employees
+        if employee.employee_user_id_id is not None
+    ]
+    if bot is None or not recipients:
+        return
+    notify.send(
+        bot,
+        recipient=recipients,
+        redirect="/employee/employee-profile",
+        **message,
+    )
+
+
+def _work_info(employee):
+    return getattr(employee, "employee_work_info", None)
+
+
+def _save(instances, fields, work_infos, work_info_field, employees, message):
+    """
+    Saves the due rows and the updated work informations in one transaction, the
+    work information history is kept through bulk_update_with_history
+    """
+    if not instances:
+        return 0
+    model = instances[0].__class__
+    with transaction.atomic():
+        if work_infos:
+            bulk_update_with_history(
+                work_infos, EmployeeWorkInformation, [work_info_field]
+            )
+        model.objects.bulk_update(instances, fields)
+    _notify(employees, message)
+    return len(instances)
+
+
+def _rotate(
+    assigns, today, rotation_field, work_info_field, current_field, next_field
+):
+    """
+    Switches the assigns to their next shift or work type, once for every switch
+    date up to today. The pair of the rotation is read from its shift1 / shift2 or
+    work_type1 / work_type2 fields.
+    """
+    pair_field = work_info_field[: -len("_id")]
+    rotated = []
+    work_infos = []
+    employees = []
+    for assign in assigns:
+        rotation = getattr(assign, rotation_field)
+        new_id = getattr(assign, f"{next_field}_id")
+        next_id = getattr(rotation, f"{pair_field}2_id")
+        if new_id == next_id:
+            next_id = getattr(rotation, f"{pair_field}1_id")
+        change_date = next_rotation_date(assign, assign.next_change_date)
+        while change_date <= today:
+            # a switch date missed while the scheduler was stopped
+            new_id, next_id = next_id, new_id
+            change_date = next_rotation_date(assign, change_date)
+        work_info = _work_info(assign.employee_id)
+        if work_info is not None:
+            setattr(work_info, f"{work_info_field}_id", new_id)
+            work_infos.append(work_info)
+        setattr(assign, f"{current_field}_id", new_id)
+        setattr(assign, f"{next_field}_id", next_id)
+        assign.next_change_date = change_date
+        rotated.append(assign)
+        employees.append(assign.employee_id)
+    return rotated, work_infos, employees
+
+
+def rotate_shifts(today=None, ids=None):
+    """
+    Switches the shift of the active rotating shift assigns due up to today
+    """
+    today = today or date.today()
+    assigns = RotatingShiftAssign.objects.filter(
+        is_active=True, next_change_date__lte=today
+    ).select_related(
+        "rotating_shift_id",
+        "employee_id__employee_work_info",
+        "employee_id__employee_user_id",
+    )
+    if ids is not None:
+        assigns = assigns.filter(id__in=ids)
+    rotated, work_infos, employees = _rotate(
+        assigns,
+        today,
+        "rotating_shift_id",
+        "shift_id",
+        "current_shift",
+        "next_shift",
+    )
+    return _save(
+        rotated,
+        ["current_shift", "next_shift", "next_change_date"],
+        work_infos,
+        "shift_id",
+        employees,
+        SHIFT_CHANGED,
+    )
+
+
+def rotate_work_types(today=None, ids=None):
+    """
+    Switches the work type of the active rotating work type assigns due up to
+    today
+    """
+    today = today or date.today()
+    assigns = RotatingWorkTypeAssign.objects.filter(
+        is_active=True, next_change_date__lte=today, employee_id__isnull=False
+    ).select_related(
+        "rotating_work_type_id",
+        "employee_id__employee_work_info",
+        "employee_id__employee_user_id",
+    )
+    if ids is not None:
+        assigns = assigns.filter(id__in=ids)
+    rotated, work_infos, employees = _rotate(
+        assigns,
+        today,
+        "rotating_work_type_id",
+        "work_type_id",
+        "current_work_type",
+        "next_work_type",
+    )
+    return _save(
+        rotated,
+        ["current_work_type", "next_work_type", "next_change_date"],
+        work_infos,
+        "work_type_id",
+        employees,
+        WORK_TYPE_CHANGED,
+    )
+
+
+def _apply_requests(requests, work_info_field, value_field, flag_field, flag_value):
+    work_infos = []
+    employees = []
+    for request in requests:
+        work_info = _work_info(request.employee_id)
+        if work_info is not None:
+            setattr(
+                work_info,
+                f"{work_info_field}_id",
+                getattr(request, f"{value_field}_id"),
+            )
+            work_infos.append(work_info)
+        setattr(request, flag_field, flag_value)
+        employees.append(request.employee_id)
+    return list(requests), work_infos, employees
+
+
+def switch_shifts(today=None, ids=None):
+    """
+    Changes the shift of the employees whose approved shift request has started
+    """
+    today = today or date.today()
+    requests = ShiftRequest.objects.filter(
+        canceled=False,
+        approved=True,
+        requested_date__lte=today,
+        shift_changed=False,
+    ).select_related("employee_id__employee_work_info", "employee_id__employee_user_id")
+    if ids is not None:
+        requests = requests.filter(id__in=ids)
+    requests, work_infos, employees = _apply_requests(
+        requests, "shift_id", "shift_id", "shift_changed", True
+    )
+    return _save(
+        requests, ["shift_changed"], work_infos, "shift_id", employees, SHIFT_SWITCHED
+    )
+
+
+def undo_shifts(today=None, ids=None):
+    """
+    Restores the previous shift of the employees whose shift request has ended
+    """
+    today = today or date.today()
+    requests = ShiftRequest.objects.filter(
+        canceled=False,
+        approved=True,
+        requested_till__lt=today,
+        is_active=True,
+        shift_changed=True,
+    ).select_related("employee_id__employee_work_info", "employee_id__employee_user_id")
+    if ids is not None:
+        requests = requests.filter(id__in=ids)
+    requests, work_infos, employees = _apply_requests(
+        requests, "shift_id", "previous_shift_id", "is_active", False
+    )
+    return _save(
+        requests, ["is_active"], work_infos, "shift_id", employees, SHIFT_UNDONE
+    )
+
+
+def switch_work_types(today=None, ids=None):
+    """
+    Changes the work type of the employees whose approved work type request has
+    started
+    """
+    today = today or date.today()
+    requests = WorkTypeRequest.objects.filter(
+        canceled=False,
+        approved=True,
+        requested_date__lte=today,
+        work_type_changed=False,
+    ).select_related("employee_id__employee_work_info", "employee_id__employee_user_id")
+    if ids is not None:
+        requests = requests.filter(id__in=ids)
+    requests, work_infos, employees = _apply_requests(
+        requests, "work_type_id", "work_type_id", "work_type_changed", True
+    )
+    return _save(
+        requests,
+        ["work_type_changed"],
+        work_infos,
+        "work_type_id",
+        employees,
+        WORK_TYPE_SWITCHED,
+    )
+
+
+def undo_work_types(today=None, ids=None):
+    """
+    Restores the previous work type of the employees whose work type request has
+    ended
+    """
+    today = today or date.today()
+    requests = WorkTypeRequest.objects.filter(
+        canceled=False,
+        approved=True,
+        requested_till__lt=today,
+        is_active=True,
+        work_type_changed=True,
+    ).select_related("employee_id__employee_work_info", "employee_id__employee_user_id")
+    if ids is not None:
+        requests = requests.filter(id__in=ids)
+    requests, work_infos, employees = _apply_requests(
+        requests, "work_type_id", "previous_work_type_id", "is_active", False
+    )
+    return _save(
+        requests,
+        ["is_active"],
+        work_infos,
+        "work_type_id",
+        employees,
+        WORK_TYPE_UNDONE,
+    )
+
+
+def process_due(today=None):
+    """
+    Applies every rotation and request due up to today, returns the number of rows
+    processed by kind
+    """
+    today = today or date.today()
+    return {
+        "rotate_shift": rotate_shifts(today),
+        "rotate_work_type": rotate_work_types(today),
+        "undo_shift": undo_shifts(today),
+        "switch_shift": switch_shifts(today),
+        "undo_work_type": undo_work_types(today),
+        "switch_work_type": switch_work_types(today),
+    }
+
+
+def _due(day):
+    # the values of a form may still be strings, they are applied by the next run
+    return isinstance(day, date) and day <= date.today()
+
+
+def _on_commit(func, instance):
+    transaction.on_commit(lambda: func(ids=[instance.pk]))
+
+
+@receiver(post_save, sender=RotatingShiftAssign)
+def rotating_shift_assign_saved(sender, instance, **_kwargs):
+    """
+    Applies a rotating shift assign saved with its switch date reached
+    """
+    if instance.is_active and _due(instance.next_change_date):
+        _on_commit(rotate_shifts, instance)
+
+
+@receiver(post_save, sender=RotatingWorkTypeAssign)
+def rotating_work_type_assign_saved(sender, instance, **_kwargs):
+    """
+    Applies a rotating work type assign saved with its switch date reached
+    """
+    if instance.is_active and _due(instance.next_change_date):
+        _on_commit(rotate_work_types, instance)
+
+
+@receiver(post_save, sender=ShiftRequest)
+def shift_request_saved(sender, instance, **_kwargs):
+    """
+    Applies an approved shift request which has started
+    """
+    if instance.approved and not instance.canceled:
+        if not instance.shift_changed and _due(instance.requested_date):
+            _on_commit(switch_shifts, instance)
+
+
+@receiver(post_save, sender=WorkTypeRequest)
+def work_type_request_saved(sender, instance, **_kwargs):
+    """
+    Applies an approved work type request which has started
+    """
+    if instance.approved and not instance.canceled:
+        if not instance.work_type_changed and _due(instance.requested_date):
+            _on_commit(switch_work_types, instance)
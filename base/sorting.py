@@ -0,0 +1,123 @@
+"""
+sorting.py
+
+This module is used to sort the querysets of the list views by the column
+clicked by the user.
+
+The sort state is kept in the query string and the session of the user instead
+of process memory: a `-field` value is applied as given, a click on a column
+header flips the order of the column kept in the session, a page change or
+filter keeps it. The order is computed once per request, so the querysets of
+one view sorted with the same key share it.
+
+Only the fields of the model, followed through the forward relations and the
+reverse one to one relations, and the annotations of the queryset are sortable,
+other values are ignored. A path
+ending on a foreign key without ordering on its model is sorted on the
+foreign key column, without joining the related table.
+"""
+from functools import lru_cache
+from urllib.parse import parse_qsl
+from django.core.exceptions import FieldDoesNotExist
+
+SESSION_KEY = "sort_state"
+
+
+@lru_cache(maxsize=None)
+def sortable_fields(model):
+    """
+    Returns the names of the fields of the model which can be sorted on, the
+    fields of the model, its forward relations and its reverse one to one
+    relations, e.g. employee_work_info of the employee
+    """
+    return frozenset(
+        field.name
+        for field in model._meta.get_fields()
+        if field.concrete
+        or (field.many_to_many and not field.auto_created)
+        or (field.one_to_one and field.auto_created)
+    )
+
+
+# the paths come from the query string, the cache is bounded
+@lru_cache(maxsize=1024)
+def sort_path(model, path):
+    """
+    Returns the order_by path of a `__` separated field path of the model,
+    None when the path is not sortable
+    """
+    current_model = model
+    attrs = path.split("__")
+    field = None
+    for attr in attrs:
+        if current_model is None or attr not in sortable_fields(current_model):
+            return None
+        try:
+            field = current_model._meta.get_field(attr)
+        except FieldDoesNotExist:
+            return None
+        current_model = field.related_model if field.is_relation else None
+    if (
+        field.concrete
+        and (field.many_to_one or field.one_to_one)
+        and not field.related_model._meta.ordering
+    ):
+        # the related table would be joined to be sorted on its primary key
+        attrs[-1] = field.attname
+    return "__".join(attrs)
+
+
+def _clicked(request, key):
+    # the sort links append the key to the query string, the page links and
+    # the filters append their own parameters after it
+    params = parse_qsl(request.META.get("QUERY_STRING", ""), keep_blank_values=True)
+    return bool(params) and params[-1][0] == key
+
+
+def ordering(request, key):
+    """
+    Returns the order_by path of the request for the key, None when the request
+    does not sort
+    """
+    cache = request.__dict__.setdefault("_sort_ordering", {})
+    if key in cache:
+        return cache[key]
+    value = request.GET.get(key, "").strip()
+    result = None
+    if value:
+        if value.startswith("-"):
+            # the order is given, nothing is kept
+            result = value
+        else:
+            states = request.session.get(SESSION_KEY, {})
+            state_key = f"{request.path}:{key}"
+            state = states.get(state_key)
+            prefix = "-"
+            if state is not None and state["field"] == value:
+                prefix = state["ordering"]
+                if _clicked(request, key):
+                    prefix = "" if prefix == "-" else "-"
+            states[state_key] = {"field": value, "ordering": prefix}
+            request.session[SESSION_KEY] = states
+            result = f"{prefix}{value}"
+    cache[key] = result
+    return result
+
+
+def sort_queryset(request, queryset, key):
+    """
+    Returns the queryset sorted by the field of the request for the key, the
+    queryset itself when the field is not sortable
+    """
+    order = ordering(request, key)
+    if order is None:
+        return queryset
+    descending = order.startswith("-")
+    field_name = order.lstrip("-")
+    if field_name in queryset.query.annotations:
+        path = field_name
+    else:
+        path = sort_path(queryset.model, field_name)
+    if path is None:
+        return queryset
+    return queryset.order_by(f"-{path}" if descending else path)
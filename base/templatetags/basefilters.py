@@ -1,17 +1,16 @@
 import json
 from django.template.defaultfilters import register
 from django import template
-from employee.models import Employee, EmployeeWorkInformation
-from django.core.paginator import Page, Paginator
+from employee.hierarchy import is_reporting_manager
+from django.core.paginator import Page
+from base.pagination import paginate
 
 
 def paginator_qry(qryset, page_number):
     """
     This method is used to paginate queryset
     """
-    paginator = Paginator(qryset, 50)
-    qryset = paginator.get_page(page_number)
-    return qryset
+    return paginate(qryset, page_number)
 
 
 register = template.Library()
@@ -20,12 +19,11 @@ register = template.Library()
 @register.filter(name="cancel_request")
 def cancel_request(user, request):
     employee = user.employee_get
-    employee_manages = employee.reporting_manager.all()
     return bool(
         request.employee_id == employee
         or user.has_perm("perms.base.cancel_worktyperequest")
         or user.has_perm("perms.base.cancel_shiftrequest")
-        or employee_manages.exists()
+        or is_reporting_manager(employee)
     )
 
 
@@ -49,10 +47,7 @@ def is_reportingmanager(user):
 
     This method will return true if the user employee profile is reporting manager to any employee
     """
-    employee = Employee.objects.filter(employee_user_id=user).first()
-    return EmployeeWorkInformation.objects.filter(
-        reporting_manager_id=employee
-    ).exists()
+    return is_reporting_manager(getattr(user, "employee_get", None))
 
 
 @register.filter(name="filtersubordinates")
@@ -62,9 +57,7 @@ def filtersubordinates(user):
     args:
         user    : request.user
     """
-    employee = user.employee_get
-    employee_manages = employee.reporting_manager.all()
-    return employee_manages.exists()
+    return is_reporting_manager(user.employee_get)
 
 
 @register.filter(name="filter_field")
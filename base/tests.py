@@ -1,3 +1,110 @@
-from django.test import TestCase
+import re
+from pathlib import Path
+from django.apps import apps
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from base.management.commands.query_count_benchmark import LIST_VIEWS
+from base.sorting import sort_path
+from employee.models import Employee
 
-# Create your tests here.
+SORT_KEY_PATTERN = re.compile(r"[?&](?:orderby|sortby)=-?(\w+)")
+MAX_LIST_QUERIES = 40
+
+
+def project_apps():
+    base_dir = Path(settings.BASE_DIR).resolve()
+    return [
+        app_config
+        for app_config in apps.get_app_configs()
+        if base_dir in Path(app_config.path).resolve().parents
+    ]
+
+
+class SortKeysTest(SimpleTestCase):
+    """
+    The sort keys of the column headers are resolved by base.sorting
+    """
+
+    def test_reverse_one_to_one_path(self):
+        self.assertEqual(
+            sort_path(Employee, "employee_work_info__reporting_manager_id"),
+            "employee_work_info__reporting_manager_id",
+        )
+
+    def test_template_sort_keys_resolve(self):
+        # a template does not tell the model of its list, a key is valid when
+        # a model of the project sorts on it
+        models = [model for app in project_apps() for model in app.get_models()]
+        templates = [Path(settings.BASE_DIR) / "templates"] + [
+            Path(app.path) / "templates" for app in project_apps()
+        ]
+        unresolved = []
+        for directory in templates:
+            for template in directory.rglob("*.html"):
+                for key in set(SORT_KEY_PATTERN.findall(template.read_text())):
+                    if not any(sort_path(model, key) for model in models):
+                        unresolved.append(f"{template}: {key}")
+        self.assertEqual(unresolved, [])
+
+
+def create_employees(count, start=0):
+    for index in range(start, start + count):
+        Employee.objects.create(
+            employee_first_name=f"Employee {index}",
+            email=f"employee{index}@example.com",
+            phone=f"9000{index:06d}",
+        )
+
+
+@override_settings(ALLOWED_HOSTS=["testserver"])
+class ListViewQueriesTest(TestCase):
+    """
+    The main list views run a bounded number of queries, which does not grow
+    with the rows listed
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser("admin", "admin@example.com", "admin")
+        Employee.objects.create(
+            employee_user_id=cls.user,
+            employee_first_name="Admin",
+            email="admin@example.com",
+            phone="9000000000",
+        )
+        create_employees(3, start=1)
+
+    def setUp(self):
+        self.client.force_login(self.user)
+        session = self.client.session
+        session["selected_company"] = "all"
+        session.save()
+
+    def test_list_views_query_bound(self):
+        for name in LIST_VIEWS:
+            with self.subTest(view=name):
+                with CaptureQueriesContext(connection) as context:
+                    response = self.client.get(reverse(name))
+                self.assertEqual(response.status_code, 200)
+                self.assertLessEqual(len(context.captured_queries), MAX_LIST_QUERIES)
+
+    def test_employee_list_queries_do_not_grow(self):
+        url = reverse("employee-filter-view")
+        for view in ("card", "list"):
+            with self.subTest(view=view):
+                self.client.get(url, {"view": view})
+                # the counts of the paginator are cached, both renderings count
+                cache.clear()
+                with CaptureQueriesContext(connection) as context:
+                    self.client.get(url, {"view": view})
+                start = Employee.objects.count()
+                create_employees(10, start=start)
+                cache.clear()
+                with self.assertNumQueries(len(context.captured_queries)):
+                    response = self.client.get(url, {"view": view})
+                self.assertContains(response, f"Employee {start + 9}")
@@ -12,7 +12,7 @@ from django.db.models import ProtectedError
 from django.shortcuts import render, redirect
 from django.http import HttpResponse, HttpResponseRedirect, JsonResponse
 from django.views.decorators.http import require_http_methods
-from django.core.paginator import Paginator
+from base.pagination import page_ids, paginate
 from django.core.mail import send_mail
 from django.utils.translation import gettext as _
 from django.contrib import messages
@@ -126,9 +126,7 @@ def paginator_qry(queryset, page_number):
     """
     Common paginator method
     """
-    paginator = Paginator(queryset, 50)
-    queryset = paginator.get_page(page_number)
-    return queryset
+    return paginate(queryset, page_number)
 
 
 def login_user(request):
@@ -1038,14 +1036,8 @@ def rotating_work_type_assign(request):
     rwork_type_assign = filtersubordinates(
         request, rwork_type_assign, "base.view_rotatingworktypeassign"
     )
-    assign_ids = json.dumps(
-        [
-            instance.id
-            for instance in paginator_qry(
-                rwork_type_assign, request.GET.get("page")
-            ).object_list
-        ]
-    )
+    assign_page = paginator_qry(rwork_type_assign, request.GET.get("page"))
+    assign_ids = page_ids(assign_page)
     return render(
         request,
         "base/rotating_work_type/rotating_work_type_assign.html",
@@ -1053,9 +1045,7 @@ def rotating_work_type_assign(request):
             "f": filter,
             "export_filter": RotatingWorkTypeAssignFilter(),
             "export_columns": RotatingWorkTypeAssignExportForm(),
-            "rwork_type_assign": paginator_qry(
-                rwork_type_assign, request.GET.get("page")
-            ),
+            "rwork_type_assign": assign_page,
             "assign_ids": assign_ids,
             "rwork_all": rwork_all,
             "gp_fields": RotatingWorkTypeRequestReGroup.fields,
@@ -1137,22 +1127,14 @@ def rotating_work_type_assign_view(request):
         template = "base/rotating_work_type/htmx/group_by.html"
 
     rwork_type_assign = sortby(request, rwork_type_assign, "orderby")
-    assign_ids = json.dumps(
-        [
-            instance.id
-            for instance in paginator_qry(
-                rwork_type_assign, request.GET.get("page")
-            ).object_list
-        ]
-    )
+    assign_page = paginator_qry(rwork_type_assign, request.GET.get("page"))
+    assign_ids = page_ids(assign_page)
 
     return render(
         request,
         template,
         {
-            "rwork_type_assign": paginator_qry(
-                rwork_type_assign, request.GET.get("page")
-            ),
+            "rwork_type_assign": assign_page,
             "pd": previous_data,
             "filter_dict": data_dict,
             "assign_ids": assign_ids,
@@ -1614,14 +1596,8 @@ def rotating_shift_assign(request):
     rshift_assign = filtersubordinates(
         request, rshift_assign, "base.view_rotatingshiftassign"
     )
-    assign_ids = json.dumps(
-        [
-            instance.id
-            for instance in paginator_qry(
-                rshift_assign, request.GET.get("page")
-            ).object_list
-        ]
-    )
+    assign_page = paginator_qry(rshift_assign, request.GET.get("page"))
+    assign_ids = page_ids(assign_page)
 
     return render(
         request,
@@ -1631,7 +1607,7 @@ def rotating_shift_assign(request):
             "f": filter,
             "export_filter": RotatingShiftAssignFilters(),
             "export_columns": RotatingShiftAssignExportForm(),
-            "rshift_assign": paginator_qry(rshift_assign, request.GET.get("page")),
+            "rshift_assign": assign_page,
             "assign_ids": assign_ids,
             "rshift_all": rshift_all,
             "gp_fields": RotatingShiftRequestReGroup.fields,
@@ -1713,19 +1689,13 @@ def rotating_shift_assign_view(request):
         rshift_assign = rshift_assign.order_by(field_copy)
         template = "base/rotating_shift/htmx/group_by.html"
     rshift_assign = sortby(request, rshift_assign, "orderby")
-    assign_ids = json.dumps(
-        [
-            instance.id
-            for instance in paginator_qry(
-                rshift_assign, request.GET.get("page")
-            ).object_list
-        ]
-    )
+    assign_page = paginator_qry(rshift_assign, request.GET.get("page"))
+    assign_ids = page_ids(assign_page)
     return render(
         request,
         template,
         {
-            "rshift_assign": paginator_qry(rshift_assign, request.GET.get("page")),
+            "rshift_assign": assign_page,
             "pd": previous_data,
             "filter_dict": data_dict,
             "assign_ids": assign_ids,
@@ -2100,15 +2070,9 @@ def work_type_request_view(request):
     work_type_requests = work_type_requests | WorkTypeRequest.objects.filter(
         employee_id=employee
     )
-    requests_ids = json.dumps(
-        [
-            instance.id
-            for instance in paginator_qry(
-                work_type_requests, request.GET.get("page")
-            ).object_list
-        ]
-    )
     f = WorkTypeRequestFilter(request.GET, queryset=work_type_requests)
+    requests_page = paginator_qry(f.qs, request.GET.get("page"))
+    requests_ids = page_ids(requests_page)
     data_dict = parse_qs(previous_data)
     get_key_instances(WorkTypeRequest, data_dict)
     export_filter = WorkTypeRequestFilter()
@@ -2124,7 +2088,7 @@ def work_type_request_view(request):
         request,
         "work_type_request/work_type_request_view.html",
         {
-            "data": paginator_qry(f.qs, request.GET.get("page")),
+            "data": requests_page,
             "f": f,
             "form": form,
             "export_filter": export_filter,
@@ -2168,21 +2132,15 @@ def work_type_request_search(request):
         work_typ_requests = work_typ_requests.order_by(f"-{field_copy}")
         template = "work_type_request/htmx/group_by.html"
 
-    requests_ids = json.dumps(
-        [
-            instance.id
-            for instance in paginator_qry(
-                work_typ_requests, request.GET.get("page")
-            ).object_list
-        ]
-    )
+    requests_page = paginator_qry(work_typ_requests, request.GET.get("page"))
+    requests_ids = page_ids(requests_page)
     data_dict = parse_qs(previous_data)
     get_key_instances(WorkTypeRequest, data_dict)
     return render(
         request,
         template,
         {
-            "data": paginator_qry(work_typ_requests, request.GET.get("page")),
+            "data": requests_page,
             "pd": previous_data,
             "filter_dict": data_dict,
             "requests_ids": requests_ids,
@@ -2616,15 +2574,9 @@ def shift_request_view(request):
         request, ShiftRequest.objects.all(), "base.add_shiftrequest"
     )
     shift_requests = shift_requests | ShiftRequest.objects.filter(employee_id=employee)
-    requests_ids = json.dumps(
-        [
-            instance.id
-            for instance in paginator_qry(
-                shift_requests, request.GET.get("page")
-            ).object_list
-        ]
-    )
     f = ShiftRequestFilter(request.GET, queryset=shift_requests)
+    requests_page = paginator_qry(f.qs, request.GET.get("page"))
+    requests_ids = page_ids(requests_page)
     data_dict = parse_qs(previous_data)
     get_key_instances(ShiftRequest, data_dict)
     form = ShiftRequestForm()
@@ -2640,7 +2592,7 @@ def shift_request_view(request):
         request,
         "shift_request/shift_request_view.html",
         {
-            "data": paginator_qry(f.qs, request.GET.get("page")),
+            "data": requests_page,
             "f": f,
             "form": form,
             "filter_dict": data_dict,
@@ -2678,14 +2630,6 @@ def shift_request_search(request):
             employee_id=employee
         )
     shift_requests = sortby(request, shift_requests, "orderby")
-    requests_ids = json.dumps(
-        [
-            instance.id
-            for instance in paginator_qry(
-                shift_requests, request.GET.get("page")
-            ).object_list
-        ]
-    )
     data_dict = parse_qs(previous_data)
     template = "shift_request/htmx/requests.html"
     if field != "" and field is not None:
@@ -2693,12 +2637,14 @@ def shift_request_search(request):
         shift_requests = shift_requests.order_by(f"-{field_copy}")
         template = "shift_request/htmx/group_by.html"
 
+    requests_page = paginator_qry(shift_requests, request.GET.get("page"))
+    requests_ids = page_ids(requests_page)
     get_key_instances(ShiftRequest, data_dict)
     return render(
         request,
         template,
         {
-            "data": paginator_qry(shift_requests, request.GET.get("page")),
+            "data": requests_page,
             "pd": previous_data,
             "filter_dict": data_dict,
             "requests_ids": requests_ids,
@@ -1 +0,0 @@
-from employee import scheduler
\ No newline at end of file
@@ -17,3 +17,6 @@ class EmployeeConfig(AppConfig):
     """
     default_auto_field = "django.db.models.BigAutoField"
     name = "employee"
+
+    def ready(self):
+        from employee import hierarchy  # noqa: F401, connects the hierarchy signals
@@ -0,0 +1,202 @@
+"""
+hierarchy.py
+
+This module is used to keep the reporting hierarchy (ReportingHierarchy), the
+closure table of the reporting managers, in step with the reporting managers of
+the work information, and to scope querysets to the subordinates of a manager.
+
+The closure table has a row for every (manager, subordinate) pair of the whole
+chain of managers, so the subordinates of a manager at any depth are reached
+with one indexed join, e.g. `employee_id__hierarchy_managers__manager_id`.
+
+Changing the reporting manager of an employee moves the employee with its own
+subordinates: their rows to the old managers are deleted and the rows to the
+new managers created. The imports writing the work information with bulk
+queries move the imported employees whose reporting manager changed.
+
+An install upgraded to the closure table has an empty table, it is built from
+the work information the first time the hierarchy is read or changed by the
+process, or with the `rebuild_reporting_hierarchy` command.
+"""
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from employee.models import EmployeeWorkInformation, ReportingHierarchy
+from employee.signals import work_info_imported
+
+BATCH_SIZE = 1000
+
+_checked = False
+
+
+def ensure_built():
+    """
+    Builds the hierarchy when the table is empty while reporting managers are
+    set, checked once per process
+    """
+    global _checked
+    if _checked:
+        return
+    if (
+        not ReportingHierarchy.objects.exists()
+        and EmployeeWorkInformation._base_manager.filter(
+            employee_id__isnull=False, reporting_manager_id__isnull=False
+        ).exists()
+    ):
+        rebuild()
+    _checked = True
+
+
+def subordinates_of(manager, lookup="employee_id"):
+    """
+    Returns the filter keeping the rows whose employee, through the lookup,
+    reports to the manager directly or not, none without a manager. Use
+    lookup=None for the Employee model itself.
+    """
+    prefix = f"{lookup}__" if lookup else ""
+    if manager is None:
+        return {f"{prefix}pk__in": []}
+    ensure_built()
+    return {f"{prefix}hierarchy_managers__manager_id": manager}
+
+
+def is_reporting_manager(employee):
+    """
+    Checks the employee is the reporting manager of someone, the answer is kept
+    on the employee instance, i.e. for the request of request.user.employee_get
+    """
+    if employee is None:
+        return False
+    if not hasattr(employee, "_is_reporting_manager"):
+        ensure_built()
+        employee._is_reporting_manager = ReportingHierarchy.objects.filter(
+            manager_id=employee
+        ).exists()
+    return employee._is_reporting_manager
+
+
+def direct_manager_id(employee_id):
+    """
+    Returns the id of the reporting manager of the employee in the hierarchy
+    """
+    return (
+        ReportingHierarchy.objects.filter(employee_id=employee_id, depth=1)
+        .values_list("manager_id", flat=True)
+        .first()
+    )
+
+
+def set_manager(employee_id, manager_id):
+    """
+    Moves the employee and its subordinates under the manager, or out of any
+    manager when manager_id is None
+    """
+    with transaction.atomic():
+        depths = {employee_id: 0}
+        depths.update(
+            ReportingHierarchy.objects.filter(manager_id=employee_id).values_list(
+                "employee_id", "depth"
+            )
+        )
+        ReportingHierarchy.objects.filter(employee_id__in=depths).exclude(
+            manager_id__in=depths
+        ).delete()
+        if manager_id is None:
+            return
+        managers = {manager_id: 0}
+        managers.update(
+            ReportingHierarchy.objects.filter(employee_id=manager_id).values_list(
+                "manager_id", "depth"
+            )
+        )
+        ReportingHierarchy.objects.bulk_create(
+            [
+                ReportingHierarchy(
+                    manager_id_id=ancestor_id,
+                    employee_id_id=subordinate_id,
+                    depth=ancestor_depth + 1 + depth,
+                )
+                for ancestor_id, ancestor_depth in managers.items()
+                # a manager among the subordinates would close a loop
+                if ancestor_id not in depths
+                for subordinate_id, depth in depths.items()
+            ],
+            batch_size=BATCH_SIZE,
+        )
+
+
+def rebuild():
+    """
+    Rebuilds the whole hierarchy from the reporting managers of the work
+    information, returns the number of rows created
+    """
+    # the reporting managers are read across the companies
+    managers = dict(
+        EmployeeWorkInformation._base_manager.filter(
+            employee_id__isnull=False, reporting_manager_id__isnull=False
+        ).values_list("employee_id", "reporting_manager_id")
+    )
+    rows = []
+    for employee_id, manager_id in managers.items():
+        depth = 1
+        seen = {employee_id}
+        while manager_id is not None and manager_id not in seen:
+            rows.append(
+                ReportingHierarchy(
+                    manager_id_id=manager_id, employee_id_id=employee_id, depth=depth
+                )
+            )
+            seen.add(manager_id)
+            manager_id = managers.get(manager_id)
+            depth += 1
+    with transaction.atomic():
+        ReportingHierarchy.objects.all().delete()
+        ReportingHierarchy.objects.bulk_create(rows, batch_size=BATCH_SIZE)
+    return len(rows)
+
+
+@receiver(post_save, sender=EmployeeWorkInformation)
+def work_info_saved(sender, instance, **_kwargs):
+    """
+    Moves the employee when its reporting manager changed
+    """
+    employee_id = instance.employee_id_id
+    if employee_id is None:
+        return
+    # the links of the other employees are read from the table
+    ensure_built()
+    manager_id = instance.reporting_manager_id_id
+    if direct_manager_id(employee_id) != manager_id:
+        set_manager(employee_id, manager_id)
+
+
+@receiver(post_delete, sender=EmployeeWorkInformation)
+def work_info_deleted(sender, instance, **_kwargs):
+    """
+    Moves the employee out of its reporting manager
+    """
+    if instance.employee_id_id is not None:
+        ensure_built()
+        set_manager(instance.employee_id_id, None)
+
+
+@receiver(work_info_imported)
+def work_info_imported_hierarchy(sender, employees, **_kwargs):
+    """
+    Moves the imported employees whose reporting manager changed
+    """
+    ensure_built()
+    employee_ids = [employee.pk for employee in employees]
+    managers = dict(
+        EmployeeWorkInformation._base_manager.filter(
+            employee_id__in=employee_ids
+        ).values_list("employee_id", "reporting_manager_id")
+    )
+    current = dict(
+        ReportingHierarchy.objects.filter(
+            employee_id__in=employee_ids, depth=1
+        ).values_list("employee_id", "manager_id")
+    )
+    for employee_id, manager_id in managers.items():
+        if current.get(employee_id) != manager_id:
+            set_manager(employee_id, manager_id)
@@ -0,0 +1,22 @@
+"""
+rebuild_reporting_hierarchy.py
+
+Management command to rebuild the reporting hierarchy from the reporting
+managers of the work information.
+
+The hierarchy is kept up to date by the work information save and imports, this
+command fills it for existing data and repairs it after changes written with
+bulk queries.
+"""
+from django.core.management.base import BaseCommand
+from employee.hierarchy import rebuild
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the reporting hierarchy from the reporting managers"
+
+    def handle(self, *args, **options):
+        rows = rebuild()
+        self.stdout.write(
+            self.style.SUCCESS(f"Reporting hierarchy rebuilt, {rows} rows created")
+        )
@@ -0,0 +1,592 @@
+"""
+employee_import.py
+
+This module is used to import employees and their work information from Excel
+files in bounded memory and time.
+
+The workbook is read in read-only mode and processed in chunks of rows. For each
+chunk the conflicting users and employees are found with one query each, the
+passwords are hashed on a process pool, and the users, employees and work
+information are created with bulk_create in one transaction. The invalid rows
+are written to an error report as they are found.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from datetime import date, datetime
+import django
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import transaction
+from django.utils.dateparse import parse_date
+from openpyxl import Workbook, load_workbook
+from simple_history.utils import bulk_create_with_history, bulk_update_with_history
+from base.models import (
+    Company,
+    Department,
+    EmployeeShift,
+    EmployeeType,
+    JobPosition,
+    JobRole,
+    WorkType,
+)
+from employee.models import Employee, EmployeeWorkInformation
+from employee.signals import work_info_imported
+
+CHUNK_SIZE = getattr(settings, "EMPLOYEE_IMPORT_CHUNK_SIZE", 500)
+HASH_WORKERS = getattr(settings, "EMPLOYEE_IMPORT_HASH_WORKERS", os.cpu_count() or 1)
+
+EMPLOYEE_COLUMNS = ["employee_full_name", "email", "phone"]
+WORK_INFO_COLUMNS = [
+    "badge_id",
+    "first_name",
+    "last_name",
+    "phone",
+    "email",
+    "gender",
+    "department",
+    "job_position",
+    "job_role",
+    "work_type",
+    "shift",
+    "employee_type",
+    "reporting_manager",
+    "company",
+    "location",
+    "date_joining",
+    "contract_end_date",
+    "basic_salary",
+    "salary_hour",
+]
+
+
+def read_chunks(file, chunk_size=CHUNK_SIZE):
+    """
+    Yields the rows of the first sheet as lists of dictionaries keyed by the
+    header row, without loading the whole workbook
+    """
+    workbook = load_workbook(file, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        header = [str(name).strip() if name is not None else "" for name in header]
+        chunk = []
+        for values in rows:
+            if all(value is None for value in values):
+                continue
+            chunk.append(dict(zip(header, values)))
+            if len(chunk) == chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+    finally:
+        workbook.close()
+
+
+def cell_text(value):
+    """
+    Returns the text of a cell, None when the cell is empty
+    """
+    if value is None:
+        return None
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    value = str(value).strip()
+    return value or None
+
+
+def cell_date(value):
+    """
+    Returns the date of a cell, raises ValueError when it is not a date
+    """
+    if value is None or value == "":
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    parsed = parse_date(str(value).strip())
+    if parsed is None:
+        raise ValueError(value)
+    return parsed
+
+
+def cell_number(value):
+    """
+    Returns the integer of a cell, raises ValueError when it is not a number
+    """
+    if value is None or value == "":
+        return None
+    return int(float(value))
+
+
+@contextmanager
+def password_hasher():
+    """
+    Yields the process pool hashing the passwords, None to hash them in this
+    process when a single worker is configured
+    """
+    if HASH_WORKERS <= 1:
+        yield None
+        return
+    with ProcessPoolExecutor(
+        max_workers=HASH_WORKERS, initializer=django.setup
+    ) as executor:
+        yield executor
+
+
+def hash_passwords(passwords, executor):
+    """
+    Returns the hashes of the passwords, computed on the executor when given
+    """
+    if executor is None:
+        return [make_password(password) for password in passwords]
+    chunksize = max(1, len(passwords) // (HASH_WORKERS * 4))
+    return list(executor.map(make_password, passwords, chunksize=chunksize))
+
+
+class ErrorReport:
+    """
+    Collects the rows which could not be imported in a write-only workbook,
+    with the reason in an Error column
+    """
+
+    def __init__(self, columns):
+        self.columns = columns + ["Error"]
+        self.workbook = Workbook(write_only=True)
+        self.sheet = self.workbook.create_sheet()
+        self.sheet.append(self.columns)
+        self.count = 0
+
+    def add(self, row, error):
+        row = {**row, "Error": error}
+        self.sheet.append([_excel_value(row.get(column)) for column in self.columns])
+        self.count += 1
+
+    def save(self, file):
+        self.workbook.save(file)
+
+
+def _excel_value(value):
+    if value is None or isinstance(value, (str, int, float, date)):
+        return value
+    return str(value)
+
+
+def _new_users(rows, executor):
+    """
+    Creates the users of the rows, returns them by username
+    """
+    passwords = hash_passwords([row["password"] for row in rows], executor)
+    User.objects.bulk_create(
+        [
+            User(
+                username=row["email"],
+                email=row["email"],
+                password=password,
+                is_superuser=False,
+            )
+            for row, password in zip(rows, passwords)
+        ]
+    )
+    # ids are not returned by bulk_create on every database
+    return {
+        user.username: user
+        for user in User.objects.filter(username__in=[row["email"] for row in rows])
+    }
+
+
+def import_employees(file, report):
+    """
+    Creates the employees and their users from an employee import file with
+    the EMPLOYEE_COLUMNS, the rows of an existing user are skipped. Returns the
+    number of employees created.
+    """
+    created = 0
+    seen_emails = set()
+    seen_names = set()
+    with password_hasher() as executor:
+        for chunk in read_chunks(file):
+            rows = []
+            for row in chunk:
+                email = cell_text(row.get("email"))
+                full_name = cell_text(row.get("employee_full_name"))
+                phone = cell_text(row.get("phone"))
+                first_name, _, last_name = (full_name or "").partition(" ")
+                error = _row_error(email, first_name, phone)
+                if error is None and email in seen_emails:
+                    error = "The email is repeated in the file"
+                if error is None and (first_name, last_name) in seen_names:
+                    error = "The name is repeated in the file"
+                if error is not None:
+                    report.add(row, error)
+                    continue
+                seen_emails.add(email)
+                seen_names.add((first_name, last_name))
+                rows.append(
+                    {
+                        "row": row,
+                        "email": email,
+                        "password": phone,
+                        "first_name": first_name,
+                        "last_name": last_name,
+                        "phone": phone,
+                    }
+                )
+            rows = _without_conflicts(rows, report)
+            if not rows:
+                continue
+            with transaction.atomic():
+                users = _new_users(rows, executor)
+                Employee.objects.bulk_create(
+                    [
+                        Employee(
+                            employee_user_id=users[row["email"]],
+                            employee_first_name=row["first_name"],
+                            employee_last_name=row["last_name"],
+                            email=row["email"],
+                            phone=row["phone"],
+                        )
+                        for row in rows
+                    ]
+                )
+            created += len(rows)
+    return created
+
+
+def _row_error(email, first_name, phone):
+    if email is None:
+        return "The email is required"
+    try:
+        validate_email(email)
+    except ValidationError:
+        return f"Invalid email {email}"
+    if not first_name:
+        return "The name is required"
+    if phone is None:
+        return "The phone is required"
+    return None
+
+
+def _without_conflicts(rows, report, matched_employees=None):
+    """
+    Drops the rows of an existing user, which are skipped, and reports the rows
+    whose email, name or badge id belongs to another employee
+    """
+    if not rows:
+        return rows
+    emails = [row["email"] for row in rows]
+    existing_users = set(
+        User.objects.filter(username__in=emails).values_list("username", flat=True)
+    )
+    rows = [row for row in rows if row["email"] not in existing_users]
+    if not rows:
+        return rows
+    # the employees are unique across the companies
+    employees = Employee._base_manager
+    used_emails = {
+        email: pk
+        for pk, email in employees.filter(
+            email__in=[row["email"] for row in rows]
+        ).values_list("pk", "email")
+    }
+    used_badges = {
+        badge_id: pk
+        for pk, badge_id in employees.filter(
+            badge_id__in=[row["badge_id"] for row in rows if row.get("badge_id")]
+        ).values_list("pk", "badge_id")
+    }
+    names = {(row["first_name"], row["last_name"]) for row in rows}
+    used_names = set()
+    if matched_employees is None:
+        # the rows are not matched to existing employees by name
+        used_names = {
+            name
+            for name in employees.filter(
+                employee_first_name__in={first_name for first_name, _ in names},
+                employee_last_name__in={last_name for _, last_name in names},
+            ).values_list("employee_first_name", "employee_last_name")
+            if name in names
+        }
+    valid = []
+    for row in rows:
+        name = (row["first_name"], row["last_name"])
+        matched = (matched_employees or {}).get(name)
+        matched_pk = matched.pk if matched is not None else None
+        if used_emails.get(row["email"], matched_pk) != matched_pk:
+            report.add(row["row"], "An employee with this email already exists")
+        elif name in used_names:
+            report.add(row["row"], "An employee with this name already exists")
+        elif (
+            row.get("badge_id")
+            and used_badges.get(row["badge_id"], matched_pk) != matched_pk
+        ):
+            report.add(row["row"], f"The badge id {row['badge_id']} is already used")
+        else:
+            valid.append(row)
+    return valid
+
+
+class RelatedObjects:
+    """
+    Finds or creates the departments, job positions, job roles, work types,
+    shifts and employee types named in the work information rows, each name is
+    looked up once per import
+    """
+
+    def __init__(self):
+        self.cache = {}
+
+    def get(self, model, create=True, **lookup):
+        key = (model, tuple(sorted(lookup.items())))
+        if key not in self.cache:
+            obj = model.objects.filter(**lookup).first()
+            if obj is None and create:
+                obj = model(**lookup)
+                obj.save()
+            self.cache[key] = obj
+        return self.cache[key]
+
+    def resolve(self, row):
+        """
+        Returns the related objects of a work information row
+        """
+        department = self.get(Department, department=row["department"])
+        job_position = self.get(
+            JobPosition,
+            department_id=department,
+            job_position=row["job_position"],
+        )
+        return {
+            "department_id": department,
+            "job_position_id": job_position,
+            "job_role_id": self.get(
+                JobRole, job_position_id=job_position, job_role=row["job_role"]
+            ),
+            "work_type_id": self.get(WorkType, work_type=row["work_type"]),
+            "shift_id": self.get(EmployeeShift, employee_shift=row["shift"]),
+            "employee_type_id": self.get(
+                EmployeeType, employee_type=row["employee_type"]
+            ),
+            "company_id": self.get(Company, create=False, company=row["company"]),
+        }
+
+
+WORK_INFO_REQUIRED = [
+    "department",
+    "job_position",
+    "job_role",
+    "work_type",
+    "shift",
+    "employee_type",
+]
+WORK_INFO_FIELDS = [
+    "email",
+    "department_id",
+    "job_position_id",
+    "job_role_id",
+    "employee_type_id",
+    "reporting_manager_id",
+    "company_id",
+    "shift_id",
+    "work_type_id",
+    "location",
+    "date_joining",
+    "contract_end_date",
+    "basic_salary",
+    "salary_hour",
+]
+
+
+def _work_info_row(row):
+    """
+    Returns the cleaned values of a work information row, raises ValueError
+    with the reason when the row is not valid
+    """
+    values = {
+        "row": row,
+        "email": cell_text(row.get("email")),
+        "phone": cell_text(row.get("phone")),
+        "first_name": cell_text(row.get("first_name")) or "",
+        "last_name": cell_text(row.get("last_name")) or "",
+        "badge_id": cell_text(row.get("badge_id")),
+        "gender": (cell_text(row.get("gender")) or "male").lower(),
+        "reporting_manager": cell_text(row.get("reporting_manager")),
+        "company": cell_text(row.get("company")),
+        "location": cell_text(row.get("location")) or "",
+    }
+    values["password"] = values["phone"]
+    error = _row_error(values["email"], values["first_name"], values["phone"])
+    if error is not None:
+        raise ValueError(error)
+    for column in WORK_INFO_REQUIRED:
+        values[column] = cell_text(row.get(column))
+        if values[column] is None:
+            raise ValueError(f"The {column.replace('_', ' ')} is required")
+    for column in ["date_joining", "contract_end_date"]:
+        try:
+            values[column] = cell_date(row.get(column))
+        except ValueError as error:
+            raise ValueError(f"Invalid {column.replace('_', ' ')} {error}") from error
+    for column in ["basic_salary", "salary_hour"]:
+        try:
+            values[column] = cell_number(row.get(column))
+        except ValueError as error:
+            raise ValueError(f"Invalid {column.replace('_', ' ')}") from error
+    return values
+
+
+def _reporting_managers(rows, employees):
+    """
+    Returns the reporting managers named in the rows by "first last" name, the
+    employees of the rows, saved just before, included
+    """
+    names = {}
+    for row in rows:
+        manager = row["reporting_manager"]
+        if manager and " " in manager:
+            names[manager] = tuple(manager.split(" ", 1))
+    if not names:
+        return {}
+    managers = {
+        (employee.employee_first_name, employee.employee_last_name): employee
+        for employee in Employee._base_manager.filter(
+            employee_first_name__in={first for first, _ in names.values()},
+            employee_last_name__in={last for _, last in names.values()},
+        ).order_by("-pk")
+    }
+    # a manager in the rows, e.g. the row above, is the employee of that row
+    managers.update(
+        {
+            (employee.employee_first_name, employee.employee_last_name): employee
+            for employee in employees
+        }
+    )
+    return {manager: managers.get(name) for manager, name in names.items()}
+
+
+def import_work_info(file, report):
+    """
+    Creates the employees, their users and work information from a work
+    information import file with the WORK_INFO_COLUMNS. The rows of an existing
+    user are skipped, and an existing employee of the same name is given the new
+    user. Returns the number of rows imported.
+    """
+    imported = 0
+    related = RelatedObjects()
+    seen_emails = set()
+    seen_names = set()
+    seen_badges = set()
+    with password_hasher() as executor:
+        for chunk in read_chunks(file):
+            rows = []
+            for row in chunk:
+                try:
+                    values = _work_info_row(row)
+                    related_objects = related.resolve(values)
+                except Exception as error:
+                    report.add(row, str(error))
+                    continue
+                name = (values["first_name"], values["last_name"])
+                if values["email"] in seen_emails:
+                    report.add(row, "The email is repeated in the file")
+                    continue
+                if name in seen_names:
+                    report.add(row, "The name is repeated in the file")
+                    continue
+                if values["badge_id"] and values["badge_id"] in seen_badges:
+                    report.add(row, "The badge id is repeated in the file")
+                    continue
+                seen_emails.add(values["email"])
+                seen_names.add(name)
+                seen_badges.add(values["badge_id"])
+                values.update(related_objects)
+                rows.append(values)
+            if not rows:
+                continue
+            names = {(row["first_name"], row["last_name"]) for row in rows}
+            matched = {
+                (employee.employee_first_name, employee.employee_last_name): employee
+                for employee in Employee._base_manager.filter(
+                    employee_first_name__in={first for first, _ in names},
+                    employee_last_name__in={last for _, last in names},
+                ).order_by("-pk")
+            }
+            matched = {name: matched[name] for name in names if name in matched}
+            rows = _without_conflicts(rows, report, matched)
+            if not rows:
+                continue
+            with transaction.atomic():
+                imported += _save_work_info(rows, matched, executor)
+    return imported
+
+
+def _save_work_info(rows, matched, executor):
+    users = _new_users(rows, executor)
+    new_employees = []
+    updated_employees = []
+    for row in rows:
+        employee = matched.get((row["first_name"], row["last_name"]))
+        if employee is None:
+            employee = Employee()
+            new_employees.append(employee)
+        else:
+            updated_employees.append(employee)
+        employee.employee_user_id = users[row["email"]]
+        employee.badge_id = row["badge_id"]
+        employee.employee_first_name = row["first_name"]
+        employee.employee_last_name = row["last_name"]
+        employee.email = row["email"]
+        employee.phone = row["phone"]
+        employee.gender = row["gender"]
+        row["employee"] = employee
+    Employee.objects.bulk_update(
+        updated_employees,
+        ["employee_user_id", "badge_id", "email", "phone", "gender"],
+    )
+    Employee.objects.bulk_create(new_employees)
+    employees = {
+        employee.email: employee
+        for employee in Employee._base_manager.filter(
+            email__in=[row["email"] for row in rows]
+        )
+    }
+    managers = _reporting_managers(rows, employees.values())
+    work_infos = {
+        work_info.employee_id_id: work_info
+        for work_info in EmployeeWorkInformation._base_manager.filter(
+            employee_id__in=employees.values()
+        )
+    }
+    new_work_infos = []
+    updated_work_infos = []
+    for row in rows:
+        employee = employees[row["email"]]
+        work_info = work_infos.get(employee.pk)
+        if work_info is None:
+            work_info = EmployeeWorkInformation(employee_id=employee)
+            new_work_infos.append(work_info)
+        else:
+            updated_work_infos.append(work_info)
+        for field in WORK_INFO_FIELDS:
+            if field == "reporting_manager_id":
+                setattr(work_info, field, managers.get(row["reporting_manager"]))
+            else:
+                setattr(work_info, field, row[field])
+    if new_work_infos:
+        bulk_create_with_history(new_work_infos, EmployeeWorkInformation)
+    if updated_work_infos:
+        bulk_update_with_history(
+            updated_work_infos, EmployeeWorkInformation, WORK_INFO_FIELDS
+        )
+    work_info_imported.send(
+        sender=EmployeeWorkInformation,
+        employees=list(employees.values()),
+    )
+    return len(rows)
@@ -6,6 +6,7 @@ This module is used to register models for employee app
 """
 from datetime import date, datetime
 from django.conf import settings
+from django.core.exceptions import ValidationError
 from django.db import models
 from django.contrib.auth.models import User, Permission
 from django.utils.translation import gettext_lazy as trans
@@ -274,6 +275,23 @@ class EmployeeWorkInformation(models.Model):
     def __str__(self) -> str:
         return f"{self.employee_id} - {self.job_position_id}"
 
+    def clean(self):
+        manager_id = self.reporting_manager_id_id
+        if manager_id is not None and self.employee_id_id is not None:
+            if (
+                manager_id == self.employee_id_id
+                or ReportingHierarchy.objects.filter(
+                    manager_id=self.employee_id_id, employee_id=manager_id
+                ).exists()
+            ):
+                raise ValidationError(
+                    {
+                        "reporting_manager_id": _(
+                            "The reporting manager cannot report to this employee"
+                        )
+                    }
+                )
+
     def save(self, *args, **kwargs):
         self.full_clean()
         super().save(*args, **kwargs)
@@ -310,6 +328,36 @@ class EmployeeWorkInformation(models.Model):
         return self
 
 
+class ReportingHierarchy(models.Model):
+    """
+    ReportingHierarchy model, the closure table of the reporting managers: a row
+    for every manager of an employee, the direct reporting manager at depth 1,
+    its manager at depth 2 and so on. It is maintained from the reporting
+    managers of the work information, see employee.hierarchy
+    """
+
+    manager_id = models.ForeignKey(
+        Employee,
+        on_delete=models.CASCADE,
+        related_name="hierarchy_subordinates",
+        verbose_name=_("Manager"),
+    )
+    employee_id = models.ForeignKey(
+        Employee,
+        on_delete=models.CASCADE,
+        related_name="hierarchy_managers",
+        verbose_name=_("Employee"),
+    )
+    depth = models.PositiveIntegerField(default=1)
+
+    class Meta:
+        unique_together = ("manager_id", "employee_id")
+        indexes = [models.Index(fields=["employee_id", "depth"])]
+
+    def __str__(self) -> str:
+        return f"{self.manager_id} > {self.employee_id} ({self.depth})"
+
+
 class EmployeeBankDetails(models.Model):
     """
     EmployeeBankDetails model
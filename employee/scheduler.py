@@ -1,6 +1,12 @@
-from apscheduler.schedulers.background import BackgroundScheduler
+"""
+scheduler.py
 
+This module is used to register the scheduled jobs of the employee app
+"""
+from horilla.scheduler import scheduled_job
 
+
+@scheduled_job("interval", days=1)
 def update_experience():
     from employee.models import EmployeeWorkInformation
     """
@@ -14,7 +20,3 @@ def update_experience():
         instance.experience_calculator()
     return
 
-
-scheduler = BackgroundScheduler()
-scheduler.add_job(update_experience, "interval", days=1)
-scheduler.start()
\ No newline at end of file
@@ -0,0 +1,11 @@
+"""
+signals.py
+
+This module is used to define the signals of the employee app
+"""
+from django.dispatch import Signal
+
+# sent after the work information of employees is imported with bulk queries,
+# which send no pre_save or post_save signal, with the employees as the
+# employees argument
+work_info_imported = Signal()
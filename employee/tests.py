@@ -1,3 +1,137 @@
+from io import BytesIO
+from unittest import mock
 from django.test import TestCase
+from openpyxl import Workbook
+from base.models import Department, JobPosition
+from employee import hierarchy
+from employee.methods.employee_import import (
+    WORK_INFO_COLUMNS,
+    ErrorReport,
+    import_work_info,
+)
+from employee.models import Employee, EmployeeWorkInformation, ReportingHierarchy
 
-# Create your tests here.
+
+def create_employee(name, phone):
+    return Employee.objects.create(
+        employee_first_name=name, email=f"{name.lower()}@example.com", phone=phone
+    )
+
+
+def set_reporting_manager(employee, manager):
+    work_info = EmployeeWorkInformation.objects.filter(employee_id=employee).first()
+    if work_info is None:
+        work_info = EmployeeWorkInformation(
+            employee_id=employee, job_position_id=JobPosition.objects.first()
+        )
+    work_info.reporting_manager_id = manager
+    work_info.save()
+
+
+class ReportingHierarchyTest(TestCase):
+    """
+    The closure table follows the reporting managers of the work information
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        department = Department(department="Management")
+        department.save()
+        JobPosition.objects.create(job_position="Manager", department_id=department)
+        cls.boss = create_employee("Boss", "9000000000")
+        cls.sub = create_employee("Sub", "9000000001")
+        cls.leaf = create_employee("Leaf", "9000000002")
+        cls.other = create_employee("Other", "9000000003")
+
+    def subordinates(self, manager):
+        return set(
+            Employee.objects.filter(
+                **hierarchy.subordinates_of(manager, lookup=None)
+            ).values_list("employee_first_name", flat=True)
+        )
+
+    def test_move_with_indirect_subordinates(self):
+        set_reporting_manager(self.sub, self.boss)
+        set_reporting_manager(self.leaf, self.sub)
+        self.assertEqual(self.subordinates(self.boss), {"Sub", "Leaf"})
+
+        set_reporting_manager(self.sub, self.other)
+        self.assertEqual(self.subordinates(self.boss), set())
+        self.assertEqual(self.subordinates(self.other), {"Sub", "Leaf"})
+        self.assertEqual(
+            ReportingHierarchy.objects.get(
+                manager_id=self.other, employee_id=self.leaf
+            ).depth,
+            2,
+        )
+
+    def test_empty_table_is_built_before_a_change(self):
+        set_reporting_manager(self.sub, self.boss)
+        set_reporting_manager(self.leaf, self.sub)
+        # an upgraded install: the managers are set, the table is empty
+        ReportingHierarchy.objects.all().delete()
+        hierarchy._checked = False
+
+        set_reporting_manager(self.other, self.boss)
+        self.assertEqual(self.subordinates(self.boss), {"Sub", "Leaf", "Other"})
+        self.assertEqual(self.subordinates(self.sub), {"Leaf"})
+
+
+def work_info_file(rows):
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.append(WORK_INFO_COLUMNS)
+    for row in rows:
+        sheet.append([row.get(column) for column in WORK_INFO_COLUMNS])
+    file = BytesIO()
+    workbook.save(file)
+    file.seek(0)
+    return file
+
+
+def work_info_row(first_name, last_name, phone, **values):
+    return {
+        "first_name": first_name,
+        "last_name": last_name,
+        "phone": phone,
+        "email": f"{first_name.lower()}@example.com",
+        "department": "Management",
+        "job_position": "Manager",
+        "job_role": "Manager",
+        "work_type": "Office",
+        "shift": "Day",
+        "employee_type": "Permanent",
+        **values,
+    }
+
+
+@mock.patch("employee.methods.employee_import.HASH_WORKERS", 1)
+class WorkInfoImportTest(TestCase):
+    """
+    The work information import resolves the reporting managers by name
+    """
+
+    def test_manager_imported_above_in_the_file(self):
+        report = ErrorReport(WORK_INFO_COLUMNS)
+        imported = import_work_info(
+            work_info_file(
+                [
+                    work_info_row("Boss", "One", "9000000010"),
+                    work_info_row(
+                        "Sub", "Two", "9000000011", reporting_manager="Boss One"
+                    ),
+                ]
+            ),
+            report,
+        )
+        report.save(BytesIO())
+        self.assertEqual((imported, report.count), (2, 0))
+        sub = Employee.objects.get(employee_first_name="Sub")
+        self.assertEqual(
+            sub.employee_work_info.reporting_manager_id.employee_first_name, "Boss"
+        )
+        self.assertTrue(
+            ReportingHierarchy.objects.filter(
+                manager_id__employee_first_name="Boss", employee_id=sub
+            ).exists()
+        )
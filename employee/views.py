@@ -15,14 +15,14 @@ import os
 import json
 import calendar
 from datetime import datetime, timedelta, date
-from collections import defaultdict
 from urllib.parse import parse_qs
 import pandas as pd
 from django.db.models import Q
 from django.db.models import F, ProtectedError
 from django.conf import settings
 from django.contrib import messages
-from django.core.paginator import Paginator
+from base.pagination import paginate
+from horilla_audit.methods import buffered_history
 from django.shortcuts import render, redirect
 from django.utils.translation import gettext as __
 from django.contrib.auth.models import User
@@ -68,6 +68,13 @@ from employee.forms import (
     excel_columns,
 )
 from employee.models import Employee, EmployeeWorkInformation, EmployeeBankDetails
+from employee.methods.employee_import import (
+    EMPLOYEE_COLUMNS,
+    WORK_INFO_COLUMNS,
+    ErrorReport,
+    import_employees,
+    import_work_info,
+)
 from payroll.models.models import Contract
 from pms.models import Feedback
 from recruitment.models import Candidate
@@ -401,9 +408,7 @@ def paginator_qry(qryset, page_number):
     """
     This method is used to paginate query set
     """
-    paginator = Paginator(qryset, 50)
-    qryset = paginator.get_page(page_number)
-    return qryset
+    return paginate(qryset, page_number)
 
 
 @login_required
@@ -781,6 +786,14 @@ def employee_filter_view(request):
         employees=employees.filter(is_active=True)
     employees = filtersubordinatesemployeemodel(
         request, employees, "employee.view_employee"
+    ).select_related(
+        "employee_work_info__job_position_id",
+        "employee_work_info__department_id",
+        "employee_work_info__shift_id",
+        "employee_work_info__work_type_id",
+        "employee_work_info__job_role_id",
+        "employee_work_info__reporting_manager_id",
+        "employee_work_info__company_id",
     )
     page_number = request.GET.get("page")
     view = request.GET.get("view")
@@ -985,15 +998,16 @@ def employee_bulk_archive(request):
     is_active = False
     if request.GET.get("is_active") == "True":
         is_active = True
-    for employee_id in ids:
-        employee = Employee.objects.get(id=employee_id)
-        employee.is_active = is_active
-        employee.employee_user_id.is_active = is_active
-        employee.save()
-        message = _("archived")
-        if is_active:
-            message = _("un-archived")
-        messages.success(request, f"{employee} is {message}")
+    with buffered_history():
+        for employee_id in ids:
+            employee = Employee.objects.get(id=employee_id)
+            employee.is_active = is_active
+            employee.employee_user_id.is_active = is_active
+            employee.save()
+            message = _("archived")
+            if is_active:
+                message = _("un-archived")
+            messages.success(request, f"{employee} is {message}")
     return JsonResponse({"message": "Success"})
 
 
@@ -1200,42 +1214,10 @@ def employee_import(request):
     """
     if request.method == "POST":
         file = request.FILES["file"]
-        # Read the Excel file into a Pandas DataFrame
-        data_frame = pd.read_excel(file)
-        # Convert the DataFrame to a list of dictionaries
-        employee_dicts = data_frame.to_dict("records")
-        # Create or update Employee objects from the list of dictionaries
-        error_list = []
-        for employee_dict in employee_dicts:
-            try:
-                phone = employee_dict["phone"]
-                email = employee_dict["email"]
-                employee_full_name = employee_dict["employee_full_name"]
-                existing_user = User.objects.filter(username=email).first()
-                if existing_user is None:
-                    employee_first_name = employee_full_name
-                    employee_last_name = ""
-                    if " " in employee_full_name:
-                        (
-                            employee_first_name,
-                            employee_last_name,
-                        ) = employee_full_name.split(" ", 1)
-
-                    user = User.objects.create_user(
-                        username=email,
-                        email=email,
-                        password=str(phone).strip(),
-                        is_superuser=False,
-                    )
-                    employee = Employee()
-                    employee.employee_user_id = user
-                    employee.employee_first_name = employee_first_name
-                    employee.employee_last_name = employee_last_name
-                    employee.email = email
-                    employee.phone = phone
-                    employee.save()
-            except Exception:
-                error_list.append(employee_dict)
+        report = ErrorReport(EMPLOYEE_COLUMNS)
+        import_employees(file, report)
+        if report.count:
+            return import_error_response(report)
         return HttpResponse(
             """
     <div class='alert-success p-3 border-rounded'>
@@ -1244,7 +1226,7 @@ def employee_import(request):
             
     """
         )
-    data_frame = pd.DataFrame(columns=["employee_full_name", "email", "phone"])
+    data_frame = pd.DataFrame(columns=EMPLOYEE_COLUMNS)
     # Export the DataFrame to an Excel file
     response = HttpResponse(content_type="application/ms-excel")
     response["Content-Disposition"] = 'attachment; filename="employee_template.xlsx"'
@@ -1278,45 +1260,21 @@ def employee_export(_):
     return response
 
 
-def convert_nan(field, dicts):
+def import_error_response(report):
     """
-    This method is returns None or field value
+    Returns the error report of an import as an Excel file
     """
-    field_value = dicts.get(field)
-    try:
-        float(field_value)
-        return None
-    except ValueError:
-        return field_value
+    response = HttpResponse(content_type="application/ms-excel")
+    response["Content-Disposition"] = 'attachment; filename="ImportError.xlsx"'
+    report.save(response)
+    return response
 
 
 def work_info_import(request):
     """
     This method is used to import Employee instances and creates related objects
     """
-    data_frame = pd.DataFrame(
-        columns=[
-            "badge_id",
-            "first_name",
-            "last_name",
-            "phone",
-            "email",
-            "gender",
-            "department",
-            "job_position",
-            "job_role",
-            "work_type",
-            "shift",
-            "employee_type",
-            "reporting_manager",
-            "company",
-            "location",
-            "date_joining",
-            "contract_end_date",
-            "basic_salary",
-            "salary_hour",
-        ]
-    )
+    data_frame = pd.DataFrame(columns=WORK_INFO_COLUMNS)
     # Export the DataFrame to an Excel file
     response = HttpResponse(content_type="application/ms-excel")
     response["Content-Disposition"] = 'attachment; filename="work_info_template.xlsx"'
@@ -1324,138 +1282,10 @@ def work_info_import(request):
 
     if request.method == "POST" and request.FILES.get("file") is not None:
         file = request.FILES["file"]
-        data_frame = pd.read_excel(file)
-        work_info_dicts = data_frame.to_dict("records")
-        error_lists = []
-        for work_info in work_info_dicts:
-            try:
-                email = work_info["email"]
-                phone = work_info["phone"]
-                first_name = work_info["first_name"]
-                last_name = work_info["last_name"]
-                badge_id = convert_nan("badge_id", work_info)
-                department = convert_nan("department", work_info)
-                job_position = convert_nan("job_position", work_info)
-                job_role = convert_nan("job_role", work_info)
-                work_type = convert_nan("work_type", work_info)
-                employee_type = convert_nan("employee_type", work_info)
-                reporting_manager = convert_nan("reporting_manager", work_info)
-                company = convert_nan("company", work_info)
-                location = convert_nan("location", work_info)
-                shift = convert_nan("shift", work_info)
-                date_joining = convert_nan("date_joining", work_info)
-                contract_end_date = convert_nan("contract_end_date", work_info)
-                basic_salary = convert_nan("basic_salary", work_info)
-                gender = work_info.get("gender")
-                user = User.objects.filter(username=email).first()
-                if user is None:
-                    user = User.objects.create_user(
-                        username=email,
-                        email=email,
-                        password=str(phone).strip(),
-                        is_superuser=False,
-                    )
-
-                    employee_obj = Employee.objects.filter(
-                        employee_first_name=first_name, employee_last_name=last_name
-                    ).first()
-                    if employee_obj is None:
-                        employee_obj = Employee()
-                    employee_obj.employee_user_id = user
-                    employee_obj.badge_id = badge_id
-                    employee_obj.employee_first_name = first_name
-                    employee_obj.employee_last_name = last_name
-                    employee_obj.email = email
-                    employee_obj.phone = phone
-                    employee_obj.gender = gender.lower()
-                    employee_obj.save()
-                    department_obj = Department.objects.filter(
-                        department=department
-                    ).first()
-                    if department_obj is None:
-                        department_obj = Department()
-                        department_obj.department = department
-                        department_obj.save()
-
-                    job_position_obj = JobPosition.objects.filter(
-                        department_id=department_obj, job_position=job_position
-                    ).first()
-                    if job_position_obj is None:
-                        job_position_obj = JobPosition()
-                        job_position_obj.department_id = department_obj
-                        job_position_obj.job_position = job_position
-                        job_position_obj.save()
-
-                    job_role_obj = JobRole.objects.filter(
-                        job_role=job_role, job_position_id=job_position_obj
-                    ).first()
-                    if job_role_obj is None:
-                        job_role_obj = JobRole()
-                        job_role_obj.job_position_id = job_position_obj
-                        job_role_obj.job_role = job_role
-                        job_role_obj.save()
-
-                    work_type_obj = WorkType.objects.filter(work_type=work_type).first()
-                    if work_type_obj is None:
-                        work_type_obj = WorkType()
-                        work_type_obj.work_type = work_type
-                        work_type_obj.save()
-
-                    shift_obj = EmployeeShift.objects.filter(
-                        employee_shift=shift
-                    ).first()
-                    if shift_obj is None:
-                        shift_obj = EmployeeShift()
-                        shift_obj.employee_shift = shift
-                        shift_obj.save()
-                    employee_type_obj = EmployeeType.objects.filter(
-                        employee_type=employee_type
-                    ).first()
-                    if employee_type_obj is None:
-                        employee_type_obj = EmployeeType()
-                        employee_type_obj.employee_type = employee_type
-                        employee_type_obj.save()
-                    manager_fname, manager_lname = "", ""
-                    if isinstance(reporting_manager, str) and " " in reporting_manager:
-                        manager_fname, manager_lname = reporting_manager.split(" ", 1)
-                    reporting_manager_obj = Employee.objects.filter(
-                        employee_first_name=manager_fname,
-                        employee_last_name=manager_lname,
-                    ).first()
-                    company_obj = Company.objects.filter(company=company).first()
-                    employee_work_info = EmployeeWorkInformation.objects.filter(
-                        employee_id=employee_obj
-                    ).first()
-                    if employee_work_info is None:
-                        employee_work_info = EmployeeWorkInformation()
-                    employee_work_info.employee_id = employee_obj
-                    employee_work_info.email = email
-                    employee_work_info.department_id = department_obj
-                    employee_work_info.job_position_id = job_position_obj
-                    employee_work_info.job_role_id = job_role_obj
-                    employee_work_info.employee_type_id = employee_type_obj
-                    employee_work_info.reporting_manager_id = reporting_manager_obj
-                    employee_work_info.company_id = company_obj
-                    employee_work_info.shift_id = shift_obj
-                    employee_work_info.location = location
-                    employee_work_info.date_joining = date_joining
-                    employee_work_info.contract_end_date = contract_end_date
-                    employee_work_info.basic_salary = basic_salary
-                    employee_work_info.save()
-            except Exception:
-                error_lists.append(work_info)
-        if error_lists:
-            res = defaultdict(list)
-            for sub in error_lists:
-                for key in sub:
-                    res[key].append(sub[key])
-            # df = pd.DataFrame(res)
-            data_frame = pd.DataFrame(error_lists, columns=error_lists[0].keys())
-            # Create an HTTP response object with the Excel file
-            response = HttpResponse(content_type="application/ms-excel")
-            response["Content-Disposition"] = 'attachment; filename="ImportError.xlsx"'
-            data_frame.to_excel(response, index=False)
-            return response
+        report = ErrorReport(WORK_INFO_COLUMNS)
+        import_work_info(file, report)
+        if report.count:
+            return import_error_response(report)
         return HttpResponse("Imported successfully")
     return response
 
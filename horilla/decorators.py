@@ -2,7 +2,7 @@ from urllib.parse import urlencode
 from django.http import HttpResponse,HttpResponseRedirect
 from django.shortcuts import redirect
 from django.urls import reverse
-from employee.models import Employee, EmployeeWorkInformation
+from employee.hierarchy import is_reporting_manager
 from django.contrib import messages
 
 decorator_with_arguments = lambda decorator: lambda *args, **kwargs: lambda func: decorator(func, *args, **kwargs)
@@ -41,9 +41,8 @@ def manager_can_enter(function, perm):
     """
     def _function(request, *args, **kwargs):
         user = request.user
-        employee = Employee.objects.filter(employee_user_id=user).first()
-        is_manager = EmployeeWorkInformation.objects.filter(reporting_manager_id=employee).exists()
-        if user.has_perm(perm) or is_manager:
+        employee = getattr(user, "employee_get", None)
+        if user.has_perm(perm) or is_reporting_manager(employee):
             return function(request, *args, **kwargs)
         else:
             messages.info(request,'You dont have permission.')
@@ -4,7 +4,7 @@ filters.py
 import uuid
 import django_filters
 from django import forms
-from base.methods import reload_queryset
+from horilla_widgets.widgets.select_widgets import autocomplete_fields
 
 def filter_by_name(queryset, name, value):
     """
@@ -28,7 +28,7 @@ def filter_by_name(queryset, name, value):
 class FilterSet(django_filters.FilterSet):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        reload_queryset(self.form.fields)
+        autocomplete_fields(self.form.fields)
         for field_name, field in self.form.fields.items():
             filter_widget = self.filters[field_name]
             widget = filter_widget.field.widget
@@ -0,0 +1,44 @@
+"""
+scheduler.py
+
+This module is used to register the scheduled jobs of the horilla apps.
+
+Each app declares its jobs in its `scheduler` module with the `scheduled_job`
+decorator. Importing the module only registers the jobs, they are run by the
+`runscheduler` management command.
+"""
+import functools
+from django.db import close_old_connections
+from django.utils.module_loading import autodiscover_modules
+
+JOBS = {}
+
+
+def scheduled_job(trigger, **trigger_args):
+    """
+    Decorator to register a function as a scheduled job, the arguments are the
+    APScheduler trigger and its arguments, e.g. `scheduled_job("interval", seconds=10)`
+    """
+
+    def decorator(func):
+        @functools.wraps(func)
+        def job(*args, **kwargs):
+            close_old_connections()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                close_old_connections()
+
+        job_id = f"{func.__module__}.{func.__name__}"
+        JOBS[job_id] = {"func": job, "trigger": trigger, "trigger_args": trigger_args}
+        return job
+
+    return decorator
+
+
+def discover_jobs():
+    """
+    Imports the scheduler module of every installed app and returns the registered jobs
+    """
+    autodiscover_modules("scheduler")
+    return JOBS
@@ -38,7 +38,8 @@ urlpatterns = [
     path('api/leave/', include('leave_api.urls')),
     path('api/employee/',include('employee_api.urls')),
     path('api/asset/',include('asset_api.urls')),
-    path('api/base/',include('base_api.urls'))
+    path('api/base/',include('base_api.urls')),
+    path('horilla-widgets/',include('horilla_widgets.urls')),
     
 ]
 
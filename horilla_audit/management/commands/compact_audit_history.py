@@ -0,0 +1,42 @@
+"""
+compact_audit_history.py
+
+Management command to delete the historical records changing nothing since the
+previous record of their instance.
+
+The audit log does not record such changes anymore, this command removes the
+ones recorded before.
+"""
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from horilla_audit.methods import duplicate_history_ids
+from horilla_audit.models import HorillaAuditInfo
+
+BATCH_SIZE = 1000
+
+
+class Command(BaseCommand):
+    help = "Deletes the audit history records changing nothing"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Count the records to delete without deleting them",
+        )
+
+    def handle(self, *args, **options):
+        total = 0
+        for history_model in apps.get_models():
+            if not issubclass(history_model, HorillaAuditInfo):
+                continue
+            duplicate_ids = duplicate_history_ids(history_model)
+            if not options["dry_run"]:
+                for start in range(0, len(duplicate_ids), BATCH_SIZE):
+                    history_model._default_manager.filter(
+                        history_id__in=duplicate_ids[start : start + BATCH_SIZE]
+                    ).delete()
+            total += len(duplicate_ids)
+            self.stdout.write(f"{history_model.__name__}: {len(duplicate_ids)}")
+        action = "to delete" if options["dry_run"] else "deleted"
+        self.stdout.write(self.style.SUCCESS(f"{total} history records {action}"))
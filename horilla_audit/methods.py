@@ -3,8 +3,13 @@ methods.py
 
 This module is used to write methods related to the history
 """
+import threading
+from contextlib import contextmanager
 from django.db import models
 from django.contrib.auth.models import User
+from simple_history.signals import post_create_historical_record
+
+_buffer = threading.local()
 
 
 class Bot:
@@ -18,31 +23,99 @@ class Bot:
         return "https://ui-avatars.com/api/?name=Horilla+Bot&background=random"
 
 
-def _check_and_delete(entry1, entry2, dry_run=False):
-    delta = entry1.diff_against(entry2)
-    if not delta.changed_fields:
-        if not dry_run:
-            entry1.delete()
-        return 1
-    return 0
+def tracked_values(history_model, obj):
+    """
+    Returns the values of the fields compared between the historical records
+    of the history model, the editable tracked fields
+    """
+    return [
+        getattr(obj, field.attname)
+        for field in history_model.tracked_fields
+        if field.editable
+    ]
+
+
+def buffered_record(instance):
+    """
+    Returns the latest buffered historical record of the instance, None when
+    the history is not buffered or has no record of the instance
+    """
+    records = getattr(_buffer, "records", None)
+    if records is None:
+        return None
+    for record in reversed(records):
+        if type(record["instance"]) is type(instance) and (
+            record["instance"].pk == instance.pk
+        ):
+            return record["history_instance"]
+    return None
+
+
+def buffer_record(record):
+    """
+    Buffers the keyword arguments of a historical record creation, returns
+    False when the history is not buffered
+    """
+    records = getattr(_buffer, "records", None)
+    if records is None:
+        return False
+    records.append(record)
+    return True
 
 
-def remove_duplicate_history(instance):
+@contextmanager
+def buffered_history():
     """
-    This method is used to remove duplicate entries
+    Buffers the historical records created in the block, they are inserted
+    with one bulk_create per history model when the block exits
     """
-    o_qs = instance.history_set.all()
-    entries_deleted = 0
-    # ordering is ('-history_date', '-history_id') so this is ok
-    f1 = o_qs.first()
-    if not f1:
+    if getattr(_buffer, "records", None) is not None:
+        # nested in a buffered block, the outer block inserts the records
+        yield
         return
-    for f2 in o_qs[1:]:
-        entries_deleted += _check_and_delete(
-            f1,
-            f2,
-        )
-        f1 = f2
+    _buffer.records = []
+    try:
+        yield
+    finally:
+        records = _buffer.records
+        _buffer.records = None
+        history_models = {}
+        for record in records:
+            history_instance = record["history_instance"]
+            history_models.setdefault(type(history_instance), []).append(
+                history_instance
+            )
+        for history_model, history_instances in history_models.items():
+            history_model._default_manager.bulk_create(history_instances)
+        for record in records:
+            post_create_historical_record.send(
+                sender=type(record["history_instance"]), **record
+            )
+
+
+def duplicate_history_ids(history_model, chunk_size=2000):
+    """
+    Returns the ids of the historical records of the history model changing
+    nothing since the previous record of their instance
+    """
+    pk_name = history_model.instance_type._meta.pk.attname
+    records = history_model._default_manager.order_by(
+        pk_name, "history_date", "history_id"
+    )
+    duplicate_ids = []
+    previous_pk = previous_values = None
+    for record in records.iterator(chunk_size=chunk_size):
+        values = tracked_values(history_model, record)
+        pk = getattr(record, pk_name)
+        if (
+            record.history_type == "~"
+            and pk == previous_pk
+            and values == previous_values
+        ):
+            duplicate_ids.append(record.history_id)
+            continue
+        previous_pk, previous_values = pk, values
+    return duplicate_ids
 
 
 def get_field_label(model_class, field_name):
@@ -58,7 +131,6 @@ def get_diff(instance):
     """
     This method is used to find the differences in the history
     """
-    remove_duplicate_history(instance)
     history = instance.history_set.all()
     history_list = list(history)
     pairs = [
@@ -68,6 +140,9 @@ def get_diff(instance):
     create_history = history.filter(history_type="+").first()
     for pair in pairs:
         delta = pair[0].diff_against(pair[1])
+        if not delta.changes:
+            # a record left by a save changing nothing
+            continue
         diffs = []
         class_name = pair[0].instance.__class__
         for change in delta.changes:
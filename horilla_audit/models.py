@@ -4,6 +4,7 @@ models.py
 from collections.abc import Iterable
 from django.db import models
 from django.dispatch import receiver
+from django.utils import timezone
 from simple_history.models import (
     HistoricalRecords,
     _default_get_user,
@@ -18,7 +19,7 @@ from simple_history.signals import (
 )
 
 # from employee.models import Employee
-from horilla_audit.methods import remove_duplicate_history
+from horilla_audit.methods import buffer_record, buffered_record, tracked_values
 
 
 # Create your models here.
@@ -65,13 +66,69 @@ class HorillaAuditInfo(models.Model):
 class HorillaAuditLog(HistoricalRecords):
     """
     Model to store additional information for historical records.
+
+    A change is recorded only when its values differ from the previous
+    historical record of the instance, and the records are buffered inside
+    horilla_audit.methods.buffered_history blocks.
     """
 
     # def __init__(self, *args, bases=None, **kwargs):
     #     super(HorillaAuditLog, self).__init__(*args, **kwargs)
     #     self.is_horilla_audit_log = True
 
-    pass
+    def previous_record(self, instance):
+        """
+        Returns the latest historical record of the instance, buffered or saved
+        """
+        previous = buffered_record(instance)
+        if previous is None:
+            previous = getattr(instance, self.manager_name).first()
+        return previous
+
+    def create_historical_record(self, instance, history_type, using=None):
+        manager = getattr(instance, self.manager_name)
+        history_model = manager.model
+        if history_type == "~" and not history_model._history_m2m_fields:
+            previous = self.previous_record(instance)
+            if previous is not None and tracked_values(
+                history_model, previous
+            ) == tracked_values(history_model, instance):
+                # nothing changed since the previous record
+                return
+        if not self.use_base_model_db:
+            using = None
+        history_date = getattr(instance, "_history_date", timezone.now())
+        history_user = self.get_history_user(instance)
+        history_change_reason = self.get_change_reason_for_object(
+            instance, history_type, using
+        )
+        attrs = {
+            field.attname: getattr(instance, field.attname)
+            for field in self.fields_included(instance)
+        }
+        if getattr(history_model, "history_relation", None) is not None:
+            attrs["history_relation"] = instance
+        history_instance = history_model(
+            history_date=history_date,
+            history_type=history_type,
+            history_user=history_user,
+            history_change_reason=history_change_reason,
+            **attrs,
+        )
+        record = {
+            "instance": instance,
+            "history_instance": history_instance,
+            "history_date": history_date,
+            "history_user": history_user,
+            "history_change_reason": history_change_reason,
+            "using": using,
+        }
+        pre_create_historical_record.send(sender=history_model, **record)
+        if buffer_record(record):
+            return
+        history_instance.save(using=using)
+        self.create_historical_record_m2ms(history_instance, instance)
+        post_create_historical_record.send(sender=history_model, **record)
 
     # history_comments = models.ManyToManyField("HistoryComment", blank=True)
 
@@ -106,15 +163,9 @@ def post_create_horilla_audit_log(sender, instance, *_args, **kwargs):
     """
     try:
         history_instance = kwargs["history_instance"]
-        history_instance.history_tags.set(
-            HistoricalRecords.thread.request.POST.getlist("history_tags")
-        )
-        if isinstance(history_instance, HorillaAuditLog):
-            history_instance.history_title = "Demo Title"
-            remove_duplicate_history(instance)
-            if instance.skip_history:
-                instance.history_set.filter(pk=history_instance.pk).delete()
-            kwargs["history_instance"] = None
+        history_tags = HistoricalRecords.thread.request.POST.getlist("history_tags")
+        if history_tags:
+            history_instance.history_tags.set(history_tags)
     except:
         pass
 
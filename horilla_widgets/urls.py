@@ -0,0 +1,11 @@
+"""
+urls.py
+
+This module is used to map the url patterns of the horilla widgets
+"""
+from django.urls import path
+from horilla_widgets import views
+
+urlpatterns = [
+    path("autocomplete/", views.autocomplete, name="horilla-autocomplete"),
+]
@@ -1,15 +1,66 @@
-from django.shortcuts import render
+"""
+views.py
 
-# Create your views here.
+This module is used to write the views of the horilla widgets
+"""
+from functools import reduce
+import operator
+from django.apps import apps
+from django.core import signing
+from django.db import models
+from django.db.models import Q
+from django.http import Http404, JsonResponse
+from horilla.decorators import login_required
+from horilla_widgets.widgets.select_widgets import AUTOCOMPLETE_SALT
 
-# urls.py
-# path("employee-widget-filter",views.widget_filter,name="employee-widget-filter")
+PAGE_SIZE = 20
 
-# views.py
-# @login_required
-# def widget_filter(request):
-#     """
-#     This method is used to return all the ids of the employees
-#     """
-#     ids = EmployeeFilter(request.GET).qs.values_list("id", flat=True)
-#     return JsonResponse({'ids':list(ids)})
\ No newline at end of file
+
+def search_filter(model, term):
+    """
+    Returns the condition of an object having every word of the term in one of
+    its text fields
+    """
+    fields = [
+        field.name
+        for field in model._meta.get_fields()
+        if isinstance(field, (models.CharField, models.EmailField))
+        and not field.choices
+    ]
+    conditions = [
+        reduce(operator.or_, [Q(**{f"{name}__icontains": word}) for name in fields])
+        for word in term.split()
+    ]
+    if not fields or not conditions:
+        return Q()
+    return reduce(operator.and_, conditions)
+
+
+@login_required
+def autocomplete(request):
+    """
+    Returns a page of the objects of the model matching the search term, in the
+    select2 format. The model is signed by the autocomplete widget.
+    """
+    try:
+        label = signing.loads(request.GET.get("model", ""), salt=AUTOCOMPLETE_SALT)
+        model = apps.get_model(label)
+    except (signing.BadSignature, LookupError, ValueError):
+        raise Http404
+    try:
+        page = max(int(request.GET.get("page", 1)), 1)
+    except ValueError:
+        page = 1
+    start = (page - 1) * PAGE_SIZE
+    objects = list(
+        model.objects.filter(search_filter(model, request.GET.get("term", "")))
+        .order_by("pk")[start : start + PAGE_SIZE + 1]
+    )
+    return JsonResponse(
+        {
+            "results": [
+                {"id": obj.pk, "text": str(obj)} for obj in objects[:PAGE_SIZE]
+            ],
+            "pagination": {"more": len(objects) > PAGE_SIZE},
+        }
+    )
@@ -4,6 +4,11 @@ select_widgets.py
 This module is used to write horilla form select widgets
 """
 from django import forms
+from django.core import signing
+from django.core.exceptions import ValidationError
+from django.urls import reverse
+
+AUTOCOMPLETE_SALT = "horilla_widgets.autocomplete"
 
 
 class HorillaMultiSelectWidget(forms.Widget):
@@ -48,3 +53,84 @@ class HorillaMultiSelectWidget(forms.Widget):
         self.attrs["id"] = ("id_" + name ) if self.attrs.get('id') is None else self.attrs.get("id")
         context[self.filter_instance_contex_name] = self.filter_class
         return context
+
+
+class AutocompleteMixin:
+    """
+    Select widget mixin rendering only the selected options, the other options
+    are fetched by select2 from the horilla-autocomplete endpoint while typing
+    """
+
+    def get_context(self, name, value, attrs):
+        context = super().get_context(name, value, attrs)
+        model = self.choices.queryset.model
+        url = reverse("horilla-autocomplete")
+        token = signing.dumps(model._meta.label, salt=AUTOCOMPLETE_SALT)
+        context["widget"]["attrs"].update(
+            {
+                "data-ajax--url": f"{url}?model={token}",
+                "data-ajax--delay": 250,
+                "data-allow-clear": "true",
+                "data-placeholder": "---------",
+            }
+        )
+        return context
+
+    def optgroups(self, name, value, attrs=None):
+        selected = [pk for pk in value if pk not in ("", None)]
+        field = self.choices.field
+        choices = []
+        if not self.allow_multiple_selected and field.empty_label is not None:
+            choices.append(("", field.empty_label))
+        if selected:
+            key = field.to_field_name or "pk"
+            try:
+                objects = list(
+                    self.choices.queryset.filter(**{f"{key}__in": selected})
+                )
+            except (ValueError, ValidationError):
+                objects = []
+            choices += [
+                (field.prepare_value(obj), field.label_from_instance(obj))
+                for obj in objects
+            ]
+        iterator = self.choices
+        self.choices = choices
+        try:
+            return super().optgroups(name, value, attrs)
+        finally:
+            self.choices = iterator
+
+
+class AutocompleteSelect(AutocompleteMixin, forms.Select):
+    """
+    AutocompleteSelect
+    """
+
+
+class AutocompleteSelectMultiple(AutocompleteMixin, forms.SelectMultiple):
+    """
+    AutocompleteSelectMultiple
+    """
+
+
+def autocomplete_fields(fields):
+    """
+    Binds the model choice fields rendered as selects to the objects of their
+    model, like base.methods.reload_queryset, and renders them with the
+    autocomplete widgets so only the selected objects are queried
+    """
+    for field in fields.values():
+        if not isinstance(field, forms.ModelChoiceField):
+            continue
+        field.queryset = field.queryset.model.objects.all()
+        widget = field.widget
+        if type(widget) is forms.Select:
+            autocomplete_widget = AutocompleteSelect(attrs=dict(widget.attrs))
+        elif type(widget) is forms.SelectMultiple:
+            autocomplete_widget = AutocompleteSelectMultiple(attrs=dict(widget.attrs))
+        else:
+            continue
+        autocomplete_widget.choices = field.choices
+        autocomplete_widget.is_required = widget.is_required
+        field.widget = autocomplete_widget
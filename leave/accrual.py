@@ -0,0 +1,135 @@
+"""
+accrual.py
+
+This module is used to reset the available leaves and to expire their carried
+forward days when their reset date or expired date is due.
+
+The due rows are selected through the reset_date and expired_date indexes of
+AvailableLeave. Every row of a leave type due on the same day gets the same new
+dates, so a leave type is reset with one UPDATE per due day, the carryforward
+arithmetic being done by the database.
+
+The days are processed in order, up to today, so the rows left due while the
+scheduler was not running are caught up on the next run, each from the day it
+was due.
+"""
+from datetime import date
+from django.db import transaction
+from django.db.models import F, FloatField, Min, Q, Value
+from django.db.models.functions import Least
+from leave.models import AvailableLeave, LeaveType
+
+
+def _due_leaves(today):
+    return AvailableLeave.objects.filter(leave_type_id__reset=True).filter(
+        Q(reset_date__lte=today) | Q(expired_date__lte=today)
+    )
+
+
+def _after(next_date, day):
+    # a date not after the day would keep the row due forever
+    return next_date if next_date > day else None
+
+
+def next_reset_date(leave_type, day):
+    """
+    Returns the next reset date of the leave type after a reset on the day
+    """
+    available_leave = AvailableLeave(leave_type_id=leave_type)
+    return _after(
+        available_leave.set_reset_date(
+            assigned_date=day, available_leave=available_leave
+        ),
+        day,
+    )
+
+
+def next_expired_date(leave_type, day):
+    """
+    Returns the next carryforward expired date of the leave type after an
+    expiry on the day
+    """
+    available_leave = AvailableLeave(leave_type_id=leave_type)
+    return _after(
+        available_leave.set_expired_date(
+            available_leave=available_leave, assigned_date=day
+        ),
+        day,
+    )
+
+
+def reset_leaves(leave_type, day):
+    """
+    Resets the available leaves of the leave type with their reset date on the
+    day: the days left are carried forward up to the carryforward max, the
+    available days are set back to the total days of the leave type. Returns
+    the number of available leaves reset.
+    """
+    available_leaves = AvailableLeave.objects.filter(
+        leave_type_id=leave_type, reset_date=day
+    )
+    if not available_leaves.exists():
+        return 0
+    carryforward_days = F("carryforward_days")
+    if leave_type.carryforward_type != "no carryforward":
+        carryforward_days = F("total_leave_days")
+        if leave_type.carryforward_max is not None:
+            carryforward_days = Least(
+                "total_leave_days",
+                Value(float(leave_type.carryforward_max), output_field=FloatField()),
+            )
+    available_days = leave_type.total_days or 0
+    # the right hand sides of an UPDATE read the values before the update
+    return available_leaves.update(
+        carryforward_days=carryforward_days,
+        available_days=available_days,
+        total_leave_days=carryforward_days + available_days,
+        reset_date=next_reset_date(leave_type, day),
+    )
+
+
+def expire_carryforward(leave_type, day):
+    """
+    Expires the carried forward days of the available leaves of the leave type
+    with their expired date on the day, returns the number of available leaves
+    expired
+    """
+    available_leaves = AvailableLeave.objects.filter(
+        leave_type_id=leave_type, expired_date=day
+    )
+    if not available_leaves.exists():
+        return 0
+    available_days = leave_type.total_days or 0
+    return available_leaves.update(
+        carryforward_days=0,
+        available_days=available_days,
+        total_leave_days=available_days,
+        expired_date=next_expired_date(leave_type, day),
+    )
+
+
+def process_due(today=None):
+    """
+    Resets and expires every available leave due on or before today, day after
+    day. Returns the number of available leaves reset and expired.
+    """
+    today = today or date.today()
+    reset = expired = 0
+    while True:
+        due = _due_leaves(today).aggregate(
+            reset=Min("reset_date", filter=Q(reset_date__lte=today)),
+            expired=Min("expired_date", filter=Q(expired_date__lte=today)),
+        )
+        days = [day for day in due.values() if day is not None]
+        if not days:
+            return {"reset": reset, "expired": expired}
+        day = min(days)
+        leave_types = LeaveType.objects.filter(
+            pk__in=_due_leaves(today)
+            .filter(Q(reset_date=day) | Q(expired_date=day))
+            .values("leave_type_id")
+        )
+        with transaction.atomic():
+            for leave_type in leave_types:
+                reset += reset_leaves(leave_type, day)
+                expired += expire_carryforward(leave_type, day)
@@ -0,0 +1,101 @@
+"""
+analytics.py
+
+This module is used to answer the leave dashboard questions, who is on leave on
+a date or in a date range, grouped by department, leave type or employee.
+
+An approved leave request covers every day from its start date to its end date,
+so the questions are answered with range overlap conditions aggregated in the
+database, served by the (status, start_date, end_date) index of LeaveRequest,
+instead of expanding every request into its dates.
+"""
+from django.db.models import Count, F, Q, Sum
+from leave.models import LeaveRequest
+
+
+def approved_leaves():
+    """
+    Returns the approved leave requests
+    """
+    return LeaveRequest.objects.filter(status="approved")
+
+
+def covering(start, end):
+    """
+    Returns the condition of a leave request covering a day of the range, a
+    request without end date covers its start date
+    """
+    return Q(start_date__lte=end) & (
+        Q(end_date__gte=start) | Q(end_date__isnull=True, start_date__gte=start)
+    )
+
+
+def overlapping(start, end=None):
+    """
+    Returns the approved leave requests covering a day of the range, or the day
+    when no end is given
+    """
+    return approved_leaves().filter(covering(start, end or start))
+
+
+def on_leave_by_department(day):
+    """
+    Returns the number of approved leave requests on the day by department id
+    """
+    rows = (
+        overlapping(day)
+        .order_by()
+        .values(department=F("employee_id__employee_work_info__department_id"))
+        .annotate(count=Count("id"))
+    )
+    return {row["department"]: row["count"] for row in rows}
+
+
+def leave_days_by_type():
+    """
+    Returns the requested days of the approved leave requests by leave type id
+    """
+    rows = (
+        approved_leaves()
+        .order_by()
+        .values("leave_type_id")
+        .annotate(days=Sum("requested_days"))
+    )
+    return {row["leave_type_id"]: row["days"] or 0 for row in rows}
+
+
+def daily_leave_counts(days):
+    """
+    Returns the number of approved leave requests on each of the days, counted
+    in one query
+    """
+    if not days:
+        return []
+    counts = overlapping(min(days), max(days)).aggregate(
+        **{
+            f"day_{index}": Count("id", filter=covering(day, day))
+            for index, day in enumerate(days)
+        }
+    )
+    return [counts[f"day_{index}"] for index in range(len(days))]
+
+
+def employee_leave_days(year, month):
+    """
+    Returns the requested days of the approved leave requests starting in the
+    month, by employee and leave type
+    """
+    return (
+        approved_leaves()
+        .filter(start_date__year=year, start_date__month=month)
+        .order_by(
+            "employee_id__employee_first_name", "employee_id__employee_last_name"
+        )
+        .values(
+            "employee_id",
+            "employee_id__employee_first_name",
+            "employee_id__employee_last_name",
+            "leave_type_id",
+        )
+        .annotate(days=Sum("requested_days"))
+    )
@@ -0,0 +1,126 @@
+"""
+assignment.py
+
+This module is used to assign leave types to employees in bulk.
+
+The existing (employee, leave type) pairs are loaded with one query, the reset
+and expired dates are computed once per leave type, the missing available
+leaves are created with bulk_create and the assigned employees are notified
+with one notification insert per leave type.
+"""
+import contextlib
+from django.db import transaction
+from django.utils import timezone
+from notifications.signals import notify
+from leave.models import AvailableLeave
+
+BATCH_SIZE = 500
+
+
+def assigned_pairs(employee_ids, leave_type_ids):
+    """
+    Returns the (employee id, leave type id) pairs already assigned, of every
+    company since an employee has one available leave per leave type
+    """
+    return set(
+        AvailableLeave._base_manager.filter(
+            employee_id__in=employee_ids, leave_type_id__in=leave_type_ids
+        ).values_list("employee_id", "leave_type_id")
+    )
+
+
+def available_leave_template(leave_type, assigned_date):
+    """
+    Returns an unsaved available leave of the leave type with the fields
+    computed on save, shared by every employee assigned on the date
+    """
+    template = AvailableLeave(
+        leave_type_id=leave_type,
+        available_days=leave_type.total_days,
+        assigned_date=assigned_date,
+    )
+    template.compute_fields()
+    return template
+
+
+def notify_assigned(actor, employees):
+    """
+    Notifies the employees of their new leave type with one notification insert
+    """
+    recipients = [
+        employee.employee_user_id
+        for employee in employees
+        if employee.employee_user_id is not None
+    ]
+    if actor is None or not recipients:
+        return
+    with contextlib.suppress(Exception):
+        notify.send(
+            actor,
+            recipient=recipients,
+            verb="New leave type is assigned to you",
+            verb_ar="تم تعيين نوع إجازة جديد لك",
+            verb_de="Ihnen wurde ein neuer Urlaubstyp zugewiesen",
+            verb_es="Se le ha asignado un nuevo tipo de permiso",
+            verb_fr="Un nouveau type de congé vous a été attribué",
+            icon="people-circle",
+            redirect="/leave/user-leave",
+        )
+
+
+def assign_leave_types(pairs, actor=None):
+    """
+    Assigns leave types to employees.
+
+    Parameters:
+        pairs (iterable): (Employee, LeaveType) pairs to assign.
+        actor (Employee): The employee notifying the assigned employees, the
+            employees are not notified when it is None.
+
+    Returns:
+        tuple: The created available leaves and the pairs already assigned.
+    """
+    pairs = list(dict.fromkeys(pairs))
+    existing = assigned_pairs(
+        {employee.pk for employee, _leave_type in pairs},
+        {leave_type.pk for _employee, leave_type in pairs},
+    )
+    assigned_date = timezone.now().date()
+    templates = {}
+    available_leaves = []
+    skipped = []
+    for employee, leave_type in pairs:
+        if (employee.pk, leave_type.pk) in existing:
+            skipped.append((employee, leave_type))
+            continue
+        if leave_type.pk not in templates:
+            templates[leave_type.pk] = available_leave_template(
+                leave_type, assigned_date
+            )
+        template = templates[leave_type.pk]
+        available_leaves.append(
+            AvailableLeave(
+                employee_id=employee,
+                leave_type_id=leave_type,
+                available_days=template.available_days,
+                carryforward_days=template.carryforward_days,
+                total_leave_days=template.total_leave_days,
+                assigned_date=assigned_date,
+                reset_date=template.reset_date,
+                expired_date=template.expired_date,
+            )
+        )
+    with transaction.atomic():
+        AvailableLeave.objects.bulk_create(available_leaves, batch_size=BATCH_SIZE)
+
+    if actor is None:
+        # e.g. an admin user without employee, nobody to notify from
+        return available_leaves, skipped
+    employees_by_type = {}
+    for available_leave in available_leaves:
+        employees_by_type.setdefault(available_leave.leave_type_id_id, []).append(
+            available_leave.employee_id
+        )
+    for employees in employees_by_type.values():
+        notify_assigned(actor, employees)
+    return available_leaves, skipped
@@ -23,9 +23,8 @@ from .models import (
 from .methods import (
     calculate_requested_days,
     leave_requested_dates,
-    holiday_dates_list,
-    company_leave_dates_list,
 )
+from . import working_calendar
 
 
 CHOICES = [("yes", _("Yes")), ("no", _("No"))]
@@ -192,10 +191,8 @@ class UpdateLeaveTypeForm(ConditionForm):
 
 def cal_effective_requested_days(start_date,end_date,leave_type_id,requested_days):
     requested_dates = leave_requested_dates(start_date, end_date)
-    holidays = Holiday.objects.all()
-    holiday_dates = holiday_dates_list(holidays)
-    company_leaves = CompanyLeave.objects.all()
-    company_leave_dates = company_leave_dates_list(company_leaves, start_date)
+    holiday_dates = working_calendar.holiday_dates(start_date, end_date)
+    company_leave_dates = working_calendar.company_leave_dates(start_date, end_date)
     if (
         leave_type_id.exclude_company_leave == "yes"
         and leave_type_id.exclude_holiday == "yes"
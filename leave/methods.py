@@ -1,5 +1,4 @@
-import calendar
-from datetime import datetime, timedelta
+from datetime import timedelta
 
 
 def calculate_requested_days(
@@ -47,58 +46,3 @@ def leave_requested_dates(start_date, end_date):
         requested_dates.append(date)
     return requested_dates
 
-
-def holiday_dates_list(holidays):
-    """
-    :return: this functions returns a list of all holiday dates.
-    """
-    holiday_dates = []
-    for holiday in holidays:
-        holiday_start_date = holiday.start_date
-        holiday_end_date = holiday.end_date
-        if holiday_end_date is None:
-            holiday_end_date = holiday_start_date
-        holiday_days = holiday_end_date - holiday_start_date
-        for i in range(holiday_days.days + 1):
-            date = holiday_start_date + timedelta(i)
-            holiday_dates.append(date)
-    return holiday_dates
-
-
-def company_leave_dates_list(company_leaves, start_date):
-    """
-    :return: This function returns a list of all company leave dates"""
-    company_leave_dates = []
-    for company_leave in company_leaves:
-        year = start_date.year
-        based_on_week = company_leave.based_on_week
-        based_on_week_day = company_leave.based_on_week_day
-        for month in range(1, 13):
-            if based_on_week != None:
-                # Set Sunday as the first day of the week
-                calendar.setfirstweekday(6)
-                month_calendar = calendar.monthcalendar(year, month)
-                weeks = month_calendar[int(based_on_week)]
-                weekdays_in_weeks = [day for day in weeks if day != 0]
-                for day in weekdays_in_weeks:
-                    date = datetime.strptime(
-                        f"{year}-{month:02}-{day:02}", "%Y-%m-%d"
-                    ).date()
-                    if (
-                        date.weekday() == int(based_on_week_day)
-                        and date not in company_leave_dates
-                    ):
-                        company_leave_dates.append(date)
-            else:
-                # Set Monday as the first day of the week
-                calendar.setfirstweekday(0)
-                month_calendar = calendar.monthcalendar(year, month)
-                for week in month_calendar:
-                    if week[int(based_on_week_day)] != 0:
-                        date = datetime.strptime(
-                            f"{year}-{month:02}-{week[int(based_on_week_day)]:02}",
-                            "%Y-%m-%d",
-                        ).date()
-                        if date not in company_leave_dates:
-                            company_leave_dates.append(date)
-    return company_leave_dates
@@ -1,7 +1,8 @@
-import calendar
 from collections.abc import Iterable
-from datetime import datetime, timedelta
+from datetime import timedelta
 from django.db import models
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
 from django.utils import timezone
 from django.core.exceptions import ValidationError
 from dateutil.relativedelta import relativedelta
@@ -10,6 +11,7 @@ from base.models import Company
 from base.horilla_company_manager import HorillaCompanyManager
 from employee.models import Employee
 from .methods import calculate_requested_days
+from . import working_calendar
 from django.core.files.storage import default_storage
 from django.conf import settings
 
@@ -252,6 +254,10 @@ class AvailableLeave(models.Model):
     )
     class Meta:
         unique_together = ("leave_type_id", "employee_id")
+        indexes = [
+            models.Index(fields=["reset_date"]),
+            models.Index(fields=["expired_date"]),
+        ]
 
     def __str__(self):
         return f"{self.employee_id} | {self.leave_type_id}"
@@ -344,8 +350,11 @@ class AvailableLeave(models.Model):
         available_leave.available_days = available_leave.leave_type_id.total_days
         return expired_date
 
-    def save(self, *args, **kwargs):
-        # if self.assigned_date == datetime.now().date() or self.assigned_date.date() == datetime.now().date():
+    def compute_fields(self):
+        """
+        Sets the reset date, the carryforward expired date and the total leave
+        days of the available leave, done on save and before a bulk_create
+        """
         if self.reset_date is None:
             # Check whether the reset is enabled
             if self.leave_type_id.reset:
@@ -361,6 +370,9 @@ class AvailableLeave(models.Model):
                 self.expired_date = expired_date
 
         self.total_leave_days = self.available_days + self.carryforward_days
+
+    def save(self, *args, **kwargs):
+        self.compute_fields()
         super().save(*args, **kwargs)
 
 
@@ -419,6 +431,19 @@ class LeaveRequest(models.Model):
     objects = HorillaCompanyManager(
         related_company_field="employee_id__employee_work_info__company_id"
     )
+
+    class Meta:
+        """
+        Meta class to add additional options
+        """
+
+        # range overlap lookups of the leave dashboards
+        indexes = [
+            models.Index(fields=["status", "start_date", "end_date"]),
+            # the leave requests of an employee sorted by date
+            models.Index(fields=["employee_id", "start_date"]),
+        ]
+
     def __str__(self):
         return f"{self.employee_id} | {self.leave_type_id} | {self.status}"
 
@@ -439,59 +464,20 @@ class LeaveRequest(models.Model):
 
     def holiday_dates(self):
         """
-        :return: this functions returns a list of all holiday dates.
+        :return: this functions returns a list of the holiday dates between the
+        requested dates.
         """
-        holiday_dates = []
-        holidays = Holiday.objects.all()
-        for holiday in holidays:
-            holiday_start_date = holiday.start_date
-            holiday_end_date = holiday.end_date
-            if holiday_end_date is None:
-                holiday_end_date = holiday_start_date
-            holiday_days = holiday_end_date - holiday_start_date
-            for i in range(holiday_days.days + 1):
-                date = holiday_start_date + timedelta(i)
-                holiday_dates.append(date)
-        return holiday_dates
+        return working_calendar.holiday_dates(
+            self.start_date, self.end_date or self.start_date
+        )
 
     def company_leave_dates(self):
         """
-        :return: This function returns a list of all company leave dates"""
-        company_leaves = CompanyLeave.objects.all()
-        company_leave_dates = []
-        for company_leave in company_leaves:
-            year = self.start_date.year
-            based_on_week = company_leave.based_on_week
-            based_on_week_day = company_leave.based_on_week_day
-            for month in range(1, 13):
-                if based_on_week != None:
-                    # Set Sunday as the first day of the week
-                    calendar.setfirstweekday(6)
-                    month_calendar = calendar.monthcalendar(year, month)
-                    weeks = month_calendar[int(based_on_week)]
-                    weekdays_in_weeks = [day for day in weeks if day != 0]
-                    for day in weekdays_in_weeks:
-                        date = datetime.strptime(
-                            f"{year}-{month:02}-{day:02}", "%Y-%m-%d"
-                        ).date()
-                        if (
-                            date.weekday() == int(based_on_week_day)
-                            and date not in company_leave_dates
-                        ):
-                            company_leave_dates.append(date)
-                else:
-                    # Set Monday as the first day of the week
-                    calendar.setfirstweekday(0)
-                    month_calendar = calendar.monthcalendar(year, month)
-                    for week in month_calendar:
-                        if week[int(based_on_week_day)] != 0:
-                            date = datetime.strptime(
-                                f"{year}-{month:02}-{week[int(based_on_week_day)]:02}",
-                                "%Y-%m-%d",
-                            ).date()
-                            if date not in company_leave_dates:
-                                company_leave_dates.append(date)
-        return company_leave_dates
+        :return: This function returns a list of the company leave dates between the
+        requested dates."""
+        return working_calendar.company_leave_dates(
+            self.start_date, self.end_date or self.start_date
+        )
 
     def save(self, *args, **kwargs):
         self.requested_days = calculate_requested_days(
@@ -510,32 +496,23 @@ class LeaveRequest(models.Model):
         super().save(*args, **kwargs)
 
     def exclude_all_leaves(self):
-        requested_dates = self.requested_dates()
-        holiday_dates = self.holiday_dates()
-        company_leave_dates = self.company_leave_dates()
-        total_leaves = list(set(holiday_dates + company_leave_dates))
-        total_leave_count = sum(
-            requested_date in total_leaves for requested_date in requested_dates
+        self.requested_days = self.requested_days - working_calendar.off_day_count(
+            self.start_date,
+            self.end_date or self.start_date,
+            holidays=True,
+            company_leaves=True,
         )
-        self.requested_days = self.requested_days - total_leave_count
 
     def exclude_leaves(self):
-        holiday_count = 0
+        end_date = self.end_date or self.start_date
         if self.leave_type_id.exclude_holiday == "yes":
-            requested_dates = self.requested_dates()
-            holiday_dates = self.holiday_dates()
-            for requested_date in requested_dates:
-                if requested_date in holiday_dates:
-                    holiday_count += 1
-            self.requested_days = self.requested_days - holiday_count
+            self.requested_days = self.requested_days - working_calendar.off_day_count(
+                self.start_date, end_date, holidays=True
+            )
         if self.leave_type_id.exclude_company_leave == "yes":
-            requested_dates = self.requested_dates()
-            company_leave_dates = self.company_leave_dates()
-            company_leave_count = sum(
-                requested_date in company_leave_dates
-                for requested_date in requested_dates
+            self.requested_days = self.requested_days - working_calendar.off_day_count(
+                self.start_date, end_date, company_leaves=True
             )
-            self.requested_days = self.requested_days - company_leave_count
 
     def no_approval(self):
         employee_id = self.employee_id
@@ -593,3 +570,14 @@ class LeaveAllocationRequest(models.Model):
 
     def save(self, *args, **kwargs):
         super().save(*args, **kwargs)
+
+
+@receiver(post_save, sender=Holiday)
+@receiver(post_delete, sender=Holiday)
+@receiver(post_save, sender=CompanyLeave)
+@receiver(post_delete, sender=CompanyLeave)
+def clear_working_calendar(sender, instance, **_kwargs):
+    """
+    Drops the memoised working calendars when a holiday or company leave changes
+    """
+    working_calendar.clear()
@@ -1,63 +1,47 @@
+"""
+scheduler.py
+
+This module is used to register the scheduled jobs of the leave app
+"""
 import datetime as dt
-from apscheduler.schedulers.background import BackgroundScheduler
 from datetime import datetime, timedelta
-from dateutil.relativedelta import relativedelta
-import calendar
-
-today = datetime.now()
+from horilla.scheduler import scheduled_job
 
 
+@scheduled_job("cron", hour=0, minute=0, misfire_grace_time=60 * 60)
 def leave_reset():
-    from leave.models import LeaveType
+    """
+    This method resets the available leaves and expires their carried forward
+    days due up to today, see leave.accrual
+    """
+    from leave.accrual import process_due
 
-    today_date = today.date()
-    leave_types = LeaveType.objects.filter(reset=True)
-    # Looping through filtered leave types with reset is true
-    for leave_type in leave_types:
-        # #Looping through all available leaves
-        available_leaves = leave_type.employee_available_leave.all()
-
-        for available_leave in available_leaves:
-            reset_date = available_leave.reset_date
-            expired_date = available_leave.expired_date
-            if reset_date == today_date:
-                available_leave.update_carryforward(available_leave=available_leave)
-                # new_reset_date = available_leave.set_reset_date(assigned_date=today_date,available_leave = available_leave)
-                new_reset_date = available_leave.set_reset_date(
-                    assigned_date=today_date, available_leave=available_leave
-                )
-                available_leave.reset_date = new_reset_date
-                available_leave.save()
-            if expired_date == today_date:
-                new_expired_date = available_leave.set_expired_date(
-                    available_leave=available_leave, assigned_date=today_date
-                )
-                available_leave.expired_date = new_expired_date
-                available_leave.save()
+    process_due()
 
 
+@scheduled_job("interval", seconds=10)
 def recurring_holiday():
     from leave.models import Holiday
+
+    yesterday = (datetime.now() - timedelta(days=1)).date()
     recurring_holidays = Holiday.objects.filter(recurring=True)
     # Looping through all recurring holiday
     for recurring_holiday in recurring_holidays:
         start_date = recurring_holiday.start_date
         end_date = recurring_holiday.end_date
         new_start_date = dt.date(start_date.year + 1, start_date.month, start_date.day)
-        new_end_date = dt.date(end_date.year + 1, end_date.month, end_date.day)
         # Checking that end date is not none
         if end_date is None:
             # checking if that start date is day before today
-            if start_date == (today - timedelta(days=1)).date():
-                recurring_holiday.start_date = new_start_date
-        elif end_date == (today - timedelta(days=1)).date():
+            if start_date != yesterday:
+                continue
             recurring_holiday.start_date = new_start_date
-            recurring_holiday.end_date = new_end_date
+        elif end_date == yesterday:
+            recurring_holiday.start_date = new_start_date
+            recurring_holiday.end_date = dt.date(
+                end_date.year + 1, end_date.month, end_date.day
+            )
+        else:
+            continue
+        # saved only when moved, saving a holiday resets the working calendar
         recurring_holiday.save()
-
-
-scheduler = BackgroundScheduler()
-scheduler.add_job(leave_reset, "interval", seconds=10)
-scheduler.add_job(recurring_holiday, "interval", seconds=10)
-
-scheduler.start()
@@ -8,10 +8,11 @@ from datetime import datetime, timedelta, date
 from collections import defaultdict
 from urllib.parse import parse_qs
 from django.db.models import Q
+from django.db.models.functions import Lower
 from django.shortcuts import render, redirect
 from django.db.models import ProtectedError
 from django.utils.translation import gettext as __
-from django.core.paginator import Paginator
+from base.pagination import page_ids, paginate
 from django.contrib import messages
 from django.http import JsonResponse, HttpResponse
 from django.views.decorators.http import require_http_methods
@@ -33,11 +34,11 @@ from leave.forms import *
 from leave.decorators import *
 from leave.filters import *
 from employee.models import Employee
+from leave import analytics, working_calendar
+from leave.assignment import assign_leave_types, assigned_pairs
 from .methods import (
     calculate_requested_days,
     leave_requested_dates,
-    holiday_dates_list,
-    company_leave_dates_list,
 )
 
 
@@ -94,9 +95,7 @@ def paginator_qry(qryset, page_number):
     """
     function used to paginate query set
     """
-    paginator = Paginator(qryset, 25)
-    qryset = paginator.get_page(page_number)
-    return qryset
+    return paginate(qryset, page_number, per_page=25)
 
 
 @login_required
@@ -350,7 +349,7 @@ def leave_request_view(request):
     excel_column = LeaveRequestExportForm()
     export_filter = LeaveRequestFilter()
     requests = queryset.filter(status="requested").count()
-    requests_ids = json.dumps(list(page_obj.object_list.values_list("id", flat=True)))
+    requests_ids = page_ids(page_obj)
     approved_requests = queryset.filter(status="approved").count()
     rejected_requests = queryset.filter(status="cancelled").count()
     previous_data = request.GET.urlencode()
@@ -414,7 +413,7 @@ def leave_request_filter(request):
         template = "leave/leave_request/group_by.html"
 
     page_obj = paginator_qry(leave_request_filter, page_number)
-    requests_ids = json.dumps(list(page_obj.object_list.values_list("id", flat=True)))
+    requests_ids = page_ids(page_obj)
     data_dict = []
 
     if not request.GET.get("dashboard"):
@@ -745,33 +744,19 @@ def leave_assign_one(request, id):
     if request.method == "POST":
         leave_type = LeaveType.objects.get(id=id)
         employee_ids = request.POST.getlist("employee_id")
-        for employee_id in employee_ids:
-            employee = Employee.objects.get(id=employee_id)
-            if not AvailableLeave.objects.filter(
-                leave_type_id=leave_type, employee_id=employee
-            ).exists():
-                AvailableLeave(
-                    leave_type_id=leave_type,
-                    employee_id=employee,
-                    available_days=leave_type.total_days,
-                ).save()
-                messages.success(request, _("Leave type assign is successfull.."))
-                with contextlib.suppress(Exception):
-                    notify.send(
-                        request.user.employee_get,
-                        recipient=employee.employee_user_id,
-                        verb="New leave type is assigned to you",
-                        verb_ar="تم تعيين نوع إجازة جديد لك",
-                        verb_de="Ihnen wurde ein neuer Urlaubstyp zugewiesen",
-                        verb_es="Se le ha asignado un nuevo tipo de permiso",
-                        verb_fr="Un nouveau type de congé vous a été attribué",
-                        icon="people-circle",
-                        redirect="/leave/user-leave",
-                    )
-            else:
-                messages.info(
-                    request, _("leave type is already assigned to the employee..")
-                )
+        employees = Employee.objects.filter(id__in=employee_ids).select_related(
+            "employee_user_id"
+        )
+        created, skipped = assign_leave_types(
+            [(employee, leave_type) for employee in employees],
+            actor=getattr(request.user, "employee_get", None),
+        )
+        if created:
+            messages.success(request, _("Leave type assign is successfull.."))
+        if skipped:
+            messages.info(
+                request, _("leave type is already assigned to the employee..")
+            )
         response = render(
             request,
             "leave/leave_assign/leave_assign_one_form.html",
@@ -883,37 +868,27 @@ def leave_assign(request):
     form = choosesubordinates(request, form, "leave.add_availableleave")
 
     if request.method == "POST":
-        leave_type_ids = request.POST.getlist("leave_type_id")
-        employee_ids = request.POST.getlist("employee_id")
-        for employee_id in employee_ids:
-            if employee_id != "":
-                for leave_type_id in leave_type_ids:
-                    if leave_type_id != "":
-                        employee = Employee.objects.get(id=employee_id)
-                        leave_type = LeaveType.objects.get(id=leave_type_id)
-                        if not AvailableLeave.objects.filter(
-                            leave_type_id=leave_type, employee_id=employee
-                        ).exists():
-                            AvailableLeave(
-                                leave_type_id=leave_type,
-                                employee_id=employee,
-                                available_days=leave_type.total_days,
-                            ).save()
-                            messages.success(
-                                request, _("Leave type assign is successful..")
-                            )
-                            with contextlib.suppress(Exception):
-                                notify.send(
-                                    request.user.employee_get,
-                                    recipient=employee.employee_user_id,
-                                    verb="New leave type is assigned to you",
-                                    # ... (remaining notify.send parameters)
-                                )
-                        else:
-                            messages.info(
-                                request,
-                                _("Leave type is already assigned to the employee.."),
-                            )
+        leave_type_ids = [pk for pk in request.POST.getlist("leave_type_id") if pk]
+        employee_ids = [pk for pk in request.POST.getlist("employee_id") if pk]
+        employees = Employee.objects.filter(id__in=employee_ids).select_related(
+            "employee_user_id"
+        )
+        leave_types = LeaveType.objects.filter(id__in=leave_type_ids)
+        created, skipped = assign_leave_types(
+            [
+                (employee, leave_type)
+                for employee in employees
+                for leave_type in leave_types
+            ],
+            actor=getattr(request.user, "employee_get", None),
+        )
+        if created:
+            messages.success(request, _("Leave type assign is successful.."))
+        if skipped:
+            messages.info(
+                request,
+                _("Leave type is already assigned to the employee.."),
+            )
 
         response = render(
             request,
@@ -1066,40 +1041,61 @@ def assign_leave_type_import(request):
         file = request.FILES["assign_leave_type_import"]
         data_frame = pd.read_excel(file)
         assign_leave_dicts = data_frame.to_dict("records")
+        badge_ids = {
+            str(assign_leave["Employee Badge ID"]).lower()
+            for assign_leave in assign_leave_dicts
+        }
+        leave_type_names = {
+            str(assign_leave["Leave Type"]).lower()
+            for assign_leave in assign_leave_dicts
+        }
+        employees = {}
+        for employee in (
+            Employee.objects.annotate(lower_badge_id=Lower("badge_id"))
+            .filter(lower_badge_id__in=badge_ids)
+            .order_by("pk")
+        ):
+            employees.setdefault(employee.lower_badge_id, employee)
+        leave_types = {}
+        for leave_type in (
+            LeaveType.objects.annotate(lower_name=Lower("name"))
+            .filter(lower_name__in=leave_type_names)
+            .order_by("pk")
+        ):
+            leave_types.setdefault(leave_type.lower_name, leave_type)
+        existing = assigned_pairs(
+            {employee.pk for employee in employees.values()},
+            {leave_type.pk for leave_type in leave_types.values()},
+        )
+        pairs = []
+        assigned_rows = []
         for assign_leave in assign_leave_dicts:
-            try:
-                save = True
-                assign_leave_type = assign_leave["Leave Type"]
-                badge_id = assign_leave["Employee Badge ID"]
-                employee = Employee.objects.filter(badge_id__iexact=badge_id).first()
-                leave_type = LeaveType.objects.filter(
-                    name__iexact=assign_leave_type
-                ).first()
-                if employee is None:
-                    save = False
-                    assign_leave["Error1"] = _("This badge id does not exist.")
-
-                if leave_type is None:
-                    save = False
-                    assign_leave["Error2"] = _("This leave type does not exist.")
-                if AvailableLeave.objects.filter(
-                    leave_type_id=leave_type, employee_id=employee
-                ).exists():
-                    save = False
-                    assign_leave["Error3"] = _(
-                        "Leave type has already been assigned to the employee."
-                    )
-                if save:
-                    AvailableLeave(
-                        leave_type_id=leave_type,
-                        employee_id=employee,
-                        available_days=leave_type.total_days,
-                    ).save()
-                else:
-                    error_list.append(assign_leave)
-            except Exception as exception:
-                assign_leave["Error4"] = f"{str(exception)}"
+            save = True
+            employee = employees.get(str(assign_leave["Employee Badge ID"]).lower())
+            leave_type = leave_types.get(str(assign_leave["Leave Type"]).lower())
+            if employee is None:
+                save = False
+                assign_leave["Error1"] = _("This badge id does not exist.")
+            if leave_type is None:
+                save = False
+                assign_leave["Error2"] = _("This leave type does not exist.")
+            if save and (employee.pk, leave_type.pk) in existing:
+                save = False
+                assign_leave["Error3"] = _(
+                    "Leave type has already been assigned to the employee."
+                )
+            if save:
+                existing.add((employee.pk, leave_type.pk))
+                pairs.append((employee, leave_type))
+                assigned_rows.append(assign_leave)
+            else:
                 error_list.append(assign_leave)
+        try:
+            assign_leave_types(pairs)
+        except Exception as exception:
+            for assign_leave in assigned_rows:
+                assign_leave["Error4"] = f"{str(exception)}"
+            error_list += assigned_rows
         if error_list:
             response = generate_error_report(error_list, error_data, file_name)
             return response
@@ -1574,10 +1570,12 @@ def user_leave_request(request, id):
         )
         requested_dates = leave_requested_dates(start_date, end_date)
         requested_dates = [date.date() for date in requested_dates]
-        holidays = Holiday.objects.all()
-        holiday_dates = holiday_dates_list(holidays)
-        company_leaves = CompanyLeave.objects.all()
-        company_leave_dates = company_leave_dates_list(company_leaves, start_date)
+        holiday_dates = working_calendar.holiday_dates(
+            start_date.date(), end_date.date()
+        )
+        company_leave_dates = working_calendar.company_leave_dates(
+            start_date.date(), end_date.date()
+        )
         if leave_type.require_attachment == "yes":
             if attachment is None:
                 form.add_error(
@@ -1724,11 +1722,11 @@ def user_request_update(request, id):
                         start_date, end_date, start_date_breakdown, end_date_breakdown
                     )
                     requested_dates = leave_requested_dates(start_date, end_date)
-                    holidays = Holiday.objects.all()
-                    holiday_dates = holiday_dates_list(holidays)
-                    company_leaves = CompanyLeave.objects.all()
-                    company_leave_dates = company_leave_dates_list(
-                        company_leaves, start_date
+                    holiday_dates = working_calendar.holiday_dates(
+                        start_date, end_date
+                    )
+                    company_leave_dates = working_calendar.company_leave_dates(
+                        start_date, end_date
                     )
                     if (
                         leave_type.exclude_company_leave == "yes"
@@ -1890,9 +1888,7 @@ def user_request_view(request):
         page_number = request.GET.get("page")
         user_request_filter = LeaveRequestFilter(request.GET,queryset=queryset)
         page_obj = paginator_qry(user_request_filter.qs, page_number)        
-        request_ids = json.dumps(
-            list(page_obj.object_list.values_list("id", flat=True))
-        )
+        request_ids = page_ids(page_obj)
         current_date = date.today()
         return render(
             request,
@@ -1938,9 +1934,7 @@ def user_request_filter(request):
             template = "leave/user_leave/group_by.html"
 
         page_obj = paginator_qry(user_request_filter, page_number)
-        request_ids = json.dumps(
-            list(page_obj.object_list.values_list("id", flat=True))
-        )
+        request_ids = page_ids(page_obj)
         data_dict = parse_qs(previous_data)
         get_key_instances(LeaveRequest, data_dict)
         if "status" in data_dict:
@@ -2195,50 +2189,35 @@ def employee_leave_chart(request):
     Returns:
     GET : return Json response of labels, dataset, message.
     """
-    leave_requests = LeaveRequest.objects.filter(status="approved")
     leave_types = LeaveType.objects.all()
     day = date.today()
     if request.GET.get("date"):
         day = request.GET.get("date")
         day = datetime.strptime(day, "%Y-%m")
 
-    labels = []
-    dataset = []
-    for employee in leave_requests.filter(
-        start_date__month=day.month, start_date__year=day.year
-    ):
-        labels.append(employee.employee_id)
-
-    for leave_type in leave_types:
-        dataset.append(
-            {
-                "label": leave_type.name,
-                "data": [],
-            }
-        )
-
-    labels = list(set(labels))
+    employees = {}
     total_leave_with_type = defaultdict(lambda: defaultdict(float))
-
-    for label in labels:
-        leaves = leave_requests.filter(
-            employee_id=label, start_date__month=day.month, start_date__year=day.year
+    for row in analytics.employee_leave_days(day.year, day.month):
+        employees[row["employee_id"]] = (
+            f"{row['employee_id__employee_first_name']} "
+            f"{row['employee_id__employee_last_name']}"
         )
-        for leave in leaves:
-            total_leave_with_type[leave.leave_type_id.name][label] += round(
-                leave.requested_days, 2
-            )
-
-    for data in dataset:
-        dataset_label = data["label"]
-        data["data"] = [total_leave_with_type[dataset_label][label] for label in labels]
-
-    employee_label = []
-    for employee in list(set(labels)):
-        employee_label.append(
-            f"{employee.employee_first_name} {employee.employee_last_name}"
+        total_leave_with_type[row["leave_type_id"]][row["employee_id"]] += round(
+            row["days"] or 0, 2
         )
 
+    dataset = [
+        {
+            "label": leave_type.name,
+            "data": [
+                total_leave_with_type[leave_type.id][employee_id]
+                for employee_id in employees
+            ],
+        }
+        for leave_type in leave_types
+    ]
+    employee_label = list(employees.values())
+
     response = {
         "labels": employee_label,
         "dataset": dataset,
@@ -2261,18 +2240,10 @@ def department_leave_chart(request):
     today = date.today()
 
     departments = Department.objects.all()
-    department_counts = {dep.department: 0 for dep in departments}
-    leave_request = LeaveRequest.objects.filter(status="approved")
-    leave_dates = []
-
-    for leave in leave_request:
-        for leave_date in leave.requested_dates():
-            leave_dates.append(leave_date.strftime("%Y-%m-%d"))
-
-        if str(today) in leave_dates:
-            for dep in departments:
-                if dep == leave.employee_id.employee_work_info.department_id:
-                    department_counts[dep.department] += 1
+    on_leave = analytics.on_leave_by_department(today)
+    department_counts = {
+        dep.department: on_leave.get(dep.id, 0) for dep in departments
+    }
 
     labels = [department.department for department in departments]
     dataset = [
@@ -2300,12 +2271,10 @@ def leave_type_chart(request):
     GET : return Json response of labels, dataset.
     """
     leave_types = LeaveType.objects.all()
-    leave_type_count = {types.name: 0 for types in leave_types}
-    leave_request = LeaveRequest.objects.filter(status="approved")
-    for leave in leave_request:
-        for lev in leave_types:
-            if lev == leave.leave_type_id:
-                leave_type_count[lev.name] += leave.requested_days
+    leave_days = analytics.leave_days_by_type()
+    leave_type_count = {
+        leave_type.name: leave_days.get(leave_type.id, 0) for leave_type in leave_types
+    }
 
     labels = [leave_type.name for leave_type in leave_types]
 
@@ -2335,25 +2304,14 @@ def leave_over_period(request):
     start_of_week = today - timedelta(days=today.weekday())
     week_dates = [start_of_week + timedelta(days=i) for i in range(6)]
 
-    leave_in_week = []
-
-    leave_request = LeaveRequest.objects.filter(status="approved")
-    leave_dates = []
-    for leave in leave_request:
-        for leave_date in leave.requested_dates():
-            leave_dates.append(leave_date)
-
-    filtered_dates = [
+    # the days of the week out of the current month count no leave
+    month_dates = [
         day
-        for day in leave_dates
+        for day in week_dates
         if day.month == today.month and day.year == today.year
     ]
-    for week_date in week_dates:
-        days = []
-        for filtered_date in filtered_dates:
-            if filtered_date == week_date:
-                days.append(filtered_date)
-        leave_in_week.append(len(days))
+    counts = dict(zip(month_dates, analytics.daily_leave_counts(month_dates)))
+    leave_in_week = [counts.get(week_date, 0) for week_date in week_dates]
 
     dataset = (
         {
@@ -2498,9 +2456,7 @@ def leave_allocation_request_view(request):
     )
     page_number = request.GET.get("page")
     leave_allocation_requests = paginator_qry(queryset, page_number)
-    requests_ids = json.dumps(
-        list(leave_allocation_requests.object_list.values_list("id", flat=True))
-    )
+    requests_ids = page_ids(leave_allocation_requests)
     my_leave_allocation_requests = LeaveAllocationRequest.objects.filter(
         employee_id=employee.id
     ).order_by("-id")
@@ -2508,9 +2464,7 @@ def leave_allocation_request_view(request):
     my_leave_allocation_requests = paginator_qry(
         my_leave_allocation_requests, my_page_number
     )
-    my_requests_ids = json.dumps(
-        list(my_leave_allocation_requests.object_list.values_list("id", flat=True))
-    )
+    my_requests_ids = page_ids(my_leave_allocation_requests)
     leave_allocation_request_filter = LeaveAllocationRequestFilter()
     previous_data = request.GET.urlencode()
     data_dict = parse_qs(previous_data)
@@ -2662,12 +2616,8 @@ def leave_allocation_request_filter(request):
     leave_allocation_requests = paginator_qry(
         leave_allocation_requests_filtered, page_number
     )
-    requests_ids = json.dumps(
-        list(leave_allocation_requests.object_list.values_list("id", flat=True))
-    )
-    my_requests_ids = json.dumps(
-        list(leave_allocation_requests.object_list.values_list("id", flat=True))
-    )
+    requests_ids = page_ids(leave_allocation_requests)
+    my_requests_ids = page_ids(leave_allocation_requests)
     my_leave_allocation_requests = paginator_qry(
         my_leave_allocation_requests, my_page_number
     )
@@ -0,0 +1,267 @@
+"""
+working_calendar.py
+
+This module is used to compute the holiday and company leave dates of a company
+once per year and share them between the payroll, leave and attendance calculations.
+
+Each year is stored as two bitsets, one for the holidays and one for the company
+leaves, where the bit n is set when the n-th day of the year is off. The bitsets
+are memoised per (company, year) and dropped when a holiday or a company leave is
+saved or deleted.
+
+The company leave dates are computed arithmetically, without the process wide
+first week day of the calendar module, and memoised per (rule set, year).
+"""
+import calendar
+import functools
+import threading
+from datetime import date, timedelta
+from django.core.cache import cache
+from django.db.models import Q
+from base import company_scope
+
+VERSION_CACHE_KEY = "leave_working_calendar_version"
+
+_lock = threading.Lock()
+_calendars = {}
+_version = [None]
+
+
+class YearCalendar:
+    """
+    Holiday and company leave bitsets of a year
+    """
+
+    __slots__ = ("year", "first_day", "holidays", "company_leaves")
+
+    def __init__(self, year, holidays=0, company_leaves=0):
+        self.year = year
+        self.first_day = date(year, 1, 1)
+        self.holidays = holidays
+        self.company_leaves = company_leaves
+
+    def bit(self, day):
+        """
+        Returns the bit of the day in the year bitsets
+        """
+        return 1 << (day - self.first_day).days
+
+    def dates(self, bitset, start_date, end_date):
+        """
+        Returns the sorted dates set in the bitset between the start and end date
+        """
+        start_date = max(start_date, self.first_day)
+        end_date = min(end_date, date(self.year, 12, 31))
+        offset = (start_date - self.first_day).days
+        bitset = bitset >> offset
+        dates = []
+        day = start_date
+        while bitset and day <= end_date:
+            if bitset & 1:
+                dates.append(day)
+            bitset >>= 1
+            day += timedelta(days=1)
+        return dates
+
+
+def _company_key():
+    """
+    Returns the company the holiday and company leave querysets are scoped to
+    """
+    company_id = company_scope.get_active_company()
+    return "all" if company_id is None else str(company_id)
+
+
+def _week_dates(year, month, based_on_week, based_on_week_day):
+    """
+    Returns the dates of the week day in the month, only the one in the given
+    week of the month when based_on_week is not None. The weeks of a month start
+    on Sunday, the first week being the one of the first day of the month.
+    """
+    first_day = date(year, month, 1)
+    if based_on_week is None:
+        offset = (based_on_week_day - first_day.weekday()) % 7
+        return [
+            first_day + timedelta(days=day)
+            for day in range(offset, calendar.monthrange(year, month)[1], 7)
+        ]
+    # Sunday starting the first week, on or before the first day of the month
+    first_sunday = first_day - timedelta(days=(first_day.weekday() + 1) % 7)
+    leave_date = first_sunday + timedelta(
+        days=7 * based_on_week + (based_on_week_day + 1) % 7
+    )
+    if leave_date.month != month:
+        return []
+    return [leave_date]
+
+
+@functools.lru_cache(maxsize=256)
+def company_leave_bitset(rules, year):
+    """
+    Returns the company leave bitset of the year for the rules, a sorted tuple
+    of (based_on_week, based_on_week_day) pairs of integers, based_on_week being
+    None for every week. The rules identify the rule set, so the result is
+    memoised without invalidation and shared between the companies.
+    """
+    year_calendar = YearCalendar(year)
+    bitset = 0
+    for based_on_week, based_on_week_day in rules:
+        for month in range(1, 13):
+            for leave_date in _week_dates(year, month, based_on_week, based_on_week_day):
+                bitset |= year_calendar.bit(leave_date)
+    return bitset
+
+
+def company_leave_rules(company_leaves):
+    """
+    Returns the rule set of the company leaves, see company_leave_bitset
+    """
+    return tuple(
+        sorted(
+            {
+                (
+                    int(company_leave.based_on_week)
+                    if company_leave.based_on_week is not None
+                    else None,
+                    int(company_leave.based_on_week_day),
+                )
+                for company_leave in company_leaves
+            },
+            key=lambda rule: (-1 if rule[0] is None else rule[0], rule[1]),
+        )
+    )
+
+
+def compute_company_leave_dates(company_leaves, year):
+    """
+    :return: This function returns the list of company leave dates of the year
+    for the given company leaves
+    """
+    year_calendar = YearCalendar(year)
+    return year_calendar.dates(
+        company_leave_bitset(company_leave_rules(company_leaves), year),
+        year_calendar.first_day,
+        date(year, 12, 31),
+    )
+
+
+def _build_year(year):
+    """
+    Queries the holidays and company leaves of the year and builds its bitsets
+    """
+    from leave.models import Holiday, CompanyLeave
+
+    year_calendar = YearCalendar(year)
+    first_day = year_calendar.first_day
+    last_day = date(year, 12, 31)
+    holidays = Holiday.objects.filter(start_date__lte=last_day).filter(
+        Q(end_date__gte=first_day) | Q(end_date__isnull=True, start_date__gte=first_day)
+    )
+    bitset = 0
+    for holiday in holidays:
+        start_date = max(holiday.start_date, first_day)
+        end_date = min(holiday.end_date or holiday.start_date, last_day)
+        for offset in range((end_date - start_date).days + 1):
+            bitset |= year_calendar.bit(start_date + timedelta(days=offset))
+    year_calendar.holidays = bitset
+
+    year_calendar.company_leaves = company_leave_bitset(
+        company_leave_rules(CompanyLeave.objects.all()), year
+    )
+    return year_calendar
+
+
+def get_year_calendar(year):
+    """
+    Returns the memoised YearCalendar of the year for the current company
+    """
+    version = cache.get(VERSION_CACHE_KEY, 0)
+    key = (_company_key(), year)
+    with _lock:
+        if _version[0] != version:
+            _calendars.clear()
+            _version[0] = version
+        year_calendar = _calendars.get(key)
+    if year_calendar is None:
+        year_calendar = _build_year(year)
+        with _lock:
+            if _version[0] == version:
+                _calendars[key] = year_calendar
+    return year_calendar
+
+
+def clear():
+    """
+    Drops the memoised calendars of this process and, through the cache version,
+    of the other processes sharing the cache
+    """
+    try:
+        cache.incr(VERSION_CACHE_KEY)
+    except ValueError:
+        cache.set(VERSION_CACHE_KEY, 1, None)
+    with _lock:
+        _calendars.clear()
+        _version[0] = None
+
+
+def _dates(attr, start_date, end_date):
+    dates = []
+    for year in range(start_date.year, end_date.year + 1):
+        year_calendar = get_year_calendar(year)
+        dates += year_calendar.dates(
+            getattr(year_calendar, attr), start_date, end_date
+        )
+    return dates
+
+
+def holiday_dates(start_date, end_date):
+    """
+    :return: the sorted list of holiday dates between the start and end date
+    """
+    return _dates("holidays", start_date, end_date)
+
+
+def company_leave_dates(start_date, end_date):
+    """
+    :return: the sorted list of company leave dates between the start and end date
+    """
+    return _dates("company_leaves", start_date, end_date)
+
+
+def off_day_count(start_date, end_date, holidays=False, company_leaves=False):
+    """
+    Returns the number of days between the start and end date which are
+    holidays or company leaves, counted on the bitsets
+    """
+    count = 0
+    for year in range(start_date.year, end_date.year + 1):
+        year_calendar = get_year_calendar(year)
+        bitset = 0
+        if holidays:
+            bitset |= year_calendar.holidays
+        if company_leaves:
+            bitset |= year_calendar.company_leaves
+        first = max(start_date, year_calendar.first_day)
+        last = min(end_date, date(year, 12, 31))
+        if first > last:
+            continue
+        offset = (first - year_calendar.first_day).days
+        mask = (1 << ((last - first).days + 1)) - 1
+        count += bin((bitset >> offset) & mask).count("1")
+    return count
+
+
+def is_holiday(day):
+    """
+    Checks the day is a holiday
+    """
+    year_calendar = get_year_calendar(day.year)
+    return bool(year_calendar.holidays & year_calendar.bit(day))
+
+
+def is_company_leave(day):
+    """
+    Checks the day is a company leave
+    """
+    year_calendar = get_year_calendar(day.year)
+    return bool(year_calendar.company_leaves & year_calendar.bit(day))
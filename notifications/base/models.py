@@ -304,10 +304,10 @@ def notify_handler(verb, **kwargs):
         if kwargs and EXTRA_DATA:
             newnotify.data = kwargs
 
-        newnotify.save()
         new_notifications.append(newnotify)
 
-    return new_notifications
+    # one insert for every recipient of the action
+    return Notification.objects.bulk_create(new_notifications)
 
 
 # connect the signal
@@ -4,7 +4,7 @@ Used to register filter for onboarding models
 """
 from django import forms
 from django_filters import  filters
-from onboarding.models import Candidate
+from onboarding.models import Candidate, CandidateStage
 from base.filters import FilterSet
 
 
@@ -22,3 +22,34 @@ class CandidateFilter(FilterSet):
 
         model = Candidate
         fields = {}
+
+
+class CandidateStageFilter(FilterSet):
+    """
+    FilterSet class for the candidates of the onboarding kanban stages
+    """
+
+    search = filters.CharFilter(
+        field_name="candidate_id__name", lookup_expr="icontains"
+    )
+    job_position = filters.CharFilter(
+        field_name="candidate_id__job_position_id__job_position"
+    )
+    join_date = filters.DateFilter(field_name="candidate_id__joining_date")
+    join_date_start = filters.DateFilter(
+        field_name="candidate_id__joining_date", lookup_expr="gte"
+    )
+    join_date_end = filters.DateFilter(
+        field_name="candidate_id__joining_date", lookup_expr="lte"
+    )
+    portal_stage = filters.NumberFilter(
+        field_name="candidate_id__onboarding_portal__count"
+    )
+
+    class Meta:
+        """
+        Meta class to add some additional options
+        """
+
+        model = CandidateStage
+        fields = {}
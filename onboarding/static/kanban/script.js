@@ -15,21 +15,6 @@ function getCookie(name) {
 }
 
 
-function count_element() {
-  let stage = $(".onboarding_items");
-  let count = $(".stage_count");
-  let nos = [];
-  for (i = 0; i < stage.length; i++) {
-    nos.push($(stage[i]).find("[data-candidate]:visible").length);
-  }
-
-  $.each(nos, function (index, value1) {
-    var value2 = count[index];
-    $(value2).text(value1);
-    $(value2).attr("title", `${value1} candidates`);
-  });
-}
-
 function countSequence(element) {
   // let childs = element.parent().find(".change-cand")
   setTimeout(() => {
@@ -96,8 +81,19 @@ $(".oh-kanban__section.stage").mouseup(function () {
   }, 0);
 });
 
+function updateStageCount(stageId, change) {
+  // the badges hold the count of the stage, the candidates are loaded in pages
+  $(`.oh-kanban__section.stage[data-stage-id=${stageId}] .stage_count`).each(
+    function () {
+      let count = parseInt($(this).text()) + change;
+      $(this).text(count);
+      $(this).attr("title", `${count} candidates`);
+    }
+  );
+}
+
 $(document).ready(function () {
-  $(".candidate[data-candidate-id]").mouseup(function () {
+  $(document).on("mouseup", ".candidate[data-candidate-id]", function () {
     setTimeout(() => {
       let stageId = $(this).parent().attr("data-stage-id");
       let candidateId = $(this).attr("data-candidate-id");
@@ -124,7 +120,8 @@ $(document).ready(function () {
             setTimeout(() => {
               $(".messages").html(alertContainer);
             }, 1000);
-            count_element();
+            updateStageCount(candidateNow, -1);
+            updateStageCount(stageId, 1);
           },
         });
         $(this).attr("data-candidate-now", stageId);
@@ -132,3 +129,55 @@ $(document).ready(function () {
     }, 0);
   });
 });
+
+// The candidates of the stages are loaded page by page, the loader at the end
+// of a stage requests the next page when it is scrolled into view. The loaders
+// of the hidden tabs are requested once they are shown.
+var stageCandidatesObserver = new IntersectionObserver(
+  function (entries) {
+    entries.forEach(function (entry) {
+      if (entry.isIntersecting) {
+        stageCandidatesObserver.unobserve(entry.target);
+        htmx.trigger(entry.target, "loadCandidates");
+      }
+    });
+  },
+  { rootMargin: "200px" }
+);
+
+function watchStageLoader(loader) {
+  stageCandidatesObserver.observe(loader);
+  loader.addEventListener("htmx:beforeOnLoad", function (event) {
+    // the loader was removed by a new search, its page is not added
+    if (!document.body.contains(loader)) {
+      event.preventDefault();
+    }
+  });
+}
+
+$(document).ready(function () {
+  $(".stage-candidates-loader").each(function () {
+    watchStageLoader(this);
+  });
+});
+
+$(document).on("htmx:load", ".stage-candidates-loader", function () {
+  watchStageLoader(this);
+});
+
+$(document).on("htmx:afterRequest", ".stage-candidates-loader", function () {
+  $(this).remove();
+});
+
+$(document).on("htmx:load", "[data-lazy]", function () {
+  $(this)
+    .find(".oh-kanban__dropdown-toggle")
+    .on("click", function (e) {
+      e.preventDefault();
+      $(this)
+        .parents(".oh-kanban__dropdown")
+        .find(".oh-kanban__dropdown-menu")
+        .toggleClass("d-none");
+    });
+  $(this).removeAttr("data-lazy");
+});
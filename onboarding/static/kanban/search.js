@@ -0,0 +1,99 @@
+// The search and the filters of the kanban are applied on the server, the
+// candidates of every stage are loaded again from their first page and the
+// first pages update the counts of the stages.
+var kanbanSearchTimeout;
+var kanbanFilters = [
+  "job_position",
+  "join_date",
+  "portal_stage",
+  "join_date_start",
+  "join_date_end",
+];
+
+function closeTag(element) {
+  var filterTagClass = $(element).attr("class");
+  $(element).remove();
+  var classArray = filterTagClass.split(" ");
+  var lastClass = classArray[classArray.length - 1];
+  $("#" + lastClass).val("");
+  if (lastClass === "job_position_id" || lastClass === "portal_stage") {
+    $("#select2-" + lastClass + "-container").text("------------------");
+  }
+  if (lastClass === "search") {
+    reloadStageCandidates();
+    return;
+  }
+  var button = document.querySelector(
+    ".oh-tabs__action-bar#filter_item button"
+  );
+  if (button) {
+    button.click();
+  }
+}
+
+function kanbanFilterValues() {
+  return {
+    search: $("#search").val() || "",
+    job_position: $("#job_position_id").val() || "",
+    join_date: $("#join_date").val() || "",
+    portal_stage: $("#portal_stage").val() || "",
+    join_date_start: $("#join_date_start").val() || "",
+    join_date_end: $("#join_date_end").val() || "",
+  };
+}
+
+function reloadStageCandidates() {
+  var params = $.param(kanbanFilterValues());
+  $(".onboarding_items[data-candidates-url]").each(function () {
+    var url = $(this).attr("data-candidates-url") + "?" + params;
+    var loader = $(
+      '<div class="stage-candidates-loader" hx-trigger="loadCandidates" hx-swap="beforeend"></div>'
+    )
+      .attr("hx-get", url)
+      .attr("hx-target", "#" + this.id);
+    $(this).children().attr("data-lazy", "");
+    $(this).empty().append(loader);
+    htmx.process(loader[0]);
+    watchStageLoader(loader[0]);
+  });
+}
+
+function addFilterTag(field, label, value) {
+  $(".oh-filter-tag.filter-field." + field).remove();
+  if (value) {
+    $(".oh-filter-tag-container.filter-value").append(
+      `<span class="oh-filter-tag filter-field ${field}" onclick="closeTag(this)">${label} : ` +
+        $("<span>").text(value).html() +
+        '<button class="oh-filter-tag__close" id="close"><ion-icon name="close-outline" role="img" class="md hydrated" aria-label="close outline"></ion-icon></button></span>'
+    );
+  }
+}
+
+$(document).ready(function () {
+  $("#search").keyup(function (e) {
+    e.preventDefault();
+    addFilterTag("search", "Search", $(this).val());
+    clearTimeout(kanbanSearchTimeout);
+    kanbanSearchTimeout = setTimeout(reloadStageCandidates, 300);
+  });
+
+  $("#filter_item").on("click", function () {
+    var values = kanbanFilterValues();
+    addFilterTag("job_position_id", "Job position", values.job_position);
+    addFilterTag("join_date", "Join date", values.join_date);
+    addFilterTag("portal_stage", "Portal stage", values.portal_stage);
+    addFilterTag("join_date_start", "Join date from", values.join_date_start);
+    addFilterTag("join_date_end", "Join date to", values.join_date_end);
+    var filterCount = kanbanFilters.filter(function (field) {
+      return values[field];
+    }).length;
+    $("#filterCount").empty();
+    if (filterCount > 0) {
+      $("#filterCount").text("(" + filterCount + ")");
+    }
+    reloadStageCandidates();
+  });
+
+  $("#job_position_id").select2();
+  $("#portal_stage").select2();
+});
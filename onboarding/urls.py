@@ -45,6 +45,11 @@ urlpatterns = [
     path("email-send", views.email_send, name="email-send"),
     path("onboarding-view/", views.onboarding_view, name="onboarding-view"),
     path("kanban-view", views.kanban_view, name="kanban-view"),
+    path(
+        "kanban-stage-candidates/<int:stage_id>/<int:recruitment_id>/",
+        views.kanban_stage_candidates,
+        name="kanban-stage-candidates",
+    ),
     path(
         "candidate-task-update/<int:obj_id>",
         views.candidate_task_update,
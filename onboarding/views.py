@@ -20,18 +20,20 @@ from django.shortcuts import render, redirect
 from django.contrib.auth import login
 from django.http import HttpResponse, JsonResponse, HttpResponseRedirect
 from django.contrib import messages
-from django.core.paginator import Paginator
+from base.pagination import paginate, seek_rows
 from django.views.decorators.http import require_http_methods
 from base.models import JobPosition
 from notifications.signals import notify
 from horilla import settings
 from horilla.decorators import login_required, hx_request_required
 from horilla.decorators import permission_required
-from base.methods import get_key_instances
+from base.methods import get_key_instances, update_sequences
 from recruitment.models import Candidate, Recruitment
 from recruitment.filters import CandidateFilter
+from onboarding.filters import CandidateStageFilter
 from employee.models import Employee, EmployeeWorkInformation, EmployeeBankDetails
-from django.db.models import ProtectedError
+from django.db.models import Count, OuterRef, Prefetch, ProtectedError, Subquery
+from django.db.models.functions import Coalesce
 from onboarding.forms import (
     OnboardingCandidateForm,
     UserCreationForm,
@@ -53,6 +55,8 @@ from onboarding.decorators import (
     recruitment_manager_can_enter,
 )
 
+KANBAN_PER_PAGE = 20
+
 
 @login_required
 @hx_request_required
@@ -453,9 +457,7 @@ def paginator_qry(qryset, page_number):
     """
     function used to paginate query set
     """
-    paginator = Paginator(qryset, 25)
-    qryset = paginator.get_page(page_number)
-    return qryset
+    return paginate(qryset, page_number, per_page=25)
 
 
 @login_required
@@ -573,6 +575,65 @@ def email_send(request):
     return JsonResponse({"message": _("Email send successfully"), "tags": "success"})
 
 
+def assign_onboarding(request, candidates):
+    """
+    function used to put the candidates without onboarding stage on the first
+    stage of their recruitment and to create their missing onboarding tasks.
+
+    Parameters:
+    request (HttpRequest): The HTTP request object.
+    candidates : the candidates started onboarding
+    """
+    recruitment_ids = set(candidates.values_list("recruitment_id", flat=True))
+    first_stages = {}
+    for recruitment_stage in (
+        OnboardingStage.recruitment_id.through.objects.filter(
+            recruitment_id__in=recruitment_ids
+        )
+        .select_related("onboardingstage")
+        .order_by("onboardingstage__sequence")
+    ):
+        first_stages.setdefault(
+            recruitment_stage.recruitment_id, recruitment_stage.onboardingstage
+        )
+    for candidate in candidates.filter(onboarding_stage__isnull=True).select_related(
+        "recruitment_id"
+    ):
+        onboarding_stage = first_stages.get(candidate.recruitment_id_id)
+        if onboarding_stage is None:
+            messages.error(
+                request,
+                _("%(recruitment)s has no stage..")
+                % {"recruitment": candidate.recruitment_id},
+            )
+            continue
+        CandidateStage(
+            candidate_id=candidate, onboarding_stage_id=onboarding_stage
+        ).save()
+    tasks = {}
+    recruitment_tasks = OnboardingTask.recruitment_id.through.objects.filter(
+        recruitment_id__in=recruitment_ids
+    ).values_list("recruitment_id", "onboardingtask_id")
+    for recruitment_id, task_id in recruitment_tasks:
+        tasks.setdefault(recruitment_id, []).append(task_id)
+    existing = set(
+        CandidateTask.objects.filter(candidate_id__in=candidates).values_list(
+            "candidate_id", "onboarding_task_id"
+        )
+    )
+    CandidateTask.objects.bulk_create(
+        [
+            CandidateTask(candidate_id_id=candidate_id, onboarding_task_id_id=task_id)
+            for candidate_id, recruitment_id in candidates.values_list(
+                "id", "recruitment_id"
+            )
+            for task_id in tasks.get(recruitment_id, [])
+            if (candidate_id, task_id) not in existing
+        ],
+        ignore_conflicts=True,
+    )
+
+
 @login_required
 @all_manager_can_enter("onboarding.view_candidatestage")
 def onboarding_view(request):
@@ -587,31 +648,7 @@ def onboarding_view(request):
     """
     candidates = Candidate.objects.filter(hired=True, start_onboard=True)
     job_positions = JobPosition.objects.all()
-    for candidate in candidates:
-        if not CandidateStage.objects.filter(candidate_id=candidate).exists():
-            try:
-                onboarding_stage = OnboardingStage.objects.filter(
-                    recruitment_id=candidate.recruitment_id
-                ).order_by("sequence")[0]
-                CandidateStage(
-                    candidate_id=candidate, onboarding_stage_id=onboarding_stage
-                ).save()
-            except Exception:
-                messages.error(
-                    request,
-                    _("%(recruitment)s has no stage..")
-                    % {"recruitment": candidate.recruitment_id},
-                )
-        if tasks := OnboardingTask.objects.filter(
-            recruitment_id=candidate.recruitment_id
-        ):
-            for task in tasks:
-                if not CandidateTask.objects.filter(
-                    candidate_id=candidate, onboarding_task_id=task
-                ).exists():
-                    CandidateTask(
-                        candidate_id=candidate, onboarding_task_id=task
-                    ).save()
+    assign_onboarding(request, candidates)
 
     recruitments = Recruitment.objects.filter(closed=False)
     status = "closed"
@@ -639,37 +676,29 @@ def onboarding_view(request):
 def kanban_view(request):
     candidates = Candidate.objects.filter(hired=True, start_onboard=True)
     job_positions = JobPosition.objects.all()
-    for candidate in candidates:
-        if not CandidateStage.objects.filter(candidate_id=candidate).exists():
-            try:
-                onboarding_stage = OnboardingStage.objects.filter(
-                    recruitment_id=candidate.recruitment_id
-                ).order_by("sequence")[0]
-                CandidateStage(
-                    candidate_id=candidate, onboarding_stage_id=onboarding_stage
-                ).save()
-            except Exception:
-                messages.error(
-                    request,
-                    _("%(recruitment)s has no stage..")
-                    % {"recruitment": candidate.recruitment_id},
-                )
-        if tasks := OnboardingTask.objects.filter(
-            recruitment_id=candidate.recruitment_id
-        ):
-            for task in tasks:
-                if not CandidateTask.objects.filter(
-                    candidate_id=candidate, onboarding_task_id=task
-                ).exists():
-                    CandidateTask(
-                        candidate_id=candidate, onboarding_task_id=task
-                    ).save()
+    assign_onboarding(request, candidates)
 
     recruitments = Recruitment.objects.filter(closed=False)
     status = "closed"
     if request.GET.get("closed") == "closed":
         recruitments = Recruitment.objects.filter(closed=True)
         status = ""
+    # the board is rendered without candidates, the stages load them in pages
+    stages = OnboardingStage.objects.annotate(
+        candidate_count=Coalesce(
+            Subquery(
+                CandidateStage.objects.filter(onboarding_stage_id=OuterRef("pk"))
+                .order_by()
+                .values("onboarding_stage_id")
+                .annotate(count=Count("id"))
+                .values("count")
+            ),
+            0,
+        )
+    )
+    recruitments = recruitments.prefetch_related(
+        Prefetch("onboardingstage_set", queryset=stages)
+    )
     onboarding_stages = OnboardingStage.objects.all()
     choices = CandidateTask.choice
     stage_form = OnboardingViewStageForm()
@@ -688,6 +717,64 @@ def kanban_view(request):
     )
 
 
+@login_required
+@all_manager_can_enter("onboarding.view_candidatestage")
+def kanban_stage_candidates(request, stage_id, recruitment_id):
+    """
+    function used to render a page of the candidates of a stage on the kanban
+    view, the stage requests the next page when its end is scrolled into view.
+    The pages are read after the last candidate of the previous page, so the
+    candidates moved out of the stage do not shift them. The candidates are
+    filtered with the search and the filters of the kanban.
+
+    Parameters:
+    request (HttpRequest): The HTTP request object.
+    stage_id : onboarding stage id
+    recruitment_id : recruitment id of the kanban tab
+
+    Returns:
+    GET : return the candidate cards of the page
+    """
+    stage = OnboardingStage.objects.get(id=stage_id)
+    candidates = (
+        CandidateStage.objects.filter(onboarding_stage_id=stage)
+        .select_related(
+            "candidate_id__job_position_id", "candidate_id__onboarding_portal"
+        )
+        .prefetch_related(
+            Prefetch(
+                "candidate_id__candidate_task",
+                queryset=CandidateTask.objects.select_related("onboarding_task_id"),
+            )
+        )
+        .annotate(position=Coalesce("sequence", 0))
+    )
+    candidates = CandidateStageFilter(request.GET, queryset=candidates).qs
+    cursor = request.GET.get("cursor")
+    # the count of the stage is sent with its first page
+    count = None if cursor else candidates.count()
+    rows, next_cursor = seek_rows(
+        candidates, ("position", "id"), cursor, per_page=KANBAN_PER_PAGE
+    )
+    next_query = ""
+    if next_cursor:
+        params = request.GET.copy()
+        params["cursor"] = next_cursor
+        next_query = params.urlencode()
+    return render(
+        request,
+        "onboarding/kanban/stage_candidates.html",
+        {
+            "stage": stage,
+            "rec_id": recruitment_id,
+            "candidates": rows,
+            "count": count,
+            "next_query": next_query,
+            "choices": CandidateTask.choice,
+        },
+    )
+
+
 def user_creation(request, token):
     """
     function used to create user account in onboarding portal.
@@ -1232,14 +1319,7 @@ def candidate_sequence_update(request):
     This method is used to update the sequence of candidate
     """
     sequence_data = json.loads(request.POST["sequenceData"])
-    updated = False
-    for cand_id, seq in sequence_data.items():
-        cand = CandidateStage.objects.get(id=cand_id)
-        if cand.sequence != seq:
-            cand.sequence = seq
-            cand.save()
-            updated = True
-    if updated:
+    if update_sequences(CandidateStage.objects.all(), sequence_data):
         return JsonResponse(
             {"message": _("Candidate sequence updated"), "type": "info"}
         )
@@ -1253,16 +1333,7 @@ def stage_sequence_update(request):
     This method is used to update the sequence of the stages
     """
     sequence_data = json.loads(request.POST["sequenceData"])
-    updated = False
-
-    for stage_id, seq in sequence_data.items():
-        stage = OnboardingStage.objects.get(id=stage_id)
-        if stage.sequence != seq:
-            stage.sequence = seq
-            stage.save()
-            updated = True
-
-    if updated:
+    if update_sequences(OnboardingStage.objects.all(), sequence_data):
         return JsonResponse({"type": "success", "message": _("Stage sequence updated")})
     return JsonResponse({"type": "fail"})
 
@@ -12,6 +12,7 @@ from payroll.models.models import (
     Deduction,
     FilingStatus,
     Payslip,
+    PayslipJob,
     WorkRecord,
 )
 from payroll.models.tax_models import (
@@ -28,4 +29,5 @@ admin.site.register([Contract, WorkRecord])
 admin.site.register(Allowance)
 admin.site.register(Deduction)
 admin.site.register(Payslip)
+admin.site.register(PayslipJob)
 admin.site.register(PayrollSettings)
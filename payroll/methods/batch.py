@@ -0,0 +1,219 @@
+"""
+batch.py
+
+This module is used to prefetch the payroll data of a whole pay run, so that the
+payslip calculation methods can compute every employee's payslip in memory
+"""
+from collections import defaultdict
+from django.db.models import Q
+from employee.models import Employee
+from leave.models import LeaveRequest
+from attendance.models import Attendance
+from payroll.models.models import Contract, Allowance, Deduction
+from payroll.models.tax_models import TaxBracket
+
+
+class PayrollBatch:
+    """
+    Holds the contracts, leaves, attendances, allowances, deductions and tax
+    brackets needed to compute the payslips of a group of employees over a period.
+    The holiday and company leave dates come from leave.working_calendar.
+
+    Every lookup is loaded with a single query when the batch is created, so the
+    number of queries of a pay run does not grow with the number of employees.
+    The calculation methods accept the batch through the `batch` argument and read
+    from it instead of querying per employee.
+    """
+
+    def __init__(self, employees, start_date, end_date):
+        employee_ids = [
+            getattr(employee, "pk", employee) for employee in employees
+        ]
+        self.start_date = start_date
+        self.end_date = end_date
+
+        self.employees = list(
+            Employee.objects.filter(pk__in=employee_ids).select_related(
+                "employee_work_info"
+            )
+        )
+
+        self._contracts = defaultdict(list)
+        for contract in (
+            Contract.objects.filter(employee_id__in=employee_ids)
+            .select_related("filing_status", "department")
+            .order_by("pk")
+        ):
+            self._contracts[contract.employee_id_id].append(contract)
+
+        self._leaves = defaultdict(list)
+        for leave_request in (
+            LeaveRequest.objects.filter(
+                employee_id__in=employee_ids,
+                status="approved",
+                start_date__lte=end_date,
+            )
+            .filter(Q(end_date__gte=start_date) | Q(end_date__isnull=True))
+            .select_related("leave_type_id")
+            .order_by("pk")
+        ):
+            self._leaves[leave_request.employee_id_id].append(leave_request)
+
+        self._attendances = defaultdict(list)
+        for attendance in (
+            Attendance.objects.filter(
+                employee_id__in=employee_ids,
+                attendance_date__range=(start_date, end_date),
+            )
+            .filter(
+                Q(attendance_validated=True) | Q(attendance_overtime_approve=True)
+            )
+            .order_by("pk")
+        ):
+            self._attendances[attendance.employee_id_id].append(attendance)
+
+        self.allowances = list(
+            Allowance.objects.select_related("shift_id", "work_type_id")
+            .prefetch_related("specific_employees", "exclude_employees")
+            .order_by("pk")
+        )
+        self.deductions = list(
+            Deduction.objects.prefetch_related(
+                "specific_employees", "exclude_employees"
+            ).order_by("pk")
+        )
+        self._specific = {}
+        self._excluded = {}
+        for component in self.allowances + self.deductions:
+            key = (component.__class__, component.pk)
+            self._specific[key] = {
+                employee.pk for employee in component.specific_employees.all()
+            }
+            self._excluded[key] = {
+                employee.pk for employee in component.exclude_employees.all()
+            }
+
+        self._tax_brackets = defaultdict(list)
+        filing_ids = {
+            contract.filing_status_id
+            for contracts in self._contracts.values()
+            for contract in contracts
+            if contract.filing_status_id
+        }
+        for tax_bracket in TaxBracket.objects.filter(
+            filing_status_id__in=filing_ids
+        ).order_by("min_income"):
+            self._tax_brackets[tax_bracket.filing_status_id_id].append(tax_bracket)
+
+    def contract(self, employee, **filters):
+        """
+        Returns the first contract of the employee matching the filters, like
+        `employee.contract_set.filter(**filters).first()`
+        """
+        for contract in self._contracts[employee.pk]:
+            if all(getattr(contract, field) == value for field, value in filters.items()):
+                return contract
+        return None
+
+    def approved_leaves(self, employee):
+        """
+        Returns the approved leave requests of the employee overlapping the period
+        """
+        return self._leaves[employee.pk]
+
+    def attendances(self, **filters):
+        """
+        Filters the prefetched attendances in memory. The filters are the keyword
+        arguments that would be passed to `Attendance.objects.filter`, e.g.
+        `employee_id`, `attendance_date__range`, `shift_id__id`, `attendance_validated`
+        """
+        filters = filters.copy()
+        employee = filters.pop("employee_id")
+        lookups = []
+        for lookup, value in filters.items():
+            field_name, _, suffix = lookup.partition("__")
+            field = Attendance._meta.get_field(field_name)
+            lookups.append((field.attname, suffix, getattr(value, "pk", value)))
+
+        def matches(attendance):
+            for attname, suffix, value in lookups:
+                attr = getattr(attendance, attname)
+                if suffix == "range":
+                    if not value[0] <= attr <= value[1]:
+                        return False
+                elif attr != value:
+                    return False
+            return True
+
+        return [
+            attendance
+            for attendance in self._attendances[getattr(employee, "pk", employee)]
+            if matches(attendance)
+        ]
+
+    def _targets(self, component, employee, conditional):
+        key = (component.__class__, component.pk)
+        if employee.pk in self._specific[key]:
+            return True
+        if employee.pk in self._excluded[key]:
+            return False
+        return component.include_active_employees or (
+            conditional and component.is_condition_based
+        )
+
+    def allowances_for(self, employee, start_date, end_date):
+        """
+        Returns the allowances targeted to the employee for the period
+        """
+        return [
+            allowance
+            for allowance in self.allowances
+            if _in_period(allowance, start_date, end_date)
+            and self._targets(allowance, employee, conditional=True)
+        ]
+
+    def deductions_for(
+        self, employee, start_date, end_date, is_pretax, is_tax, conditional=True
+    ):
+        """
+        Returns the non compensation-updating deductions targeted to the employee
+        for the period
+        """
+        return [
+            deduction
+            for deduction in self.deductions
+            if deduction.is_pretax == is_pretax
+            and deduction.is_tax == is_tax
+            and deduction.update_compensation is None
+            and _in_period(deduction, start_date, end_date)
+            and self._targets(deduction, employee, conditional)
+        ]
+
+    def compensation_deductions(
+        self, employee, compensation_type, start_date, end_date
+    ):
+        """
+        Returns the deductions updating the compensation of the specific employee
+        """
+        return [
+            deduction
+            for deduction in self.deductions
+            if deduction.update_compensation == compensation_type
+            and _in_period(deduction, start_date, end_date)
+            and employee.pk in self._specific[(Deduction, deduction.pk)]
+        ]
+
+    def tax_brackets(self, filing_status):
+        """
+        Returns the tax brackets of the filing status ordered by minimum income
+        """
+        return self._tax_brackets[filing_status.pk]
+
+
+def _in_period(component, start_date, end_date):
+    """
+    Checks a one-time allowance or deduction falls between the period
+    """
+    return component.one_time_date is None or (
+        start_date <= component.one_time_date <= end_date
+    )
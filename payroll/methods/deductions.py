@@ -7,22 +7,28 @@ from payroll.models.models import Deduction
 
 
 def update_compensation_deduction(
-    employee, compensation_amount, compensation_type, start_date, end_date
+    employee, compensation_amount, compensation_type, start_date, end_date, batch=None
 ):
     """
     This method is used to update the basic or gross pay
 
     Args:
         compensation_amount (_type_): Gross pay or Basic pay or employee
+        batch (PayrollBatch): prefetched pay run data, optional
     """
-    deduction_heads = (
-        Deduction.objects.filter(
-            update_compensation=compensation_type, specific_employees=employee
+    if batch is not None:
+        deduction_heads = batch.compensation_deductions(
+            employee, compensation_type, start_date, end_date
+        )
+    else:
+        deduction_heads = (
+            Deduction.objects.filter(
+                update_compensation=compensation_type, specific_employees=employee
+            )
+            .exclude(one_time_date__lt=start_date)
+            .exclude(one_time_date__gt=end_date)
+            # .exclude(exclude_employees=employee)
         )
-        .exclude(one_time_date__lt=start_date)
-        .exclude(one_time_date__gt=end_date)
-        # .exclude(exclude_employees=employee)
-    )
     deductions = []
     temp = compensation_amount
     for deduction in deduction_heads:
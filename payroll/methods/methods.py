@@ -4,11 +4,11 @@ methods.py
 Payroll related module to write custom calculation methods
 """
 import calendar
-from datetime import timedelta, datetime, date
-from django.db.models import F, Q
-from django.core.paginator import Paginator
+from datetime import timedelta, date
+from django.db.models import F
+from base.pagination import paginate
 from dateutil.relativedelta import relativedelta
-from leave.models import Holiday, CompanyLeave
+from leave import working_calendar
 from attendance.models import Attendance
 from payroll.models.models import Contract, Payslip
 
@@ -17,59 +17,14 @@ def get_holiday_dates(range_start: date, range_end: date) -> list:
     """
     :return: this functions returns a list of all holiday dates.
     """
-    pay_range_dates = get_date_range(start_date=range_start, end_date=range_end)
-    query = Q()
-    for check_date in pay_range_dates:
-        query |= Q(start_date__lte=check_date, end_date__gte=check_date)
-    holidays = Holiday.objects.filter(query)
-    holiday_dates = set([])
-    for holiday in holidays:
-        holiday_dates = holiday_dates | (
-            set(
-                get_date_range(start_date=holiday.start_date, end_date=holiday.end_date)
-            )
-        )
-    return list(set(holiday_dates))
+    return working_calendar.holiday_dates(range_start, range_end)
 
 
 def get_company_leave_dates(year):
     """
     :return: This function returns a list of all company leave dates
     """
-    company_leaves = CompanyLeave.objects.all()
-    company_leave_dates = []
-    for company_leave in company_leaves:
-        based_on_week = company_leave.based_on_week
-        based_on_week_day = company_leave.based_on_week_day
-        for month in range(1, 13):
-            if based_on_week is not None:
-                # Set Sunday as the first day of the week
-                calendar.setfirstweekday(6)
-                month_calendar = calendar.monthcalendar(year, month)
-                weeks = month_calendar[int(based_on_week)]
-                weekdays_in_weeks = [day for day in weeks if day != 0]
-                for day in weekdays_in_weeks:
-                    leave_date = datetime.strptime(
-                        f"{year}-{month:02}-{day:02}", "%Y-%m-%d"
-                    ).date()
-                    if (
-                        leave_date.weekday() == int(based_on_week_day)
-                        and leave_date not in company_leave_dates
-                    ):
-                        company_leave_dates.append(leave_date)
-            else:
-                # Set Monday as the first day of the week
-                calendar.setfirstweekday(0)
-                month_calendar = calendar.monthcalendar(year, month)
-                for week in month_calendar:
-                    if week[int(based_on_week_day)] != 0:
-                        leave_date = datetime.strptime(
-                            f"{year}-{month:02}-{week[int(based_on_week_day)]:02}",
-                            "%Y-%m-%d",
-                        ).date()
-                        if leave_date not in company_leave_dates:
-                            company_leave_dates.append(leave_date)
-    return company_leave_dates
+    return working_calendar.company_leave_dates(date(year, 1, 1), date(year, 12, 31))
 
 
 def get_date_range(start_date, end_date):
@@ -135,13 +90,7 @@ def get_working_days(start_date, end_date):
     # appending company/holiday leaves
     # Note: Duplicate entry may exist
     company_leave_dates = (
-        list(
-            set(
-                get_company_leave_dates(start_date.year)
-                + get_company_leave_dates(end_date.year)
-            )
-        )
-        + holiday_dates
+        working_calendar.company_leave_dates(start_date, end_date) + holiday_dates
     )
 
     date_range = get_date_range(start_date, end_date)
@@ -167,7 +116,7 @@ def get_working_days(start_date, end_date):
     }
 
 
-def get_leaves(employee, start_date, end_date):
+def get_leaves(employee, start_date, end_date, batch=None):
     """
     This method is used to return all the leaves taken by the employee
     between the period.
@@ -176,8 +125,14 @@ def get_leaves(employee, start_date, end_date):
         employee (obj): Employee model instance
         start_date (obj): the start date from the data needed
         end_date (obj): the end date till the date needed
+        batch (PayrollBatch): prefetched pay run data, optional
     """
-    approved_leaves = employee.leaverequest_set.filter(status="approved")
+    if batch is not None:
+        approved_leaves = batch.approved_leaves(employee)
+    else:
+        approved_leaves = employee.leaverequest_set.filter(
+            status="approved"
+        ).select_related("leave_type_id")
     paid_leave = 0
     unpaid_leave = 0
     paid_half = 0
@@ -186,7 +141,7 @@ def get_leaves(employee, start_date, end_date):
     unpaid_leave_dates = []
     company_leave_dates = get_working_days(start_date, end_date)["company_leave_dates"]
 
-    if approved_leaves.exists():
+    if approved_leaves:
         for instance in approved_leaves:
             if instance.leave_type_id.payment == "paid":
                 # if the taken leave is paid
@@ -229,7 +184,7 @@ def get_leaves(employee, start_date, end_date):
     }
 
 
-def get_attendance(employee, start_date, end_date):
+def get_attendance(employee, start_date, end_date, batch=None):
     """
     This method is used to render attendance details between the range
 
@@ -237,32 +192,35 @@ def get_attendance(employee, start_date, end_date):
         employee (obj): Employee user instance
         start_date (obj): start date of the period
         end_date (obj): end date of the period
+        batch (PayrollBatch): prefetched pay run data, optional
     """
-
-    attendances_on_period = Attendance.objects.filter(
-        employee_id=employee,
-        attendance_date__range=(start_date, end_date),
-        attendance_validated=True,
+    filters = {
+        "employee_id": employee,
+        "attendance_date__range": (start_date, end_date),
+        "attendance_validated": True,
+    }
+    attendances_on_period = (
+        batch.attendances(**filters)
+        if batch is not None
+        else Attendance.objects.filter(**filters)
     )
     present_on = [attendance.attendance_date for attendance in attendances_on_period]
     working_days_between_range = get_working_days(start_date, end_date)[
         "working_days_on"
     ]
-    leave_dates = get_leaves(employee, start_date, end_date)["leave_dates"]
+    leave_dates = get_leaves(employee, start_date, end_date, batch)["leave_dates"]
+    holiday_dates = set(get_holiday_dates(start_date, end_date))
+    company_leave_dates = set(
+        get_company_leave_dates(start_date.year)
+        + get_company_leave_dates(end_date.year)
+    )
     conflict_dates = list(
         set(working_days_between_range) - set(attendances_on_period) - set(leave_dates)
     )
     conflict_dates = conflict_dates + [
         date
         for date in present_on
-        if date in get_holiday_dates(start_date, end_date)
-        or date
-        in list(
-            set(
-                get_company_leave_dates(start_date.year)
-                + get_company_leave_dates(end_date.year)
-            )
-        )
+        if date in holiday_dates or date in company_leave_dates
     ]
 
     return {
@@ -272,7 +230,7 @@ def get_attendance(employee, start_date, end_date):
     }
 
 
-def hourly_computation(employee, wage, start_date, end_date):
+def hourly_computation(employee, wage, start_date, end_date, batch=None):
     """
     Hourly salary computation for period.
 
@@ -281,8 +239,9 @@ def hourly_computation(employee, wage, start_date, end_date):
         wage (float): wage of the employee
         start_date (obj): start of the pay period
         end_date (obj): end date of the period
+        batch (PayrollBatch): prefetched pay run data, optional
     """
-    attendance_data = get_attendance(employee, start_date, end_date)
+    attendance_data = get_attendance(employee, start_date, end_date, batch)
     attendances_on_period = attendance_data["attendances_on_period"]
     total_worked_hour_in_second = 0
     for attendance in attendances_on_period:
@@ -328,7 +287,70 @@ def find_half_day_leaves():
     }
 
 
-def daily_computation(employee, wage, start_date, end_date):
+def get_unpaid_half_day_leaves(employee, start_date, end_date, batch=None):
+    """
+    This method is used to return the unpaid half day leaves of the employee
+    starting or ending between the period
+
+    Args:
+        employee (obj): Employee instance
+        start_date (obj): start date of the period
+        end_date (obj): end date of the period
+        batch (PayrollBatch): prefetched pay run data, optional
+    """
+    if batch is not None:
+        unpaid_leaves = [
+            leave
+            for leave in batch.approved_leaves(employee)
+            if leave.leave_type_id.payment == "unpaid"
+        ]
+        half_day_leaves_between_period_on_start_date = len(
+            [
+                leave
+                for leave in unpaid_leaves
+                if start_date <= leave.start_date <= end_date
+                and leave.start_date_breakdown != "full_day"
+            ]
+        )
+        half_day_leaves_between_period_on_end_date = len(
+            [
+                leave
+                for leave in unpaid_leaves
+                if leave.end_date is not None
+                and start_date <= leave.end_date <= end_date
+                and leave.end_date_breakdown != "full_day"
+                and leave.start_date != leave.end_date
+            ]
+        )
+    else:
+        date_range = get_date_range(start_date, end_date)
+        half_day_leaves_between_period_on_start_date = (
+            employee.leaverequest_set.filter(
+                leave_type_id__payment="unpaid",
+                start_date__in=date_range,
+                status="approved",
+            )
+            .exclude(start_date_breakdown="full_day")
+            .count()
+        )
+
+        half_day_leaves_between_period_on_end_date = (
+            employee.leaverequest_set.filter(
+                leave_type_id__payment="unpaid",
+                end_date__in=date_range,
+                status="approved",
+            )
+            .exclude(end_date_breakdown="full_day")
+            .exclude(start_date=F("end_date"))
+            .count()
+        )
+    return (
+        half_day_leaves_between_period_on_start_date
+        + half_day_leaves_between_period_on_end_date
+    ) * 0.5
+
+
+def daily_computation(employee, wage, start_date, end_date, batch=None):
     """
     Hourly salary computation for period.
 
@@ -337,43 +359,27 @@ def daily_computation(employee, wage, start_date, end_date):
         wage (float): wage of the employee
         start_date (obj): start of the pay period
         end_date (obj): end date of the period
+        batch (PayrollBatch): prefetched pay run data, optional
     """
     working_day_data = get_working_days(start_date, end_date)
     total_working_days = working_day_data["total_working_days"]
 
-    leave_data = get_leaves(employee, start_date, end_date)
+    leave_data = get_leaves(employee, start_date, end_date, batch)
 
-    contract = employee.contract_set.filter(contract_status="active").first()
     basic_pay = wage * total_working_days
     loss_of_pay = 0
 
-    date_range = get_date_range(start_date, end_date)
-    half_day_leaves_between_period_on_start_date = (
-        employee.leaverequest_set.filter(
-            leave_type_id__payment="unpaid",
-            start_date__in=date_range,
-            status="approved",
-        )
-        .exclude(start_date_breakdown="full_day")
-        .count()
+    unpaid_half_leaves = get_unpaid_half_day_leaves(
+        employee, start_date, end_date, batch
     )
 
-    half_day_leaves_between_period_on_end_date = (
-        employee.leaverequest_set.filter(
-            leave_type_id__payment="unpaid", end_date__in=date_range, status="approved"
-        )
-        .exclude(end_date_breakdown="full_day")
-        .exclude(start_date=F("end_date"))
-        .count()
+    contract = (
+        batch.contract(employee, is_active=True, contract_status="active")
+        if batch is not None
+        else employee.contract_set.filter(
+            is_active=True, contract_status="active"
+        ).first()
     )
-    unpaid_half_leaves = (
-        half_day_leaves_between_period_on_start_date
-        + half_day_leaves_between_period_on_end_date
-    ) * 0.5
-
-    contract = employee.contract_set.filter(
-        is_active=True, contract_status="active"
-    ).first()
 
     unpaid_leaves = leave_data["unpaid_leaves"] - unpaid_half_leaves
     if contract.calculate_daily_leave_amount:
@@ -463,7 +469,7 @@ def months_between_range(wage, start_date, end_date):
     return months_data
 
 
-def monthly_computation(employee, wage, start_date, end_date):
+def monthly_computation(employee, wage, start_date, end_date, batch=None):
     """
     Hourly salary computation for period.
 
@@ -472,46 +478,30 @@ def monthly_computation(employee, wage, start_date, end_date):
         wage (float): wage of the employee
         start_date (obj): start of the pay period
         end_date (obj): end date of the period
+        batch (PayrollBatch): prefetched pay run data, optional
     """
     basic_pay = 0
     month_data = months_between_range(wage, start_date, end_date)
 
-    leave_data = get_leaves(employee, start_date, end_date)
+    leave_data = get_leaves(employee, start_date, end_date, batch)
 
     for data in month_data:
         basic_pay = basic_pay + (
             data["working_days_on_period"] * data["per_day_amount"]
         )
 
-    contract = employee.contract_set.filter(contract_status="active").first()
     loss_of_pay = 0
-    date_range = get_date_range(start_date, end_date)
-    half_day_leaves_between_period_on_start_date = (
-        employee.leaverequest_set.filter(
-            leave_type_id__payment="unpaid",
-            start_date__in=date_range,
-            status="approved",
-        )
-        .exclude(start_date_breakdown="full_day")
-        .count()
+    unpaid_half_leaves = get_unpaid_half_day_leaves(
+        employee, start_date, end_date, batch
     )
 
-    half_day_leaves_between_period_on_end_date = (
-        employee.leaverequest_set.filter(
-            leave_type_id__payment="unpaid", end_date__in=date_range, status="approved"
-        )
-        .exclude(end_date_breakdown="full_day")
-        .exclude(start_date=F("end_date"))
-        .count()
+    contract = (
+        batch.contract(employee, is_active=True, contract_status="active")
+        if batch is not None
+        else employee.contract_set.filter(
+            is_active=True, contract_status="active"
+        ).first()
     )
-    unpaid_half_leaves = (
-        half_day_leaves_between_period_on_start_date
-        + half_day_leaves_between_period_on_end_date
-    ) * 0.5
-
-    contract = employee.contract_set.filter(
-        is_active=True, contract_status="active"
-    ).first()
     unpaid_leaves = abs(leave_data["unpaid_leaves"] - unpaid_half_leaves)
     daily_computed_salary = get_daily_salary(wage=wage, wage_date=start_date)[
         "day_wage"
@@ -531,7 +521,7 @@ def monthly_computation(employee, wage, start_date, end_date):
     }
 
 
-def compute_salary_on_period(employee, start_date, end_date, wage=None):
+def compute_salary_on_period(employee, start_date, end_date, wage=None, batch=None):
     """
     This method is used to compute salary on the start to end date period
 
@@ -539,10 +529,15 @@ def compute_salary_on_period(employee, start_date, end_date, wage=None):
         employee (obj): Employee instance
         start_date (obj): start date of the period
         end_date (obj): end date of the period
-    """
-    contract = Contract.objects.filter(
-        employee_id=employee, contract_status="active"
-    ).first()
+        batch (PayrollBatch): prefetched pay run data, optional
+    """
+    contract = (
+        batch.contract(employee, contract_status="active")
+        if batch is not None
+        else Contract.objects.filter(
+            employee_id=employee, contract_status="active"
+        ).first()
+    )
     if contract is None:
         return contract
 
@@ -550,16 +545,16 @@ def compute_salary_on_period(employee, start_date, end_date, wage=None):
     wage_type = contract.wage_type
     data = None
     if wage_type == "hourly":
-        data = hourly_computation(employee, wage, start_date, end_date)
+        data = hourly_computation(employee, wage, start_date, end_date, batch)
         month_data = months_between_range(wage, start_date, end_date)
         data["month_data"] = month_data
     elif wage_type == "daily":
-        data = daily_computation(employee, wage, start_date, end_date)
+        data = daily_computation(employee, wage, start_date, end_date, batch)
         month_data = months_between_range(wage, start_date, end_date)
         data["month_data"] = month_data
 
     else:
-        data = monthly_computation(employee, wage, start_date, end_date)
+        data = monthly_computation(employee, wage, start_date, end_date, batch)
     data["contract_wage"] = wage
     data["contract"] = contract
     return data
@@ -569,9 +564,7 @@ def paginator_qry(qryset, page_number):
     """
     This method is used to paginate queryset
     """
-    paginator = Paginator(qryset, 50)
-    qryset = paginator.get_page(page_number)
-    return qryset
+    return paginate(qryset, page_number)
 
 
 def save_payslip(**kwargs):
@@ -597,3 +590,57 @@ def save_payslip(**kwargs):
     instance.pay_head_data = kwargs["pay_data"]
     instance.save()
     return instance
+
+
+PAYSLIP_FIELDS = [
+    "group_name",
+    "status",
+    "basic_pay",
+    "contract_wage",
+    "gross_pay",
+    "deduction",
+    "net_pay",
+    "pay_head_data",
+]
+
+
+def save_payslips(payslips_data):
+    """
+    This method is used to save a group of generated payslips, like save_payslip,
+    with one query to find the existing payslips, one bulk_update and one bulk_create
+    """
+    existing = {}
+    if payslips_data:
+        for payslip in Payslip.objects.filter(
+            employee_id__in=[data["employee"].pk for data in payslips_data],
+            start_date__in={data["start_date"] for data in payslips_data},
+            end_date__in={data["end_date"] for data in payslips_data},
+        ):
+            existing.setdefault(
+                (payslip.employee_id_id, payslip.start_date, payslip.end_date), payslip
+            )
+    to_create = []
+    to_update = []
+    for data in payslips_data:
+        key = (data["employee"].pk, data["start_date"], data["end_date"])
+        instance = existing.get(key)
+        if instance is None:
+            instance = Payslip(
+                employee_id=data["employee"],
+                start_date=data["start_date"],
+                end_date=data["end_date"],
+            )
+            to_create.append(instance)
+        else:
+            to_update.append(instance)
+        instance.group_name = data.get("group_name")
+        instance.status = data["status"]
+        instance.basic_pay = round(data["basic_pay"], 2)
+        instance.contract_wage = round(data["contract_wage"], 2)
+        instance.gross_pay = round(data["gross_pay"], 2)
+        instance.deduction = round(data["deduction"], 2)
+        instance.net_pay = round(data["net_pay"], 2)
+        instance.pay_head_data = data["pay_data"]
+    Payslip.objects.bulk_update(to_update, PAYSLIP_FIELDS)
+    Payslip.objects.bulk_create(to_create)
+    return to_update + to_create
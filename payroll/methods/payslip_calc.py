@@ -55,7 +55,7 @@ filter_mapping = {
 }
 
 
-def dynamic_attr(obj, attribute_path):
+def dynamic_attr(obj, attribute_path, batch=None):
     """
     Retrieves the value of a nested attribute from a related object dynamically.
 
@@ -63,6 +63,7 @@ def dynamic_attr(obj, attribute_path):
         obj: The base object from which to start accessing attributes.
         attribute_path (str): The path of the nested attribute to retrieve, using
         double underscores ('__') to indicate relationship traversal.
+        batch (PayrollBatch): prefetched pay run data, optional
 
     Returns:
         The value of the nested attribute if it exists, or None if it doesn't exist.
@@ -70,6 +71,11 @@ def dynamic_attr(obj, attribute_path):
     attributes = attribute_path.split("__")
 
     for attr in attributes:
+        if batch is not None and attr == "contract_set":
+            obj = batch.contract(obj, is_active=True)
+            if obj is None:
+                break
+            continue
         with contextlib.suppress(Exception):
             if isinstance(obj.first(), Contract):
                 obj = obj.filter(is_active=True).first()
@@ -151,19 +157,25 @@ def calculate_allowance(**kwargs):
     end_date = kwargs["end_date"]
     basic_pay = kwargs["basic_pay"]
     day_dict = kwargs["day_dict"]
-    specific_allowances = Allowance.objects.filter(specific_employees=employee)
-    conditional_allowances = Allowance.objects.filter(is_condition_based=True).exclude(
-        exclude_employees=employee
-    )
-    active_employees = Allowance.objects.filter(include_active_employees=True).exclude(
-        exclude_employees=employee
-    )
-
-    allowances = specific_allowances | conditional_allowances | active_employees
-
-    allowances = allowances.exclude(one_time_date__lt=start_date).exclude(
-        one_time_date__gt=end_date
-    )
+    batch = kwargs.get("batch")
+    if batch is not None:
+        allowances = batch.allowances_for(employee, start_date, end_date)
+    else:
+        specific_allowances = Allowance.objects.filter(specific_employees=employee)
+        conditional_allowances = Allowance.objects.filter(
+            is_condition_based=True
+        ).exclude(exclude_employees=employee)
+        active_employees = Allowance.objects.filter(
+            include_active_employees=True
+        ).exclude(exclude_employees=employee)
+
+        allowances = specific_allowances | conditional_allowances | active_employees
+
+        allowances = (
+            allowances.exclude(one_time_date__lt=start_date)
+            .exclude(one_time_date__gt=end_date)
+            .distinct()
+        )
 
     employee_allowances = []
     tax_allowances = []
@@ -176,7 +188,7 @@ def calculate_allowance(**kwargs):
             condition_field = allowance.field
             condition_operator = allowance.condition
             condition_value = allowance.value.lower().replace(" ", "_")
-            employee_value = dynamic_attr(employee, condition_field)
+            employee_value = dynamic_attr(employee, condition_field, batch)
             operator_func = operator_mapping.get(condition_operator)
             if employee_value is not None:
                 condition_value = type(employee_value)(condition_value)
@@ -187,7 +199,12 @@ def calculate_allowance(**kwargs):
                 filter_params = filter_mapping[allowance.based_on]["filter"](
                     employee, allowance, start_date, end_date
                 )
-                if Attendance.objects.filter(**filter_params):
+                attendances = (
+                    batch.attendances(**filter_params)
+                    if batch is not None
+                    else Attendance.objects.filter(**filter_params).exists()
+                )
+                if attendances:
                     employee_allowances.append(allowance)
             else:
                 employee_allowances.append(allowance)
@@ -218,6 +235,7 @@ def calculate_allowance(**kwargs):
                     "total_allowance": None,
                     "basic_pay": basic_pay,
                     "day_dict": day_dict,
+                    "batch": batch,
                 },
             )
             kwargs["amount"] = amount
@@ -243,6 +261,7 @@ def calculate_allowance(**kwargs):
                     "component": allowance,
                     "day_dict": day_dict,
                     "basic_pay": basic_pay,
+                    "batch": batch,
                 }
             )
             kwargs["amount"] = amount
@@ -290,18 +309,25 @@ def calculate_tax_deduction(*_args, **kwargs):
     employee = kwargs["employee"]
     start_date = kwargs["start_date"]
     end_date = kwargs["end_date"]
-    specific_deductions = models.Deduction.objects.filter(
-        specific_employees=employee, is_pretax=False, is_tax=True
-    )
-    active_employee_deduction = models.Deduction.objects.filter(
-        include_active_employees=True, is_pretax=False, is_tax=True
-    ).exclude(exclude_employees=employee)
-    deductions = specific_deductions | active_employee_deduction
-    deductions = (
-        deductions.exclude(one_time_date__lt=start_date)
-        .exclude(one_time_date__gt=end_date)
-        .exclude(update_compensation__isnull=False)
-    )
+    batch = kwargs.get("batch")
+    if batch is not None:
+        deductions = batch.deductions_for(
+            employee, start_date, end_date, is_pretax=False, is_tax=True, conditional=False
+        )
+    else:
+        specific_deductions = models.Deduction.objects.filter(
+            specific_employees=employee, is_pretax=False, is_tax=True
+        )
+        active_employee_deduction = models.Deduction.objects.filter(
+            include_active_employees=True, is_pretax=False, is_tax=True
+        ).exclude(exclude_employees=employee)
+        deductions = specific_deductions | active_employee_deduction
+        deductions = (
+            deductions.exclude(one_time_date__lt=start_date)
+            .exclude(one_time_date__gt=end_date)
+            .exclude(update_compensation__isnull=False)
+            .distinct()
+        )
     deductions_amt = []
     serialized_deductions = []
     for deduction in deductions:
@@ -316,6 +342,7 @@ def calculate_tax_deduction(*_args, **kwargs):
                 "total_allowance": kwargs["total_allowance"],
                 "basic_pay": kwargs["basic_pay"],
                 "day_dict": kwargs["day_dict"],
+                "batch": batch,
             }
         )
         kwargs["amount"] = amount
@@ -349,23 +376,32 @@ def calculate_pre_tax_deduction(*_args, **kwargs):
     employee = kwargs["employee"]
     start_date = kwargs["start_date"]
     end_date = kwargs["end_date"]
+    batch = kwargs.get("batch")
 
-    specific_deductions = models.Deduction.objects.filter(
-        specific_employees=employee, is_pretax=True, is_tax=False
-    )
-    conditional_deduction = models.Deduction.objects.filter(
-        is_condition_based=True, is_pretax=True, is_tax=False
-    ).exclude(exclude_employees=employee)
-    active_employee_deduction = models.Deduction.objects.filter(
-        include_active_employees=True, is_pretax=True, is_tax=False
-    ).exclude(exclude_employees=employee)
-
-    deductions = specific_deductions | conditional_deduction | active_employee_deduction
-    deductions = (
-        deductions.exclude(one_time_date__lt=start_date)
-        .exclude(one_time_date__gt=end_date)
-        .exclude(update_compensation__isnull=False)
-    )
+    if batch is not None:
+        deductions = batch.deductions_for(
+            employee, start_date, end_date, is_pretax=True, is_tax=False
+        )
+    else:
+        specific_deductions = models.Deduction.objects.filter(
+            specific_employees=employee, is_pretax=True, is_tax=False
+        )
+        conditional_deduction = models.Deduction.objects.filter(
+            is_condition_based=True, is_pretax=True, is_tax=False
+        ).exclude(exclude_employees=employee)
+        active_employee_deduction = models.Deduction.objects.filter(
+            include_active_employees=True, is_pretax=True, is_tax=False
+        ).exclude(exclude_employees=employee)
+
+        deductions = (
+            specific_deductions | conditional_deduction | active_employee_deduction
+        )
+        deductions = (
+            deductions.exclude(one_time_date__lt=start_date)
+            .exclude(one_time_date__gt=end_date)
+            .exclude(update_compensation__isnull=False)
+            .distinct()
+        )
     pre_tax_deductions = []
     pre_tax_deductions_amt = []
     serialized_deductions = []
@@ -375,7 +411,7 @@ def calculate_pre_tax_deduction(*_args, **kwargs):
             condition_field = deduction.field
             condition_operator = deduction.condition
             condition_value = deduction.value.lower().replace(" ", "_")
-            employee_value = dynamic_attr(employee, condition_field)
+            employee_value = dynamic_attr(employee, condition_field, batch)
             operator_func = operator_mapping.get(condition_operator)
 
             if employee_value is not None:
@@ -402,6 +438,7 @@ def calculate_pre_tax_deduction(*_args, **kwargs):
                     "total_allowance": kwargs["total_allowance"],
                     "basic_pay": kwargs["basic_pay"],
                     "day_dic": kwargs["day_dict"],
+                    "batch": batch,
                 }
             )
             kwargs["amount"] = amount
@@ -438,21 +475,30 @@ def calculate_post_tax_deduction(*_args, **kwargs):
     total_allowance = kwargs["total_allowance"]
     basic_pay = kwargs["basic_pay"]
     day_dict = kwargs["day_dict"]
-    specific_deductions = models.Deduction.objects.filter(
-        specific_employees=employee, is_pretax=False, is_tax=False
-    )
-    conditional_deduction = models.Deduction.objects.filter(
-        is_condition_based=True, is_pretax=False, is_tax=False
-    ).exclude(exclude_employees=employee)
-    active_employee_deduction = models.Deduction.objects.filter(
-        include_active_employees=True, is_pretax=False, is_tax=False
-    ).exclude(exclude_employees=employee)
-    deductions = specific_deductions | conditional_deduction | active_employee_deduction
-    deductions = (
-        deductions.exclude(one_time_date__lt=start_date)
-        .exclude(one_time_date__gt=end_date)
-        .exclude(update_compensation__isnull=False)
-    )
+    batch = kwargs.get("batch")
+    if batch is not None:
+        deductions = batch.deductions_for(
+            employee, start_date, end_date, is_pretax=False, is_tax=False
+        )
+    else:
+        specific_deductions = models.Deduction.objects.filter(
+            specific_employees=employee, is_pretax=False, is_tax=False
+        )
+        conditional_deduction = models.Deduction.objects.filter(
+            is_condition_based=True, is_pretax=False, is_tax=False
+        ).exclude(exclude_employees=employee)
+        active_employee_deduction = models.Deduction.objects.filter(
+            include_active_employees=True, is_pretax=False, is_tax=False
+        ).exclude(exclude_employees=employee)
+        deductions = (
+            specific_deductions | conditional_deduction | active_employee_deduction
+        )
+        deductions = (
+            deductions.exclude(one_time_date__lt=start_date)
+            .exclude(one_time_date__gt=end_date)
+            .exclude(update_compensation__isnull=False)
+            .distinct()
+        )
     post_tax_deductions = []
     post_tax_deductions_amt = []
     serialized_deductions = []
@@ -463,7 +509,7 @@ def calculate_post_tax_deduction(*_args, **kwargs):
             condition_field = deduction.field
             condition_operator = deduction.condition
             condition_value = deduction.value.lower().replace(" ", "_")
-            employee_value = dynamic_attr(employee, condition_field)
+            employee_value = dynamic_attr(employee, condition_field, batch)
             operator_func = operator_mapping.get(condition_operator)
             if employee_value is not None:
                 condition_value = type(employee_value)(condition_value)
@@ -491,6 +537,7 @@ def calculate_post_tax_deduction(*_args, **kwargs):
                         "total_allowance": total_allowance,
                         "basic_pay": basic_pay,
                         "day_dict": day_dict,
+                        "batch": batch,
                     }
                 )
                 kwargs["amount"] = amount
@@ -695,12 +742,18 @@ def calculate_based_on_attendance(*_args, **kwargs):
     end_date = kwargs["end_date"]
     component = kwargs["component"]
     day_dict = kwargs["day_dict"]
+    batch = kwargs.get("batch")
 
-    count = Attendance.objects.filter(
-        employee_id=employee,
-        attendance_date__range=(start_date, end_date),
-        attendance_validated=True,
-    ).count()
+    filters = {
+        "employee_id": employee,
+        "attendance_date__range": (start_date, end_date),
+        "attendance_validated": True,
+    }
+    count = (
+        len(batch.attendances(**filters))
+        if batch is not None
+        else Attendance.objects.filter(**filters).count()
+    )
     amount = count * component.per_attendance_fixed_amount
 
     amount = compute_limit(component, amount, day_dict)
@@ -727,14 +780,20 @@ def calculate_based_on_shift(*_args, **kwargs):
     end_date = kwargs["end_date"]
     component = kwargs["component"]
     day_dict = kwargs["day_dict"]
+    batch = kwargs.get("batch")
 
     shift_id = component.shift_id.id
-    count = Attendance.objects.filter(
-        employee_id=employee,
-        shift_id=shift_id,
-        attendance_date__range=(start_date, end_date),
-        attendance_validated=True,
-    ).count()
+    filters = {
+        "employee_id": employee,
+        "shift_id": shift_id,
+        "attendance_date__range": (start_date, end_date),
+        "attendance_validated": True,
+    }
+    count = (
+        len(batch.attendances(**filters))
+        if batch is not None
+        else Attendance.objects.filter(**filters).count()
+    )
     amount = count * component.shift_per_attendance_amount
 
     amount = compute_limit(component, amount, day_dict)
@@ -761,11 +820,17 @@ def calculate_based_on_overtime(*_args, **kwargs):
     end_date = kwargs["end_date"]
     component = kwargs["component"]
     day_dict = kwargs["day_dict"]
+    batch = kwargs.get("batch")
 
-    attendances = Attendance.objects.filter(
-        employee_id=employee,
-        attendance_date__range=(start_date, end_date),
-        attendance_overtime_approve=True,
+    filters = {
+        "employee_id": employee,
+        "attendance_date__range": (start_date, end_date),
+        "attendance_overtime_approve": True,
+    }
+    attendances = (
+        batch.attendances(**filters)
+        if batch is not None
+        else Attendance.objects.filter(**filters)
     )
     overtime = sum(attendance.overtime_second for attendance in attendances)
     amount_per_hour = component.amount_per_one_hr
@@ -799,14 +864,20 @@ def calculate_based_on_work_type(*_args, **kwargs):
     end_date = kwargs["end_date"]
     component = kwargs["component"]
     day_dict = kwargs["day_dict"]
+    batch = kwargs.get("batch")
 
     work_type_id = component.work_type_id.id
-    count = Attendance.objects.filter(
-        employee_id=employee,
-        work_type_id=work_type_id,
-        attendance_date__range=(start_date, end_date),
-        attendance_validated=True,
-    ).count()
+    filters = {
+        "employee_id": employee,
+        "work_type_id": work_type_id,
+        "attendance_date__range": (start_date, end_date),
+        "attendance_validated": True,
+    }
+    count = (
+        len(batch.attendances(**filters))
+        if batch is not None
+        else Attendance.objects.filter(**filters).count()
+    )
     amount = count * component.work_type_per_attendance_amount
 
     amount = compute_limit(component, amount, day_dict)
@@ -0,0 +1,148 @@
+"""
+payslip_jobs.py
+
+This module is used to generate the payslips of a PayslipJob in the background.
+
+The employees of a job are split in chunks, and each chunk is computed with
+batch_payroll_calculation and saved with save_payslips on a local thread pool.
+The job records the employees of every finished chunk and a heartbeat, so a job
+whose worker died is resumed from its pending employees.
+"""
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+from base import company_scope
+from employee.models import Employee
+from payroll.models.models import PayslipJob
+from payroll.methods.methods import save_payslips
+
+CHUNK_SIZE = getattr(settings, "PAYSLIP_JOB_CHUNK_SIZE", 50)
+WORKERS = getattr(settings, "PAYSLIP_JOB_WORKERS", 4)
+STALE_AFTER = timedelta(
+    seconds=getattr(settings, "PAYSLIP_JOB_STALE_AFTER_SECONDS", 300)
+)
+
+_executor = None
+_lock = threading.Lock()
+# the chunks are computed in parallel, their writes are serialised so a SQLite
+# database is not locked by concurrent write transactions
+_write_lock = threading.Lock()
+
+
+def get_executor():
+    """
+    Returns the thread pool of the payslip jobs, created on first use
+    """
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=WORKERS, thread_name_prefix="payslip-job"
+            )
+    return _executor
+
+
+def submit_payslip_job(job):
+    """
+    Queues the pending employees of the job on the thread pool
+    """
+    pending = job.pending_employee_ids()
+    job.status = "running" if pending else "completed"
+    job.heartbeat = timezone.now()
+    job.save()
+    executor = get_executor()
+    for index in range(0, len(pending), CHUNK_SIZE):
+        transaction.on_commit(
+            lambda chunk=pending[index : index + CHUNK_SIZE]: executor.submit(
+                run_chunk, job.pk, chunk
+            )
+        )
+    return job
+
+
+def resume_stale_job(job):
+    """
+    Re-queues a running job whose heartbeat is older than STALE_AFTER, which
+    happens when the process running it died. The heartbeat is claimed with a
+    conditional update, so only one process resumes the job.
+    """
+    if job.status != "running" or job.heartbeat is None:
+        return False
+    now = timezone.now()
+    if now - job.heartbeat < STALE_AFTER:
+        return False
+    claimed = PayslipJob.objects.filter(pk=job.pk, heartbeat=job.heartbeat).update(
+        heartbeat=now
+    )
+    if not claimed:
+        return False
+    job.refresh_from_db()
+    submit_payslip_job(job)
+    return True
+
+
+def payslip_data(payslip, group_name):
+    """
+    Returns the save_payslips arguments of a calculated payslip
+    """
+    return {
+        "employee": payslip["employee"],
+        "group_name": group_name,
+        "start_date": payslip["start_date"],
+        "end_date": payslip["end_date"],
+        "status": "draft",
+        "contract_wage": payslip["contract_wage"],
+        "basic_pay": payslip["basic_pay"],
+        "gross_pay": payslip["gross_pay"],
+        "deduction": payslip["total_deductions"],
+        "net_pay": payslip["net_pay"],
+        "pay_data": json.loads(payslip["json_data"]),
+    }
+
+
+def run_chunk(job_id, employee_ids):
+    """
+    Generates and saves the payslips of a chunk of the job employees, scoped to
+    the company the job was submitted in
+    """
+    # imported here, the payroll views import this module
+    from payroll.views.component_views import batch_payroll_calculation
+
+    close_old_connections()
+    try:
+        job = PayslipJob.objects.get(pk=job_id)
+        if job.status != "running":
+            return
+        with _write_lock:
+            PayslipJob.objects.filter(pk=job_id).update(heartbeat=timezone.now())
+        with company_scope.active_company(job.company_id_id):
+            employees = Employee.objects.filter(pk__in=employee_ids)
+            payslips = batch_payroll_calculation(
+                employees, job.start_date, job.end_date
+            )
+        with _write_lock, transaction.atomic():
+            save_payslips(
+                [payslip_data(payslip, job.group_name) for payslip in payslips]
+            )
+            job = PayslipJob.objects.select_for_update().get(pk=job_id)
+            completed = set(job.completed_employee_ids)
+            job.completed_employee_ids += [
+                employee_id
+                for employee_id in employee_ids
+                if employee_id not in completed
+            ]
+            job.heartbeat = timezone.now()
+            if not job.pending_employee_ids():
+                job.status = "completed"
+            job.save()
+    except Exception as error:
+        with _write_lock:
+            PayslipJob.objects.filter(pk=job_id).update(
+                status="failed", error=str(error)
+            )
+    finally:
+        close_old_connections()
@@ -32,7 +32,14 @@ def calculate_taxable_amount(**kwargs):
     start_date = kwargs["start_date"]
     end_date = kwargs["end_date"]
     basic_pay = kwargs["basic_pay"]
-    contract = Contract.objects.filter(employee_id=employee,contract_status='active').first()
+    batch = kwargs.get("batch")
+    contract = (
+        batch.contract(employee, contract_status="active")
+        if batch is not None
+        else Contract.objects.filter(
+            employee_id=employee, contract_status="active"
+        ).first()
+    )
     filing = contract.filing_status
     federal_tax_for_period = 0
     if filing is not None:
@@ -54,13 +61,17 @@ def calculate_taxable_amount(**kwargs):
         total_days = (check_end_date - check_start_date).days + 1
         yearly_income = income / num_days * total_days
         yearly_income = round(yearly_income, 2)
-        tax_brackets = TaxBracket.objects.filter(filing_status_id=filing).order_by(
-            "min_income"
+        tax_brackets = (
+            batch.tax_brackets(filing)
+            if batch is not None
+            else TaxBracket.objects.filter(filing_status_id=filing).order_by(
+                "min_income"
+            )
         )
         federal_tax = 0
         remaining_income = yearly_income
-        if tax_brackets.exists():
-            if tax_brackets.first().min_income <= yearly_income:
+        if tax_brackets:
+            if tax_brackets[0].min_income <= yearly_income:
                 for tax_bracket in tax_brackets:
                     min_income = tax_bracket.min_income
                     max_income = tax_bracket.max_income
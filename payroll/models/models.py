@@ -12,6 +12,7 @@ from django.db.models.signals import pre_save, pre_delete
 from django.http import QueryDict
 from employee.models import EmployeeWorkInformation
 from employee.models import Employee, Department, JobPosition
+from employee.signals import work_info_imported
 from base.models import Company, EmployeeShift, WorkType, JobRole
 from base.horilla_company_manager import HorillaCompanyManager
 from attendance.models import (
@@ -21,6 +22,7 @@ from attendance.models import (
     Attendance,
     strtime_seconds,
 )
+from attendance.signals import attendances_created
 
 from leave.models import LeaveRequest
 
@@ -384,6 +386,46 @@ class WorkRecord(models.Model):
         )
 
 
+def attendance_work_record(instance, work_record, has_other_record):
+    """
+    Fills the work record of an attendance, a new one when work_record is None
+
+    Args:
+        instance (obj): Attendance instance
+        work_record (obj): the attendance work record of the day or None
+        has_other_record (bool): the employee has a leave work record on the day
+    """
+    min_hour_second = strtime_seconds(instance.minimum_hour)
+    at_work_second = strtime_seconds(instance.attendance_worked_hour)
+    status = "FDP" if instance.at_work_second >= min_hour_second else "HDP"
+    status = (
+        "CONF"
+        if has_other_record or instance.attendance_validated is False
+        else status
+    )
+    message = _("Validate the attendance") if status == "CONF" else _("Validated")
+    message = (
+        _("Incomplete minimum hour")
+        if status == "HDP" and min_hour_second / 2 > at_work_second
+        else message
+    )
+    work_record = work_record if work_record is not None else WorkRecord()
+    work_record.employee_id = instance.employee_id
+    work_record.date = instance.attendance_date
+    work_record.at_work = instance.attendance_worked_hour
+    work_record.min_hour = instance.minimum_hour
+    work_record.min_hour_second = min_hour_second
+    work_record.at_work_second = at_work_second
+    work_record.work_record_type = status
+    work_record.message = message
+    work_record.is_attendance_record = True
+    if instance.attendance_validated:
+        work_record.day_percentage = (
+            1.00 if at_work_second > min_hour_second / 2 else 0.50
+        )
+    return work_record
+
+
 class OverrideAttendance(Attendance):
     """
     Class to override Attendance model save method
@@ -395,52 +437,64 @@ class OverrideAttendance(Attendance):
         """
         Overriding Attendance model save method
         """
-        min_hour_second = strtime_seconds(instance.minimum_hour)
-        at_work_second = strtime_seconds(instance.attendance_worked_hour)
-        status = "FDP" if instance.at_work_second >= min_hour_second else "HDP"
-        status = (
-            "CONF"
-            if WorkRecord.objects.filter(
-                date=instance.attendance_date,
-                is_attendance_record=False,
-                employee_id=instance.employee_id,
-            ).exists()
-            or instance.attendance_validated is False
-            else status
-        )
-        message = _("Validate the attendance") if status == "CONF" else _("Validated")
-        message = (
-            _("Incomplete minimum hour")
-            if status == "HDP" and min_hour_second / 2 > at_work_second
-            else message
-        )
-        work_record = (
-            WorkRecord()
-            if not WorkRecord.objects.filter(
-                is_attendance_record=True,
-                date=instance.attendance_date,
-                employee_id=instance.employee_id,
-            ).exists()
-            else WorkRecord.objects.filter(
-                is_attendance_record=True,
-                date=instance.attendance_date,
-                employee_id=instance.employee_id,
-            ).first()
+        work_record = WorkRecord.objects.filter(
+            is_attendance_record=True,
+            date=instance.attendance_date,
+            employee_id=instance.employee_id,
+        ).first()
+        has_other_record = WorkRecord.objects.filter(
+            date=instance.attendance_date,
+            is_attendance_record=False,
+            employee_id=instance.employee_id,
+        ).exists()
+        attendance_work_record(instance, work_record, has_other_record).save()
+
+    @receiver(attendances_created)
+    def attendances_created_work_records(sender, attendances, **_kwargs):
+        """
+        Creates or updates the work records of attendances created in bulk, with
+        one query for the existing work records
+        """
+        if not attendances:
+            return
+        dates = [attendance.attendance_date for attendance in attendances]
+        records = WorkRecord.objects.filter(
+            employee_id__in={attendance.employee_id_id for attendance in attendances},
+            date__range=(min(dates), max(dates)),
         )
-        work_record.employee_id = instance.employee_id
-        work_record.date = instance.attendance_date
-        work_record.at_work = instance.attendance_worked_hour
-        work_record.min_hour = instance.minimum_hour
-        work_record.min_hour_second = min_hour_second
-        work_record.at_work_second = at_work_second
-        work_record.work_record_type = status
-        work_record.message = message
-        work_record.is_attendance_record = True
-        if instance.attendance_validated:
-            work_record.day_percentage = (
-                1.00 if at_work_second > min_hour_second / 2 else 0.50
+        attendance_records = {}
+        other_records = set()
+        for record in records:
+            key = (record.employee_id_id, record.date)
+            if record.is_attendance_record:
+                attendance_records.setdefault(key, record)
+            else:
+                other_records.add(key)
+        to_create = []
+        to_update = []
+        for attendance in attendances:
+            key = (attendance.employee_id_id, attendance.attendance_date)
+            work_record = attendance_work_record(
+                attendance, attendance_records.get(key), key in other_records
             )
-        work_record.save()
+            if work_record.pk is None:
+                to_create.append(work_record)
+            else:
+                to_update.append(work_record)
+        WorkRecord.objects.bulk_create(to_create, batch_size=500)
+        WorkRecord.objects.bulk_update(
+            to_update,
+            [
+                "at_work",
+                "min_hour",
+                "min_hour_second",
+                "at_work_second",
+                "work_record_type",
+                "message",
+                "day_percentage",
+            ],
+            batch_size=500,
+        )
 
     @receiver(pre_delete, sender=Attendance)
     def attendance_pre_delete(sender, instance, **_kwargs):
@@ -554,6 +608,44 @@ class OverrideWorkInfo(EmployeeWorkInformation):
                 )
                 contract.save()
 
+    @receiver(work_info_imported)
+    def work_info_imported_contracts(sender, employees, **_kwargs):
+        """
+        Creates the contracts of the imported active employees without one,
+        with one query for the existing contracts
+        """
+        with_contract = set(
+            Contract.objects.filter(employee_id__in=employees).values_list(
+                "employee_id", flat=True
+            )
+        )
+        work_infos = {
+            work_info.employee_id_id: work_info
+            for work_info in EmployeeWorkInformation.objects.filter(
+                employee_id__in=employees
+            )
+        }
+        contracts = []
+        for employee in employees:
+            if not employee.is_active or employee.pk in with_contract:
+                continue
+            work_info = work_infos.get(employee.pk)
+            contract = Contract(
+                contract_name=f"{employee}'s Contract",
+                employee_id=employee,
+                contract_start_date=datetime.today(),
+                wage=0,
+            )
+            if work_info is not None:
+                contract.wage = work_info.basic_salary or 0
+                contract.department_id = work_info.department_id_id
+                contract.job_position_id = work_info.job_position_id_id
+                contract.job_role_id = work_info.job_role_id_id
+                contract.work_type_id = work_info.work_type_id_id
+                contract.shift_id = work_info.shift_id_id
+            contracts.append(contract)
+        Contract.objects.bulk_create(contracts, batch_size=500)
+
 
 # Create your models here.
 def rate_validator(value):
@@ -1238,3 +1330,61 @@ class Payslip(models.Model):
         ordering = [
             "-end_date",
         ]
+
+
+class PayslipJob(models.Model):
+    """
+    PayslipJob model, used to generate the payslips of a group of employees
+    in the background
+    """
+
+    status_choices = [
+        ("pending", _("Pending")),
+        ("running", _("Running")),
+        ("completed", _("Completed")),
+        ("failed", _("Failed")),
+    ]
+    group_name = models.CharField(max_length=50, null=True, blank=True)
+    start_date = models.DateField()
+    end_date = models.DateField()
+    employee_ids = models.JSONField(default=list)
+    completed_employee_ids = models.JSONField(default=list)
+    status = models.CharField(max_length=20, default="pending", choices=status_choices)
+    error = models.TextField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    heartbeat = models.DateTimeField(null=True, blank=True)
+    company_id = models.ForeignKey(
+        Company, null=True, editable=False, on_delete=models.PROTECT
+    )
+    objects = HorillaCompanyManager()
+
+    def __str__(self) -> str:
+        return f"Payslip job {self.group_name} - Period: {self.start_date} to {self.end_date}"
+
+    def pending_employee_ids(self):
+        """
+        Returns the employees whose payslips are not generated yet
+        """
+        completed = set(self.completed_employee_ids)
+        return [
+            employee_id
+            for employee_id in self.employee_ids
+            if employee_id not in completed
+        ]
+
+    def progress(self):
+        """
+        Returns the percentage of the generated payslips
+        """
+        if not self.employee_ids:
+            return 100
+        return int(len(self.completed_employee_ids) * 100 / len(self.employee_ids))
+
+    class Meta:
+        """
+        Meta class for additional options
+        """
+
+        ordering = [
+            "-created_at",
+        ]
@@ -4,10 +4,11 @@ scheduler.py
 This module is used to register scheduled tasks
 """
 from datetime import date
-from apscheduler.schedulers.background import BackgroundScheduler
+from horilla.scheduler import scheduled_job
 from .models.models import Contract
 
 
+@scheduled_job("interval", seconds=10)
 def generate_work_entry():
     """
     This is a automated task on time
@@ -15,6 +16,7 @@ def generate_work_entry():
     return
 
 
+@scheduled_job("interval", seconds=5)
 def expire_contract():
     """
     Finds all active contracts whose end date is earlier than the current date 
@@ -25,8 +27,3 @@ def expire_contract():
     ).update(contract_status="expired")
     return
 
-
-scheduler = BackgroundScheduler()
-scheduler.add_job(generate_work_entry, "interval", seconds=10)
-scheduler.add_job(expire_contract, "interval", seconds=5)
-scheduler.start()
@@ -48,6 +48,16 @@ urlpatterns = [
     ),
     path("create-payslip", component_views.create_payslip, name="create-payslip"),
     path("generate-payslip", component_views.generate_payslip, name="generate-payslip"),
+    path(
+        "payslip-job/<int:job_id>/",
+        component_views.payslip_job,
+        name="payslip-job",
+    ),
+    path(
+        "payslip-job-progress/<int:job_id>/",
+        component_views.payslip_job_progress,
+        name="payslip-job-progress",
+    ),
     path(
         "validate-start-date",
         component_views.validate_start_date,
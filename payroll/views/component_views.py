@@ -12,13 +12,18 @@ from django.http import HttpResponse, JsonResponse
 from django.shortcuts import render, redirect
 from django.contrib import messages
 from django.utils.translation import gettext_lazy as _
-import pandas as pd
 from employee.models import Employee
-from horilla.decorators import login_required, permission_required
+from horilla.decorators import (
+    login_required,
+    permission_required,
+    hx_request_required,
+)
+from base import company_scope
 from base.methods import get_key_instances
 from base.methods import closest_numbers
+from base.export import export_response, export_rows
 import payroll.models.models
-from payroll.models.models import Allowance, Deduction, Payslip
+from payroll.models.models import Allowance, Deduction, Payslip, PayslipJob
 from payroll.methods.payslip_calc import (
     calculate_allowance,
     calculate_gross_pay,
@@ -41,6 +46,8 @@ from payroll.methods.methods import (
     save_payslip,
 )
 from payroll.methods.deductions import update_compensation_deduction
+from payroll.methods.batch import PayrollBatch
+from payroll.methods.payslip_jobs import resume_stale_job, submit_payslip_job
 
 operator_mapping = {
     "equal": operator.eq,
@@ -53,7 +60,7 @@ operator_mapping = {
 }
 
 
-def payroll_calculation(employee, start_date, end_date):
+def payroll_calculation(employee, start_date, end_date, batch=None):
     """
     Calculate payroll components for the specified employee within the given date range.
 
@@ -62,13 +69,17 @@ def payroll_calculation(employee, start_date, end_date):
         employee (Employee): The employee for whom the payroll is calculated.
         start_date (date): The start date of the payroll period.
         end_date (date): The end date of the payroll period.
+        batch (PayrollBatch): Prefetched pay run data, to compute without
+            querying per employee.
 
 
     Returns:
         dict: A dictionary containing the calculated payroll components:
     """
 
-    basic_pay_details = compute_salary_on_period(employee, start_date, end_date)
+    basic_pay_details = compute_salary_on_period(
+        employee, start_date, end_date, batch=batch
+    )
     contract = basic_pay_details["contract"]
     contract_wage = basic_pay_details["contract_wage"]
     basic_pay = basic_pay_details["basic_pay"]
@@ -77,7 +88,7 @@ def payroll_calculation(employee, start_date, end_date):
     working_days_details = basic_pay_details["month_data"]
 
     updated_basic_pay_data = update_compensation_deduction(
-        employee, basic_pay, "basic_pay", start_date, end_date
+        employee, basic_pay, "basic_pay", start_date, end_date, batch
     )
     basic_pay = updated_basic_pay_data["compensation_amount"]
     basic_pay_deductions = updated_basic_pay_data["deductions"]
@@ -94,6 +105,7 @@ def payroll_calculation(employee, start_date, end_date):
         "end_date": end_date,
         "basic_pay": basic_pay,
         "day_dict": working_days_details,
+        "batch": batch,
     }
     # basic pay will be basic_pay = basic_pay - update_compensation_amount
     allowances = calculate_allowance(**kwargs)
@@ -105,7 +117,7 @@ def payroll_calculation(employee, start_date, end_date):
     kwargs["total_allowance"] = total_allowance
     gross_pay = calculate_gross_pay(**kwargs)["gross_pay"]
     updated_gross_pay_data = update_compensation_deduction(
-        employee, gross_pay, "gross_pay", start_date, end_date
+        employee, gross_pay, "gross_pay", start_date, end_date, batch
     )
     gross_pay = updated_gross_pay_data["compensation_amount"]
     gross_pay_deductions = updated_gross_pay_data["deductions"]
@@ -150,7 +162,7 @@ def payroll_calculation(employee, start_date, end_date):
 
     net_pay = (basic_pay + total_allowance) - total_deductions
     updated_net_pay_data = update_compensation_deduction(
-        employee, net_pay, "net_pay", start_date, end_date
+        employee, net_pay, "net_pay", start_date, end_date, batch
     )
     net_pay = updated_net_pay_data["compensation_amount"]
     update_net_pay_deductions = updated_net_pay_data["deductions"]
@@ -195,6 +207,34 @@ def payroll_calculation(employee, start_date, end_date):
     return payslip_data
 
 
+def batch_payroll_calculation(employees, start_date, end_date):
+    """
+    Calculate the payroll components for a group of employees within the given date range.
+
+    The contracts, leaves, attendances, allowances and deductions of the whole group are
+    prefetched once, so the number of queries does not grow with the number of employees.
+    The period of each employee starts from their active contract start date when it is
+    later than the given start date, as in `create_payslip`.
+
+    Args:
+        employees (QuerySet): The employees for whom the payroll is calculated.
+        start_date (date): The start date of the payroll period.
+        end_date (date): The end date of the payroll period.
+
+    Returns:
+        list: The payslip data of each employee, like `payroll_calculation`
+    """
+    batch = PayrollBatch(employees, start_date, end_date)
+    payslips = []
+    for employee in batch.employees:
+        contract = batch.contract(employee, contract_status="active")
+        employee_start_date = max(start_date, contract.contract_start_date)
+        payslips.append(
+            payroll_calculation(employee, employee_start_date, end_date, batch)
+        )
+    return payslips
+
+
 @login_required
 @permission_required("payroll.add_allowance")
 def create_allowance(request):
@@ -453,53 +493,75 @@ def generate_payslip(request):
     """
     Generate payslips for selected employees within a specified date range.
 
+    The payslips are generated in the background by a PayslipJob, and the user is
+    redirected to the progress page of the job.
+
     Requires the user to be logged in and have the 'payroll.add_payslip' permission.
 
     """
-    payslips = []
-    json_data = []
     form = forms.GeneratePayslipForm()
     if request.method == "POST":
         form = forms.GeneratePayslipForm(request.POST)
         if form.is_valid():
-            instances = []
-            employees = form.cleaned_data["employee_id"]
-            start_date = form.cleaned_data["start_date"]
-            end_date = form.cleaned_data["end_date"]
-            group_name = form.cleaned_data["group_name"]
-            for employee in employees:
-                contract = payroll.models.models.Contract.objects.filter(
-                    employee_id=employee, contract_status="active"
-                ).first()
-                if start_date < contract.contract_start_date:
-                    start_date = contract.contract_start_date
-                payslip = payroll_calculation(employee, start_date, end_date)
-                payslips.append(payslip)
-                json_data.append(payslip["json_data"])
-
-                payslip["payslip"] = payslip
-                data = {}
-                data["employee"] = employee
-                data["group_name"] = group_name
-                data["start_date"] = payslip["start_date"]
-                data["end_date"] = payslip["end_date"]
-                data["status"] = "draft"
-                data["contract_wage"] = payslip["contract_wage"]
-                data["basic_pay"] = payslip["basic_pay"]
-                data["gross_pay"] = payslip["gross_pay"]
-                data["deduction"] = payslip["total_deductions"]
-                data["net_pay"] = payslip["net_pay"]
-                data["pay_data"] = json.loads(payslip["json_data"])
-                instance = save_payslip(**data)
-                instances.append(instance)
-            messages.success(request, f"{employees.count()} payslip saved as draft")
-            return redirect(
-                f"/payroll/view-payslip?group_by=group_name&active_group={group_name}"
+            job = PayslipJob.objects.create(
+                group_name=form.cleaned_data["group_name"],
+                start_date=form.cleaned_data["start_date"],
+                end_date=form.cleaned_data["end_date"],
+                employee_ids=list(
+                    form.cleaned_data["employee_id"].values_list("id", flat=True)
+                ),
+                company_id_id=company_scope.get_active_company(),
             )
+            submit_payslip_job(job)
+            return redirect("payslip-job", job_id=job.id)
 
     return render(request, "payroll/common/form.html", {"form": form})
 
 
+@login_required
+@permission_required("payroll.add_payslip")
+def payslip_job(request, job_id):
+    """
+    This method is used to render the progress page of a payslip generation job
+    """
+    job = PayslipJob.objects.filter(id=job_id).first()
+    if job is None:
+        messages.error(request, _("Payslip job not found."))
+        return redirect("view-payslip")
+    return render(request, "payroll/payslip/payslip_job.html", {"job": job})
+
+
+@login_required
+@hx_request_required
+@permission_required("payroll.add_payslip")
+def payslip_job_progress(request, job_id):
+    """
+    This method is polled by the progress page to render the progress of the job.
+    A job left running by a dead worker is resumed from its pending employees, and
+    a failed job is retried on POST.
+    """
+    job = PayslipJob.objects.filter(id=job_id).first()
+    if job is None:
+        return HttpResponse(_("Payslip job not found."))
+    if request.method == "POST" and job.status == "failed":
+        job.error = None
+        submit_payslip_job(job)
+    else:
+        resume_stale_job(job)
+    if job.status == "completed":
+        messages.success(
+            request, f"{len(job.completed_employee_ids)} payslip saved as draft"
+        )
+        response = HttpResponse()
+        response["HX-Redirect"] = (
+            f"/payroll/view-payslip?group_by=group_name&active_group={job.group_name}"
+        )
+        return response
+    return render(
+        request, "payroll/payslip/payslip_job_progress.html", {"job": job}
+    )
+
+
 @login_required
 @permission_required("payroll.add_payslip")
 def create_payslip(request):
@@ -719,10 +781,9 @@ def payslip_export(request):
         "paid": _("Paid"),
     }
     selected_columns = []
-    payslips_data = {}
     payslips = PayslipFilter(request.GET).qs
     today_date = date.today().strftime("%Y-%m-%d")
-    file_name = f"Payslip_excel_{today_date}.xlsx"
+    file_name = f"Payslip_excel_{today_date}"
     selected_fields = request.GET.getlist("selected_fields")
     form = forms.PayslipExportColumnForm()
 
@@ -738,35 +799,23 @@ def payslip_export(request):
         if value in selected_fields:
             selected_columns.append((value, key))
 
-    for column_value, column_name in selected_columns:
-        nested_attributes = column_value.split("__")
-        payslips_data[column_name] = []
-        for payslip in payslips:
-            value = payslip
-            for attr in nested_attributes:
-                value = getattr(value, attr, None)
-                if value is None:
-                    break
-            data = str(value) if value is not None else ""
-            if column_name == "Status":
-                data = choices_mapping.get(value, "")
-            else:
-                data = str(value) if value is not None else ""
-            payslips_data[column_name].append(data)
-
-    data_frame = pd.DataFrame(data=payslips_data)
-    data_frame = data_frame.style.applymap(
-        lambda x: "text-align: center", subset=pd.IndexSlice[:, :]
+    def convert(column_value, value):
+        if column_value == "status":
+            return choices_mapping.get(value, "")
+        return str(value) if value is not None else ""
+
+    rows = export_rows(
+        payslips,
+        [column_value for column_value, _column_name in selected_columns],
+        convert,
+    )
+    return export_response(
+        request,
+        file_name,
+        [column_name for _column_value, column_name in selected_columns],
+        rows,
+        column_width=20,
     )
-    response = HttpResponse(content_type="application/ms-excel")
-    response["Content-Disposition"] = f'attachment; filename="{file_name}"'
-    data_frame.to_excel(response, index=False)
-    writer = pd.ExcelWriter(response, engine="xlsxwriter")
-    data_frame.to_excel(writer, index=False, sheet_name="Sheet1")
-    worksheet = writer.sheets["Sheet1"]
-    worksheet.set_column("A:Z", 20)
-    writer.close()
-    return response
 
 
 @login_required
@@ -12,3 +12,6 @@ class PmsConfig(AppConfig):
 
     default_auto_field = "django.db.models.BigAutoField"
     name = "pms"
+
+    def ready(self):
+        from pms import metrics  # noqa: F401, connects the status count signals
@@ -9,7 +9,7 @@ import django_filters
 from django import forms
 from django_filters import DateFilter
 from pms.models import EmployeeKeyResult, EmployeeObjective, Feedback
-from base.methods import reload_queryset
+from horilla_widgets.widgets.select_widgets import autocomplete_fields
 
 
 class DateRangeFilter(django_filters.Filter):
@@ -45,7 +45,7 @@ class DateRangeFilter(django_filters.Filter):
 class CustomFilterSet(django_filters.FilterSet):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        reload_queryset(self.form.fields)
+        autocomplete_fields(self.form.fields)
         for field_name, field in self.form.fields.items():
             filter_widget = self.filters[field_name]
             widget = filter_widget.field.widget
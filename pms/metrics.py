@@ -0,0 +1,78 @@
+"""
+metrics.py
+
+This module is used to compute the status counts of the PMS dashboard with
+grouped queries.
+
+The objectives, key results and feedbacks visible to the user are counted per
+status with one values("status").annotate(Count()) query each, and kept in the
+cache for METRICS_TTL seconds under a key holding the user and the active
+company. Saving or deleting an objective, a key result or a feedback bumps the
+version of the counts, so a status change is shown on the next request.
+"""
+from django.core.cache import cache
+from django.db.models import Count
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from base import company_scope
+from pms.models import EmployeeKeyResult, EmployeeObjective, Feedback
+
+METRICS_TTL = 60
+VERSION_KEY = "pms_metrics_version"
+
+
+def _version():
+    return cache.get_or_set(VERSION_KEY, 0, None)
+
+
+def invalidate_metrics():
+    """
+    Drops the cached status counts of every user
+    """
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, 1, None)
+
+
+def status_counts(user, name, queryset):
+    """
+    Returns the count of the rows of the queryset per status, as a {status:
+    count} mapping. The queryset holds the rows visible to the user, it is
+    counted when the cached counts of the user for the name expired.
+    """
+    company_id = company_scope.get_active_company()
+    key = f"pms_metrics:{name}:{_version()}:{user.pk}:{company_id}"
+    counts = cache.get(key)
+    if counts is None:
+        counts = {
+            row["status"]: row["count"]
+            for row in queryset.order_by()
+            .values("status")
+            .annotate(count=Count("id", distinct=True))
+        }
+        cache.set(key, counts, METRICS_TTL)
+    return counts
+
+
+def status_histogram(counts, status_choices):
+    """
+    Returns the labels and the counts of the status choices
+    """
+    labels = [label for _status, label in status_choices]
+    values = [counts.get(status, 0) for status, _label in status_choices]
+    return labels, values
+
+
+@receiver(post_save, sender=EmployeeObjective)
+@receiver(post_delete, sender=EmployeeObjective)
+@receiver(post_save, sender=EmployeeKeyResult)
+@receiver(post_delete, sender=EmployeeKeyResult)
+@receiver(post_save, sender=Feedback)
+@receiver(post_delete, sender=Feedback)
+def status_changed(sender, **_kwargs):
+    """
+    Drops the cached counts when an objective, a key result or a feedback
+    changes
+    """
+    invalidate_metrics()
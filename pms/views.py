@@ -16,6 +16,7 @@ from notifications.signals import notify
 from base.methods import get_key_instances
 from base.models import Department, JobPosition
 from employee.models import Employee, EmployeeWorkInformation
+from pms.metrics import status_counts, status_histogram
 from pms.filters import (
     KeyResultFilter,
     ObjectiveFilter,
@@ -1799,65 +1800,66 @@ def dashboard_view(request):
     Returns:
         it will redirect to dashboard.
     """
-    user = request.user
-    employee = Employee.objects.filter(employee_user_id=user).first()
-    is_manager = Employee.objects.filter(
-        employee_work_info__reporting_manager_id=employee
-    )
-
-    if user.has_perm("pms.view_employeeobjective") and user.has_perm(
-        "pms.view_feedback"
-    ):
-        count_objective = EmployeeObjective.objects.all().count()
-        count_key_result = EmployeeKeyResult.objects.all().count()
-        count_feedback = Feedback.objects.all().count()
-        okr_at_risk = EmployeeObjective.objects.filter(status="At Risk")
-    elif is_manager:
-        employees_ids = [employee.id for employee in is_manager]
-        count_objective = EmployeeObjective.objects.filter(
-            employee_id__in=employees_ids
-        ).count()
-        count_key_result = EmployeeObjective.objects.filter(
-            emp_obj_id__employee_id__in=employees_ids
-        ).count()
-        count_feedback = Feedback.objects.filter(employee_id__in=employees_ids).count()
-        okr_at_risk = EmployeeObjective.objects.filter(
-            employee_id__in=employees_ids
-        ).filter(status="At Risk")
-    else:
-        count_objective = EmployeeObjective.objects.filter(employee_id=employee).count()
-        count_key_result = EmployeeKeyResult.objects.filter(
-            employee_id=employee
-        ).count()
-        count_feedback = Feedback.objects.filter(employee_id=employee).count()
-        okr_at_risk = EmployeeObjective.objects.filter(employee_id=employee).filter(
-            status="At Risk"
-        )
+    objective_counts = objective_status_counts(request)
+    key_result_counts = key_result_status_counts(request)
+    feedback_counts = feedback_status_counts(request)
+    okr_at_risk = filtersubordinates(
+        request,
+        EmployeeObjective.objects.filter(status="At Risk"),
+        perm="pms.view_employeeobjective",
+    ).select_related("employee_id")
     context = {
-        "count_objective": count_objective,
-        "count_key_result": count_key_result,
-        "count_feedback": count_feedback,
+        "count_objective": sum(objective_counts.values()),
+        "count_key_result": sum(key_result_counts.values()),
+        "count_feedback": sum(feedback_counts.values()),
         "okr_at_risk": okr_at_risk,
     }
     return render(request, "dashboard/pms_dashboard.html", context)
 
 
+def objective_status_counts(request):
+    """
+    Returns the count of the objectives visible to the user per status
+    """
+    objectives = filtersubordinates(
+        request, EmployeeObjective.objects.all(), perm="pms.view_employeeobjective"
+    )
+    return status_counts(request.user, "objective", objectives)
+
+
+def key_result_status_counts(request):
+    """
+    Returns the count of the key results visible to the user per status
+    """
+    key_results = filtersubordinates(
+        request, EmployeeKeyResult.objects.all(), perm="pms.view_employeekeyresult"
+    )
+    return status_counts(request.user, "key_result", key_results)
+
+
+def feedback_status_counts(request):
+    """
+    Returns the count of the feedbacks visible to the user per status
+    """
+    feedbacks = filtersubordinates(
+        request, Feedback.objects.all(), perm="pms.view_feedback"
+    )
+    return status_counts(request.user, "feedback", feedbacks)
+
+
 @login_required
 def dashboard_objective_status(request):
     """objective dashboard data"""
     is_ajax = request.headers.get("X-Requested-With") == "XMLHttpRequest"
     if is_ajax and request.method == "GET":
-        objective_status = EmployeeObjective.STATUS_CHOICES
-        data = {"message": _("No data Found...")}
-        for status in objective_status:
-            objectives = EmployeeObjective.objects.filter(status=status[0])
-            objectives_count = filtersubordinates(
-                request, queryset=objectives, perm="pms.view_employeeobjective"
-            ).count()
-            # if not objectives_count:
-
-            data.setdefault("objective_label", []).append(status[1])
-            data.setdefault("objective_value", []).append(objectives_count)
+        labels, values = status_histogram(
+            objective_status_counts(request), EmployeeObjective.STATUS_CHOICES
+        )
+        data = {
+            "message": _("No data Found..."),
+            "objective_label": labels,
+            "objective_value": values,
+        }
         return JsonResponse(data)
 
 
@@ -1866,15 +1868,14 @@ def dashboard_key_result_status(request):
     """key result dashboard data"""
     is_ajax = request.headers.get("X-Requested-With") == "XMLHttpRequest"
     if is_ajax and request.method == "GET":
-        key_result_status = EmployeeKeyResult.STATUS_CHOICES
-        data = {"message": _("No data Found...")}
-        for i in key_result_status:
-            key_results = EmployeeKeyResult.objects.filter(status=i[0])
-            key_results_count = filtersubordinates(
-                request, queryset=key_results, perm="pms.view_employeekeyresult"
-            ).count()
-            data.setdefault("key_result_label", []).append(i[1])
-            data.setdefault("key_result_value", []).append(key_results_count)
+        labels, values = status_histogram(
+            key_result_status_counts(request), EmployeeKeyResult.STATUS_CHOICES
+        )
+        data = {
+            "message": _("No data Found..."),
+            "key_result_label": labels,
+            "key_result_value": values,
+        }
         return JsonResponse(data)
 
 
@@ -1883,15 +1884,14 @@ def dashboard_feedback_status(request):
     """feedback dashboard data"""
     is_ajax = request.headers.get("X-Requested-With") == "XMLHttpRequest"
     if is_ajax and request.method == "GET":
-        feedback_status = Feedback.STATUS_CHOICES
-        data = {"message": _("No data Found...")}
-        for i in feedback_status:
-            feedbacks = Feedback.objects.filter(status=i[0])
-            feedback_count = filtersubordinates(
-                request, queryset=feedbacks, perm="pms.view_feedback"
-            ).count()
-            data.setdefault("feedback_label", []).append(i[1])
-            data.setdefault("feedback_value", []).append(feedback_count)
+        labels, values = status_histogram(
+            feedback_status_counts(request), Feedback.STATUS_CHOICES
+        )
+        data = {
+            "message": _("No data Found..."),
+            "feedback_label": labels,
+            "feedback_value": values,
+        }
         return JsonResponse(data)
 
 
@@ -0,0 +1,171 @@
+"""
+analytics.py
+
+This module is used to compute the figures of the recruitment dashboard with
+grouped queries.
+
+The candidate counts per job position and stage type, and per recruitment and
+stage type, are read with one values().annotate(Count()) query each and kept in
+the cache as a rollup. Saving or deleting a candidate or a stage bumps the
+version of the rollup, the cached counts expire after ROLLUP_TTL seconds as
+well since queryset updates do not send the signals. The key of the rollup
+holds the active company, the counts being scoped to it.
+"""
+from django.core.cache import cache
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import ExtractMonth
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from base import company_scope
+from base.models import Department, JobPosition
+from employee.models import EmployeeWorkInformation
+from recruitment.models import Candidate, Stage
+
+STAGE_TYPES = [stage_type for stage_type, _label in Stage.stage_types]
+ROLLUP_TTL = 5 * 60
+VERSION_KEY = "recruitment_rollup_version"
+
+
+def _version():
+    return cache.get_or_set(VERSION_KEY, 0, None)
+
+
+def invalidate_rollup():
+    """
+    Drops the cached candidate counts
+    """
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, 1, None)
+
+
+def rollup(name, compute):
+    """
+    Returns the cached value of the rollup, computed when missing
+    """
+    company_id = company_scope.get_active_company()
+    key = f"recruitment_rollup:{name}:{_version()}:{company_id}"
+    value = cache.get(key)
+    if value is None:
+        value = compute()
+        cache.set(key, value, ROLLUP_TTL)
+    return value
+
+
+def _job_position_counts():
+    return {
+        (row["job_position_id"], row["stage_id__stage_type"]): row["count"]
+        for row in Candidate.objects.filter(job_position_id__isnull=False)
+        .values("job_position_id", "stage_id__stage_type")
+        .annotate(count=Count("id"))
+        .order_by()
+    }
+
+
+def _recruitment_counts():
+    # the active candidates of the stages of each recruitment
+    return {
+        (row["stage_id__recruitment_id"], row["stage_id__stage_type"]): row["count"]
+        for row in Candidate.objects.filter(is_active=True, stage_id__isnull=False)
+        .values("stage_id__recruitment_id", "stage_id__stage_type")
+        .annotate(count=Count("id"))
+        .order_by()
+    }
+
+
+def job_position_stage_counts():
+    """
+    Returns the (job position, initial, test, interview, hired) candidate
+    counts of every job position
+    """
+    counts = rollup("job_position", _job_position_counts)
+    return [
+        (job.job_position, *[counts.get((job.id, stage), 0) for stage in STAGE_TYPES])
+        for job in JobPosition.objects.all()
+    ]
+
+
+def recruitment_stage_counts(recruitments):
+    """
+    Returns the active candidate count of each stage type for every recruitment,
+    as a {recruitment id: [count per stage type]} mapping
+    """
+    counts = rollup("recruitment", _recruitment_counts)
+    return {
+        rec.id: [counts.get((rec.id, stage), 0) for stage in STAGE_TYPES]
+        for rec in recruitments
+    }
+
+
+def candidate_totals():
+    """
+    Returns the total, hired and onboarding candidate counts
+    """
+    return Candidate.objects.aggregate(
+        total=Count("id"),
+        hired=Count("id", filter=Q(hired=True)),
+        onboarding=Count("id", filter=Q(start_onboard=True)),
+    )
+
+
+def manager_mapping(recruitments):
+    """
+    Returns the names of the managers of every recruitment by title
+    """
+    return {
+        rec.title: [
+            manager.get_full_name() for manager in rec.recruitment_managers.all()
+        ]
+        for rec in recruitments.prefetch_related("recruitment_managers")
+    }
+
+
+def total_vacancy(recruitments):
+    """
+    Returns the vacancies of the recruitments
+    """
+    return recruitments.aggregate(total=Sum("vacancy"))["total"] or 0
+
+
+def joining_per_month(year):
+    """
+    Returns the count of employees joined in each month of the year
+    """
+    months = [0] * 12
+    for row in (
+        EmployeeWorkInformation.objects.filter(date_joining__year=year)
+        .annotate(month=ExtractMonth("date_joining"))
+        .values("month")
+        .annotate(count=Count("id"))
+        .order_by()
+    ):
+        months[row["month"] - 1] = row["count"]
+    return months
+
+
+def department_vacancies(recruitments):
+    """
+    Returns the (department, vacancies) of every department
+    """
+    vacancies = {
+        row["job_position_id__department_id"]: row["total"]
+        for row in recruitments.values("job_position_id__department_id")
+        .annotate(total=Sum("vacancy"))
+        .order_by()
+    }
+    return [
+        (dep.department, int(vacancies.get(dep.id) or 0))
+        for dep in Department.objects.all()
+    ]
+
+
+@receiver(post_save, sender=Candidate)
+@receiver(post_delete, sender=Candidate)
+@receiver(post_save, sender=Stage)
+@receiver(post_delete, sender=Stage)
+def candidate_changed(sender, **_kwargs):
+    """
+    Drops the cached counts when a candidate or a stage changes
+    """
+    invalidate_rollup()
@@ -18,3 +18,7 @@ class RecruitmentConfig(AppConfig):
 
     default_auto_field = "django.db.models.BigAutoField"
     name = "recruitment"
+
+    def ready(self):
+        from recruitment import analytics  # noqa: F401, connects the rollup signals
+        from recruitment import resume_index  # noqa: F401, indexes the uploaded resumes
@@ -0,0 +1,32 @@
+"""
+index_resumes.py
+
+Management command to index the words of the resumes of the candidates.
+
+The resumes are indexed when they are uploaded, this command indexes the
+resumes uploaded before the index existed or missed by a stopped process, and
+indexes every resume again with --all.
+"""
+from django.core.management.base import BaseCommand
+from recruitment.models import Candidate
+from recruitment.resume_index import index_pending
+
+
+class Command(BaseCommand):
+    help = "Indexes the words of the resumes of the candidates"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Index every resume again, not only the pending ones",
+        )
+
+    def handle(self, *args, **options):
+        candidates = None
+        if options["all"]:
+            candidates = Candidate._base_manager.exclude(resume="").only(
+                "id", "resume"
+            )
+        count = index_pending(candidates)
+        self.stdout.write(self.style.SUCCESS(f"{count} resumes indexed"))
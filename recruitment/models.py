@@ -297,6 +297,8 @@ class Candidate(models.Model):
     )
     history = HorillaAuditLog(
         related_name="history_set",
+        # the order of the candidates in the pipeline is not audited
+        excluded_fields=["sequence"],
         bases=[
             HorillaAuditInfo,
         ],
@@ -464,3 +466,39 @@ class RecruitmentSurveyAnswer(models.Model):
 
     def __str__(self) -> str:
         return f"{self.candidate_id.name}-{self.recruitment_id}"
+
+
+class ResumeIndex(models.Model):
+    """
+    ResumeIndex model, the resume of the candidate whose words are indexed
+    """
+
+    candidate_id = models.OneToOneField(
+        Candidate, on_delete=models.CASCADE, related_name="resume_index"
+    )
+    resume = models.CharField(max_length=255)
+    indexed_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self) -> str:
+        return f"{self.candidate_id}-{self.resume}"
+
+
+class ResumeWord(models.Model):
+    """
+    ResumeWord model, a word of the resume of the candidate
+    """
+
+    candidate_id = models.ForeignKey(
+        Candidate, on_delete=models.CASCADE, related_name="resume_words"
+    )
+    word = models.CharField(max_length=50, db_index=True)
+
+    class Meta:
+        """
+        Meta class to add the additional info
+        """
+
+        unique_together = ("candidate_id", "word")
+
+    def __str__(self) -> str:
+        return self.word
@@ -0,0 +1,181 @@
+"""
+resume_index.py
+
+This module is used to index the words of the resumes of the candidates, so the
+candidates are searched by the content of their resume.
+
+The text of a resume is extracted from the PDF once, when the resume is
+uploaded or by the `index_resumes` command, and its distinct lowercase words
+are stored as ResumeWord rows. A search is answered from the index of the
+words, the PDFs are not read again. The index records the file it was built
+from, a candidate whose resume changed is indexed again.
+
+The resumes are indexed on a local thread pool after the commit of the saved
+candidate, the scheduled job indexes the resumes missed by a stopped process.
+"""
+import logging
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.db.models import F, Q
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from pypdf import PdfReader
+from recruitment.models import Candidate, ResumeIndex, ResumeWord
+
+logger = logging.getLogger(__name__)
+
+MAX_PAGES = getattr(settings, "RESUME_INDEX_MAX_PAGES", 20)
+WORKERS = getattr(settings, "RESUME_INDEX_WORKERS", 1)
+WORD_PATTERN = re.compile(r"\w+")
+MIN_WORD_LENGTH = 2
+MAX_WORD_LENGTH = 50
+
+_executor = None
+_lock = threading.Lock()
+
+
+def get_executor():
+    """
+    Returns the thread pool indexing the resumes, created on first use
+    """
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=WORKERS, thread_name_prefix="resume-index"
+            )
+    return _executor
+
+
+def words(text):
+    """
+    Returns the distinct lowercase words of the text
+    """
+    return {
+        word
+        for word in WORD_PATTERN.findall(text.lower())
+        if MIN_WORD_LENGTH <= len(word) <= MAX_WORD_LENGTH
+    }
+
+
+def extract_text(resume):
+    """
+    Returns the text of the first MAX_PAGES pages of the PDF file, an empty
+    text when the file is missing or can not be read
+    """
+    try:
+        with resume.open("rb") as file:
+            reader = PdfReader(file)
+            return "\n".join(
+                page.extract_text() or "" for page in reader.pages[:MAX_PAGES]
+            )
+    except Exception:  # pylint: disable=broad-except
+        # an unreadable resume is indexed without words, not retried
+        logger.warning(
+            "Resume of the candidate %s can not be read", resume.instance.pk
+        )
+        return ""
+
+
+def index_resume(candidate):
+    """
+    Replaces the indexed words of the resume of the candidate
+    """
+    resume = candidate.resume.name
+    resume_words = words(extract_text(candidate.resume)) if resume else set()
+    with transaction.atomic():
+        ResumeWord.objects.filter(candidate_id=candidate.pk).delete()
+        ResumeWord.objects.bulk_create(
+            [
+                ResumeWord(candidate_id_id=candidate.pk, word=word)
+                for word in resume_words
+            ],
+            batch_size=500,
+        )
+        ResumeIndex.objects.update_or_create(
+            candidate_id_id=candidate.pk, defaults={"resume": resume}
+        )
+    return len(resume_words)
+
+
+def pending_candidates():
+    """
+    Returns the candidates whose resume is not indexed or changed since, of
+    every company
+    """
+    return (
+        Candidate._base_manager.exclude(resume="")
+        .exclude(resume_index__resume=F("resume"))
+        .only("id", "resume")
+    )
+
+
+def index_pending(candidates=None):
+    """
+    Indexes the resumes of the candidates, the pending candidates by default,
+    and returns the count of indexed resumes
+    """
+    if candidates is None:
+        candidates = pending_candidates()
+    count = 0
+    for candidate in candidates.iterator(chunk_size=100):
+        index_resume(candidate)
+        count += 1
+    return count
+
+
+def index_candidate(candidate_id):
+    """
+    Indexes the resume of the candidate when it is pending, run on the thread
+    pool
+    """
+    close_old_connections()
+    try:
+        index_pending(pending_candidates().filter(pk=candidate_id))
+    except Exception:  # pylint: disable=broad-except
+        logger.exception("Resume of the candidate %s is not indexed", candidate_id)
+    finally:
+        close_old_connections()
+
+
+def _prefix_filter(word):
+    if connection.vendor == "sqlite":
+        # LIKE does not use the index of the words on SQLite, the words
+        # starting with the prefix are read as a range of the index
+        return Q(word__gte=word, word__lt=word[:-1] + chr(ord(word[-1]) + 1))
+    return Q(word__startswith=word)
+
+
+def search_filter(search):
+    """
+    Returns the filter of the candidates whose resume has every word of the
+    search, the words being matched on their beginning
+    """
+    search_words = words(search)
+    if not search_words:
+        return Q(pk__in=[])
+    condition = Q()
+    for word in search_words:
+        condition &= Q(
+            pk__in=ResumeWord.objects.filter(_prefix_filter(word)).values(
+                "candidate_id"
+            )
+        )
+    return condition
+
+
+@receiver(post_save, sender=Candidate)
+def resume_saved(sender, instance, update_fields=None, **_kwargs):
+    """
+    Queues the indexing of the resume of the saved candidate, the worker skips
+    the candidates whose resume is already indexed
+    """
+    if update_fields is not None and "resume" not in update_fields:
+        return
+    if not instance.resume:
+        return
+    executor = get_executor()
+    transaction.on_commit(lambda: executor.submit(index_candidate, instance.pk))
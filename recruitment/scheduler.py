@@ -0,0 +1,17 @@
+"""
+scheduler.py
+
+This module is used to register the scheduled jobs of the recruitment app
+"""
+from horilla.scheduler import scheduled_job
+
+
+@scheduled_job("interval", minutes=10)
+def index_resumes():
+    """
+    Indexes the resumes whose indexing was missed, e.g. uploaded while the
+    process indexing them was stopped
+    """
+    from recruitment.resume_index import index_pending
+
+    index_pending()
@@ -1,5 +1,13 @@
+function updateStageBadge(stageId, change) {
+  // the badge holds the count of the stage, the candidates are loaded in pages
+  var stageBadge = $(`#stageCount${stageId}`);
+  let count = parseInt(stageBadge.html()) + change;
+  stageBadge.html(count);
+  stageBadge.attr("title", `${count} candidates`);
+}
+
 $(document).ready(function () {
-  $(".stage-change").on("change", function (e) {
+  $(document).on("change", ".stage-change", function (e) {
     e.preventDefault();
 
     // Your code here
@@ -48,12 +56,13 @@ $(document).ready(function () {
   $(".candidate-container").on("DOMNodeInserted", function (event) {
     var addedNode = event.target;
     // Check if the added node is a div with the class name "change-cand"
-    if (addedNode.nodeType === 1 && $(addedNode).hasClass("change-cand")) {
-      let count = $(this).children().filter(".change-cand").length;
+    if (
+      addedNode.nodeType === 1 &&
+      $(addedNode).hasClass("change-cand") &&
+      !$(addedNode).is("[data-lazy]")
+    ) {
       var stageId = $(this).attr("data-stage-id");
-      var stageBadge = $(`#stageCount${stageId}`);
-      stageBadge.html(count);
-      stageBadge.attr("title", `${count} candidates`);
+      updateStageBadge(stageId, 1);
       $(this).find(".stage-change").attr("data-stage-id",stageId)
     }
   });
@@ -61,13 +70,13 @@ $(document).ready(function () {
   $(".candidate-container").on("DOMNodeRemoved", function (event) {
     var removedNode = event.target;
     // Check if the removed node is a div with the class name "change-cand"
-    if (removedNode.nodeType === 1 && $(removedNode).hasClass("change-cand")) {
-      let count = $(this).children().filter(".change-cand").length;
+    if (
+      removedNode.nodeType === 1 &&
+      $(removedNode).hasClass("change-cand") &&
+      !$(removedNode).is("[data-lazy]")
+    ) {
       var stageId = $(this).attr("data-stage-id");
-      var stageBadge = $(`#stageCount${stageId}`);
-      count_element();
-      stageBadge.html(count - 1);
-      stageBadge.attr("title", `${count - 1} candidates`);
+      updateStageBadge(stageId, -1);
     }
   });
 });
@@ -31,7 +31,7 @@ function count_element() {
 
 var candidateId = null;
 
-$(".candidate").mousedown(function () {
+$(document).on("mousedown", ".candidate", function () {
   window["candidateId"] = $(this).attr("data-candidate-id");
 });
 
@@ -154,8 +154,12 @@ $('[data-container-list = "candidate"]').on("DOMNodeInserted", function (e) {
   if (e.target.nodeType === Node.ELEMENT_NODE) {
     const insertedElement = $(e.target);
 
-    // Check if the inserted element has the class you want to remove
-    if (!insertedElement.hasClass("ui-sortable-placeholder")) {
+    // Check if the inserted element has the class you want to remove, the
+    // candidates loaded with the pages of the stage are not moved
+    if (
+      !insertedElement.hasClass("ui-sortable-placeholder") &&
+      !insertedElement.is("[data-lazy], .stage-candidates-loader")
+    ) {
       
       // countSequence(candidate)
       var stageId = $(this).attr("data-stage-id");
@@ -191,7 +195,7 @@ $('[data-container-list = "candidate"]').on("DOMNodeInserted", function (e) {
   
 });
 
-$(`.change-cand`).not('[data-container-list = "candidate"]').mouseup(function (e) {
+$(document).on("mouseup", ".change-cand", function (e) {
   e.preventDefault()
   setTimeout(() => {
     var stageId = $(this).parent().attr("data-stage-id");
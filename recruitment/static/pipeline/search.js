@@ -18,106 +18,69 @@ function closeTag(element) {
   }
 }
 
+var pipelineSearchTimeout;
+
+// The candidates of every stage are loaded again from their first page with the
+// search and the job position filter, the first pages update the counts of the
+// stages. The candidates are searched on the server by their name or the words
+// of their resume.
+function reloadStageCandidates() {
+  var params = $.param({
+    search: $("#pipelineSearch").val() || "",
+    job_position: $("#job_pos_id").val() || "",
+  });
+  $(".candidate-container[data-candidates-url]").each(function () {
+    var url = $(this).attr("data-candidates-url");
+    url += (url.indexOf("?") < 0 ? "?" : "&") + params;
+    var loader = $(
+      '<div class="stage-candidates-loader" hx-trigger="loadCandidates" hx-swap="beforeend"></div>'
+    )
+      .attr("hx-get", url)
+      .attr("hx-target", "#" + this.id);
+    // the removed candidates are not counted as moved out of the stage
+    $(this).children().attr("data-lazy", "");
+    $(this).empty().append(loader);
+    htmx.process(loader[0]);
+    watchStageLoader(loader[0]);
+  });
+}
+
 $(document).ready(function () {
   $("#pipelineSearch").keyup(function (e) {
     e.preventDefault();
-    var search = $(this).val().toLowerCase();
-    $(".candidate-container div.change-cand").each(function () {
-      var candidate = $(this).attr("data-candidate");
-      if (candidate.toLowerCase().includes(search)) {
-        $(this).show();
-        $(this).addClass("search-highlight");
-      } else {
-        $(this).hide();
-        $(this).removeClass("search-highlight");
-
-      }
-    });
-    if (search == "") {
-      $(".search-highlight").removeClass("search-highlight");        
-      $('div.change-cand').show();
-
-    }
+    var search = $(this).val();
     $(".pipelineSearch").remove();
-    $(`[name="job_pos_id"]`).val("")
-    $(`[name="job_pos_id"]`).change()
-    $("#filter_item").click()
-
     if (search != "") {
       $("#filterTagContainerSectionNav").append(
-          '<span class="oh-titlebar__tag filter-field pipelineSearch">Search :' +
-          search +
+        '<span class="oh-titlebar__tag filter-field pipelineSearch">Search :' +
+          $("<span>").text(search).html() +
           `<button class="oh-titlebar__tag-close" onclick="$('#pipelineSearch').val('');$('#pipelineSearch').keyup()">
             <ion-icon name="close-outline">
             </ion-icon>
           </button>
         </span>`
       );
-      $('div.change-cand:not(.search-highlight)').hide();
-    }else{
-      $('div.change').show()
     }
+    clearTimeout(pipelineSearchTimeout);
+    pipelineSearchTimeout = setTimeout(reloadStageCandidates, 300);
   });
-  function count_element() {
-    let stage = $(".recruitment_items");
-    let count = $(".stage_count");
-    let nos = [];
-    for (i = 0; i < stage.length; i++) {
-      nos.push($(stage[i]).find("[data-candidate]:visible").length);
-    }
 
-    $.each(nos, function (index, value1) {
-      var value2 = count[index];
-      $(value2).text(value1);
-      $(value2).attr("title", `${value1} candidates`);
-    });
-  }
-
-  function job_Position() {
-    let search = $("#job_pos_id").val().toLowerCase();
-    if (search != "") {
+  $("#filter_item").on("click", function () {
+    var jobPosition = $("#job_pos_id").val();
+    $("#filterCount").empty();
+    $(".job_pos_id.filter-field").remove();
+    if (jobPosition) {
       $("#filterCount").text("(1)");
-    }
-    $(".oh-filter-tag.filter-field.job_pos_id").remove();
-    if (search != "") {
-      job = $("[data-job-position]:visible");
-      job.each(function () {
-        var candidate = $(this).attr("data-job-position");
-        if (candidate.toLowerCase().includes(search)) {
-          $(this).show();
-        } else {
-          $(this).hide();
-        }
-      });
       $("#filterTagContainerSectionNav").append(
-        '<span class="oh-titlebar__tag filter-field pipelineSearch">Search :' +
-        search +
-        `<button class="oh-titlebar__tag-close" onclick="$('#pipelineSearch').val('');$('#pipelineSearch').keyup()">
-          <ion-icon name="close-outline">
-          </ion-icon>
-        </button>
-      </span>`
-    );
+        '<span class="oh-titlebar__tag filter-field job_pos_id">Job Position :' +
+          $("<span>").text(jobPosition).html() +
+          `<button class="oh-titlebar__tag-close" onclick="closeTag($(this).parent())">
+            <ion-icon name="close-outline">
+            </ion-icon>
+          </button>
+        </span>`
+      );
     }
-  }
-
-  $("#filter_item").on("click", function () {
-    $("#filterCount").empty();
-    var candidate = $("[data-job-position]");
-    candidate.each(function () {
-      $(this).show();
-    });
-    $(".pipeline_items").each(function () {
-      $(this).removeClass("d-none");
-    });
-    job_Position();
-    count_element();
-  });
-  $(".oh-tabs__tab").on("click", function () {
-    $(".pipeline_items").each(function () {
-      $(this).removeClass("d-none");
-    });
-    job_Position();
-    count_element();
+    reloadStageCandidates();
   });
 });
@@ -0,0 +1,59 @@
+// The candidates of the stages are loaded page by page, the loader at the end
+// of a stage requests the next page when it is scrolled into view. The loaders
+// of the hidden tabs and stages are requested once they are shown.
+var stageCandidatesObserver = new IntersectionObserver(
+  function (entries) {
+    entries.forEach(function (entry) {
+      if (entry.isIntersecting) {
+        stageCandidatesObserver.unobserve(entry.target);
+        htmx.trigger(entry.target, "loadCandidates");
+      }
+    });
+  },
+  { rootMargin: "200px" }
+);
+
+function watchStageLoader(loader) {
+  stageCandidatesObserver.observe(loader);
+  loader.addEventListener("htmx:beforeOnLoad", function (event) {
+    // the loader was removed by a new search, its page is not added
+    if (!document.body.contains(loader)) {
+      event.preventDefault();
+    }
+  });
+}
+
+$(document).ready(function () {
+  $(".stage-candidates-loader").each(function () {
+    watchStageLoader(this);
+  });
+});
+
+$(document).on("htmx:load", ".stage-candidates-loader", function () {
+  watchStageLoader(this);
+});
+
+$(document).on("htmx:afterRequest", ".stage-candidates-loader", function () {
+  $(this).remove();
+});
+
+// The loaded candidates are marked data-lazy until they are settled, so the
+// handlers of the candidates moved between the stages skip them
+$(document).on("htmx:load", "[data-lazy]", function () {
+  var candidateId = $(this).attr("data-candidate-id");
+  if ($(`.change-cand[data-candidate-id=${candidateId}]`).length > 1) {
+    // moved to this stage before its page was loaded
+    $(this).remove();
+    return;
+  }
+  $(this)
+    .find(".oh-kanban__dropdown-toggle")
+    .on("click", function (e) {
+      e.preventDefault();
+      $(this)
+        .parents(".oh-kanban__dropdown")
+        .find(".oh-kanban__dropdown-menu")
+        .toggleClass("d-none");
+    });
+  $(this).removeAttr("data-lazy");
+});
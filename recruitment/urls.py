@@ -42,6 +42,11 @@ urlpatterns = [
     ),
     path("pipeline/", views.recruitment_pipeline, name="pipeline"),
     path("pipeline-card", views.recruitment_pipeline_card, name="pipeline-card"),
+    path(
+        "pipeline-stage-candidates/<int:stage_id>/",
+        views.pipeline_stage_candidates,
+        name="pipeline-stage-candidates",
+    ),
     path(
         "pipeline-search-candidate",
         recruitment.views.search.pipeline_candidate_search,
@@ -16,6 +16,7 @@ from django.views.decorators.http import require_http_methods
 from django.shortcuts import render, redirect
 from employee.models import Employee
 from horilla.decorators import login_required, permission_required
+from horilla_audit.methods import buffered_history
 from notifications.signals import notify
 from recruitment.models import Candidate, Recruitment, Stage, StageNote
 from recruitment.views.paginator_qry import paginator_qry
@@ -262,16 +263,17 @@ def candidate_bulk_archive(request):
     if request.GET.get("is_active") == "False":
         is_active = False
         message = _("archived")
-    for cand_id in ids:
-        candidate_obj = Candidate.objects.get(id=cand_id)
-        candidate_obj.is_active = is_active
-        candidate_obj.save()
-        messages.success(
-            request,
-            _("{candidate} is {message}").format(
-                candidate=candidate_obj, message=message
-            ),
-        )
+    with buffered_history():
+        for cand_id in ids:
+            candidate_obj = Candidate.objects.get(id=cand_id)
+            candidate_obj.is_active = is_active
+            candidate_obj.save()
+            messages.success(
+                request,
+                _("{candidate} is {message}").format(
+                    candidate=candidate_obj, message=message
+                ),
+            )
     return JsonResponse({"message": "Success"})
 
 
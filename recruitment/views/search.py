@@ -5,12 +5,13 @@ This module is used to register search/filter views methods
 """
 
 
-import json
 from urllib.parse import parse_qs
 from django.shortcuts import render
+from django.db.models import Q
 from django.core.paginator import Paginator
 from horilla.decorators import login_required, permission_required
 from base.methods import sortby, get_key_instances
+from base.pagination import page_ids
 from recruitment.filters import (
     CandidateFilter,
     RecruitmentFilter,
@@ -18,6 +19,7 @@ from recruitment.filters import (
     SurveyFilter,
 )
 from recruitment.models import Candidate, Recruitment, Stage, RecruitmentSurvey
+from recruitment.resume_index import search_filter
 from recruitment.views.paginator_qry import paginator_qry
 
 
@@ -76,7 +78,12 @@ def candidate_search(request):
     search = request.GET.get("search")
     if search is None:
         search = ""
-    candidates = Candidate.objects.filter(name__icontains=search)
+    candidates = Candidate.objects.all()
+    if search:
+        # the name of the candidate or the words of the resume
+        candidates = candidates.filter(
+            Q(name__icontains=search) | search_filter(search)
+        )
     candidates = CandidateFilter(request.GET, queryset=candidates).qs
     data_dict = []
     if not request.GET.get("dashboard"):
@@ -153,14 +160,15 @@ def filter_survey(request):
     previous_data = request.GET.urlencode()
     filter_obj = SurveyFilter(request.GET)
     questions = filter_obj.qs
-    requests_ids = json.dumps([instance.id for instance in paginator_qry(questions, request.GET.get("page")).object_list])
+    requests_page = paginator_qry(questions, request.GET.get("page"))
+    requests_ids = page_ids(requests_page)
     data_dict = parse_qs(previous_data)
     get_key_instances(RecruitmentSurvey, data_dict)
     return render(
         request,
         "survey/survey_card.html",
         {
-            "questions": paginator_qry(questions, request.GET.get("page")),
+            "questions": requests_page,
             "pd": previous_data,
             "filter_dict": data_dict,
             "requests_ids":requests_ids,
@@ -13,6 +13,7 @@ from django.contrib import messages
 from django.http import HttpResponse
 from django.utils.translation import gettext_lazy as _
 from base.methods import closest_numbers
+from base.pagination import page_ids
 from horilla.decorators import login_required, permission_required
 from recruitment.models import Recruitment
 from recruitment.forms import ApplicationForm, SurveyForm, QuestionForm
@@ -126,7 +127,8 @@ def view_question_template(request):
     """
     questions = RecruitmentSurvey.objects.all()
     filter_obj = SurveyFilter()
-    requests_ids = json.dumps([instance.id for instance in paginator_qry(questions, request.GET.get("page")).object_list])
+    requests_page = paginator_qry(questions, request.GET.get("page"))
+    requests_ids = page_ids(requests_page)
     if questions.exists():
         template = "survey/view_question_templates.html"
     else:
@@ -135,7 +137,7 @@ def view_question_template(request):
         request,
         template,
         {
-            "questions": paginator_qry(questions, request.GET.get("page")),
+            "questions": requests_page,
             "f": filter_obj,
             "requests_ids":requests_ids,
         },
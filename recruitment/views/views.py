@@ -17,7 +17,8 @@ import json
 import contextlib
 from urllib.parse import parse_qs
 from django.conf import settings
-from django.db.models import Q
+from django.db.models import Count, Prefetch, Q
+from django.db.models.functions import Coalesce
 from django.http import JsonResponse, HttpResponse, HttpResponseRedirect
 from django.shortcuts import render, redirect
 from django.core import serializers
@@ -30,9 +31,11 @@ from django.utils.translation import gettext_lazy as _
 from notifications.signals import notify
 from horilla import settings
 from horilla.decorators import permission_required, login_required, hx_request_required
-from base.methods import export_data, get_key_instances
+from base.methods import export_data, get_key_instances, update_sequences
+from base.pagination import seek_rows
 from recruitment.views.paginator_qry import paginator_qry
 from recruitment.models import Recruitment, Candidate, Stage, StageNote
+from recruitment.resume_index import search_filter
 from recruitment.filters import (
     CandidateFilter,
     CandidateReGroup,
@@ -52,6 +55,8 @@ from recruitment.forms import (
     StageNoteForm,
 )
 
+PIPELINE_PER_PAGE = 20
+
 
 def is_stagemanager(request, stage_id=False):
     """
@@ -237,7 +242,20 @@ def recruitment_pipeline(request):
     recruitment_form = RecruitmentDropDownForm()
     stage_form = StageDropDownForm()
     candidate_form = CandidateDropDownForm()
-    recruitment_obj = Recruitment.objects.filter(is_active=True, closed=False)
+    # the board is rendered without candidates, the columns load them in pages
+    stages = (
+        Stage.objects.annotate(
+            candidate_count=Count(
+                "candidate",
+                filter=Q(candidate__canceled=False, candidate__is_active=True),
+            )
+        )
+        .prefetch_related("stage_managers")
+        .order_by("sequence")
+    )
+    recruitment_obj = Recruitment.objects.filter(
+        is_active=True, closed=False
+    ).prefetch_related(Prefetch("stage_set", queryset=stages))
     if request.method == "POST":
         if request.POST.get(
             "recruitment_managers"
@@ -343,6 +361,59 @@ def recruitment_pipeline(request):
     )
 
 
+@login_required
+@manager_can_enter(perm="recruitment.view_recruitment")
+def pipeline_stage_candidates(request, stage_id):
+    """
+    This method is used to render a page of the active candidates of a stage
+    column on the pipeline, the column requests the next page when its end is
+    scrolled into view. The pages are read after the last candidate of the
+    previous page, so the candidates moved out of the column do not shift them.
+    The candidates are searched by their name or the words of their resume, and
+    filtered by the name of their job position.
+    """
+    stage = Stage.objects.select_related("recruitment_id").get(id=stage_id)
+    candidates = (
+        Candidate.objects.filter(stage_id=stage, canceled=False, is_active=True)
+        .select_related("job_position_id")
+        .annotate(position=Coalesce("sequence", 0))
+    )
+    search = request.GET.get("search", "").strip()
+    if search:
+        candidates = candidates.filter(
+            Q(name__icontains=search) | search_filter(search)
+        )
+    job_position = request.GET.get("job_position", "").strip()
+    if job_position:
+        candidates = candidates.filter(job_position_id__job_position=job_position)
+    cursor = request.GET.get("cursor")
+    # the count of the column is sent with its first page
+    count = None if cursor else candidates.count()
+    rows, next_cursor = seek_rows(
+        candidates, ("position", "id"), cursor, per_page=PIPELINE_PER_PAGE
+    )
+    next_query = ""
+    if next_cursor:
+        params = request.GET.copy()
+        params["cursor"] = next_cursor
+        next_query = params.urlencode()
+    template = "pipeline/pipeline_components/stage_candidates.html"
+    if request.GET.get("view") == "card":
+        template = "pipeline/pipeline_components/stage_candidate_cards.html"
+    return render(
+        request,
+        template,
+        {
+            "stage": stage,
+            "rec": stage.recruitment_id,
+            "stages": stage.recruitment_id.stage_set.all(),
+            "candidates": rows,
+            "count": count,
+            "next_query": next_query,
+        },
+    )
+
+
 @login_required
 @permission_required(perm="recruitment.view_recruitment")
 def recruitment_pipeline_card(request):
@@ -1041,11 +1112,7 @@ def candidate_sequence_update(request):
     This method is used to update the sequence of candidate
     """
     sequence_data = json.loads(request.POST["sequenceData"])
-    for cand_id, seq in sequence_data.items():
-        cand = Candidate.objects.get(id=cand_id)
-        cand.sequence = seq
-        cand.save()
-
+    update_sequences(Candidate.objects.all(), sequence_data)
     return JsonResponse({"message": "Sequence updated", "type": "info"})
 
 
@@ -1056,10 +1123,7 @@ def stage_sequence_update(request):
     This method is used to update the sequence of the stages
     """
     sequence_data = json.loads(request.POST["sequence"])
-    for stage_id, seq in sequence_data.items():
-        stage = Stage.objects.get(id=stage_id)
-        stage.sequence = seq
-        stage.save()
+    update_sequences(Stage.objects.all(), sequence_data)
     return JsonResponse({"type": "success", "message": "Stage sequence updated"})
 
 